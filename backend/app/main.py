@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import time
 import sys
@@ -9,12 +10,13 @@ import os
 # Add stubs to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.routers import streaming, embeddings, employees, attendance, auth, user_management
+from app.routers import streaming, embeddings, employees, attendance, auth, user_management, events, system
 from app.config import settings
 from utils.logging import setup_logging, get_logger, log_request
 from utils.master_admin_setup import initialize_master_admin_if_needed
 from tasks.camera_tasks import start_background_monitoring, stop_background_monitoring
 from db.db_config import create_tables
+from core.fts_system import get_startup_status
 
 # Setup logging
 setup_logging()
@@ -104,8 +106,17 @@ app.include_router(streaming.router)
 app.include_router(embeddings.router)
 app.include_router(employees.router)
 app.include_router(attendance.router)
+app.include_router(events.router)
+app.include_router(system.router)
 
 
 @app.get("/")
 async def root():
     return {"message": "Face Tracking System API Running"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Per-component startup readiness; 503 until models, gallery and cameras are all up."""
+    status = get_startup_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
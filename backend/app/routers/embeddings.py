@@ -2,13 +2,15 @@ from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.concurrency import run_in_threadpool
 from core.face_enroller import FaceEnroller
-from core.fts_system import FaceTrackingPipeline
+from core.fts_system import get_shared_pipeline
 from pydantic import BaseModel
 import numpy as np
-import cv2
 import logging
 import os
 import jwt
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -52,7 +54,7 @@ class EnrollerSingleton:
     @classmethod
     def get_instance(cls):
         if cls.instance is None:
-            pipeline = FaceTrackingPipeline()
+            pipeline = get_shared_pipeline()
             cls.instance = FaceEnroller(tracking_system=pipeline.system)
         return cls.instance
 
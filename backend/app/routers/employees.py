@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from db.db_manager import DatabaseManager
+from core.employee_metadata import employee_metadata_store
 from app.routers.auth import verify_token
 from pydantic import BaseModel
 from typing import List, Optional
@@ -120,6 +121,7 @@ def create_employee(
         if not created:
             raise HTTPException(status_code=400, detail="Employee already exists")
         emp = db.get_employee(request.employee_id)
+        employee_metadata_store.upsert_employee(emp)
         return EmployeeResponse(
             employee_id=emp.id,
             name=emp.employee_name,
@@ -158,6 +160,7 @@ def update_employee(
         )
 
         emp = db.get_employee(employee_id)
+        employee_metadata_store.upsert_employee(emp)
         return EmployeeResponse(
             employee_id=emp.id,
             name=emp.employee_name,
@@ -181,6 +184,8 @@ def delete_employee(
 ):
     try:
         success = db.delete_employee(employee_id)
+        if success:
+            employee_metadata_store.remove(employee_id)
         return DeleteResponse(
             deleted=success,
             message="Employee deleted" if success else "Employee not found"
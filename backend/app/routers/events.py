@@ -0,0 +1,84 @@
+import asyncio
+import json
+import time
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from core.event_hub import event_hub, TOPICS
+from core.fts_system import get_attendance_data, get_system_status
+from utils.security import decode_token
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Router Setup
+router = APIRouter(tags=["Events"])
+
+
+def parse_topics(topics: Optional[List[str]]) -> List[str]:
+    """Keep only known topic names; no topics means all of them."""
+    if not topics:
+        return list(TOPICS)
+    return [topic for topic in topics if topic in TOPICS]
+
+
+@router.websocket("/ws/events")
+async def events_socket(websocket: WebSocket, token: str = Query(...), topics: Optional[str] = Query(None)):
+    """
+    Push live deltas instead of polling: new attendance events, throttled
+    per-camera face boxes, presence changes and stats ticks.
+    Clients may send {"action": "subscribe" | "unsubscribe", "topics": [...]}
+    to change their topics; `topics` in the query string sets the initial ones.
+    """
+    try:
+        user = decode_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = event_hub.register(
+        asyncio.get_running_loop(),
+        parse_topics(topics.split(",") if topics else None))
+    logger.info(f"🔌 Event socket opened by user {user.get('sub')} (topics: {sorted(subscriber.topics)})")
+
+    # Baseline state so the client only has to apply deltas afterwards
+    await websocket.send_text(json.dumps({
+        "topic": "snapshot",
+        "ts": time.time(),
+        "data": {
+            "stats": get_system_status(),
+            "attendance": get_attendance_data()}}, default=str))
+
+    async def send_loop():
+        while True:
+            await websocket.send_text(await subscriber.next_message())
+
+    async def receive_loop():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                continue
+            if not isinstance(message, dict):
+                continue
+            requested = set(parse_topics(message.get("topics"))) if message.get("topics") else set()
+            if message.get("action") == "subscribe":
+                subscriber.topics = subscriber.topics | requested
+            elif message.get("action") == "unsubscribe":
+                subscriber.topics = subscriber.topics - requested
+
+    tasks = {asyncio.create_task(send_loop()), asyncio.create_task(receive_loop())}
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"Event socket error: {error}")
+    finally:
+        event_hub.unregister(subscriber)
+        logger.info(
+            f"Event socket closed for user {user.get('sub')} "
+            f"(sent: {subscriber.sent}, dropped: {subscriber.dropped})")
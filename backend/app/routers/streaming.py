@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import StreamingResponse
-from core.fts_system import FaceTrackingPipeline, generate_mjpeg
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from core.fts_system import generate_mjpeg, get_shared_pipeline, get_stream_broadcaster
 from utils.security import verify_token
 from utils.logging import get_logger
 from tasks.camera_tasks import stream_manager
@@ -12,17 +13,6 @@ logger = get_logger(__name__)
 # Router Setup
 router = APIRouter(prefix="/stream", tags=["Streaming"])
 
-# Singleton Pipeline Manager
-class PipelineSingleton:
-    instance = None
-
-    @classmethod
-    def get_pipeline(cls):
-        if cls.instance is None:
-            cls.instance = FaceTrackingPipeline()
-        return cls.instance
-
-
 @router.get("/{camera_id}")
 async def stream_camera(camera_id: int, request: Request, user=Depends(verify_token)):
     """
@@ -44,13 +34,16 @@ async def stream_camera(camera_id: int, request: Request, user=Depends(verify_to
             detail=f"Too many active streams for camera {camera_id}"
         )
     
-    pipeline = PipelineSingleton.get_pipeline()
+    # First use builds the process-wide pipeline; keep that off the event loop
+    await run_in_threadpool(get_shared_pipeline)
     
     async def safe_stream():
         """Safe streaming generator with proper resource management."""
+        frames = generate_mjpeg(camera_id)
         try:
-            with stream_manager.get_stream(camera_id) as cap:
-                for frame in generate_mjpeg(camera_id, cap):
+            with stream_manager.track_stream(camera_id):
+                # Frames are rendered by the pipeline's broadcaster; wait for them off the event loop
+                async for frame in iterate_in_threadpool(frames):
                     # Check if client disconnected
                     if await request.is_disconnected():
                         logger.info(f"Client disconnected from camera {camera_id}")
@@ -64,6 +57,12 @@ async def stream_camera(camera_id: int, request: Request, user=Depends(verify_to
         except Exception as e:
             logger.error(f"Stream error for camera {camera_id}: {e}")
             return
+        finally:
+            # Closing the generator releases the broadcaster subscription
+            try:
+                frames.close()
+            except ValueError:
+                pass  # Still running in the threadpool; released once it is collected
 
     logger.info(
         f"🔴 Stream started for camera {camera_id} by user {user.get('sub')} "
@@ -80,6 +79,37 @@ async def stream_camera(camera_id: int, request: Request, user=Depends(verify_to
         }
     )
 
+@router.get("/{camera_id}/snapshot")
+async def camera_snapshot(
+    camera_id: int,
+    request: Request,
+    max_age: float = Query(0.0, ge=0.0, le=60.0),
+    user=Depends(verify_token)
+):
+    """
+    Return the most recent overlay frame as a single JPEG.
+    The encoding is shared by all requests for the same frame; clients can send
+    If-None-Match to skip unchanged frames and max_age to accept a slightly older one.
+    """
+    broadcaster = get_stream_broadcaster(camera_id)
+    if broadcaster is None:
+        raise HTTPException(status_code=404, detail=f"Camera {camera_id} is not being tracked")
+
+    snapshot = await run_in_threadpool(broadcaster.snapshot, max_age)
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail=f"No frame available for camera {camera_id}")
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"private, max-age={int(max_age)}"
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if snapshot.etag in client_etags or "*" in client_etags:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=snapshot.jpeg, media_type="image/jpeg", headers=headers)
+
 @router.get("/status/{camera_id}")
 async def get_camera_status(camera_id: int, user=Depends(verify_token)):
     """Get status information for a specific camera."""
@@ -0,0 +1,40 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from core.fts_system import get_pipeline_metrics, get_logs
+from utils.security import verify_token
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Router Setup
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get("/metrics")
+async def pipeline_metrics(user=Depends(verify_token)):
+    """
+    Per-consumer queue depth, lag and drop counters of the attendance event bus,
+    plus live event fan-out and metadata cache statistics.
+    """
+    return get_pipeline_metrics()
+
+
+@router.get("/logs")
+async def recent_logs(
+    n: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    level: Optional[str] = None,
+    component: Optional[str] = None,
+    camera_id: Optional[int] = None,
+    employee_id: Optional[str] = None,
+    after_seq: Optional[int] = None,
+    user=Depends(verify_token)
+):
+    """
+    Page through the in-memory ring of recent pipeline log records.
+    `level` is a minimum level; `after_seq` returns only records newer than a
+    previously seen sequence number, for tailing.
+    """
+    return get_logs(n=n, offset=offset, level=level, component=component,
+                    camera_id=camera_id, employee_id=employee_id, after_seq=after_seq)
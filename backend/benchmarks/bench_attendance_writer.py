@@ -0,0 +1,82 @@
+"""
+Attendance persistence throughput: session-per-row log_attendance vs. the group-commit writer.
+
+Also replays the same events a second time to check that idempotency keys
+prevent duplicate rows. Defaults to a throwaway SQLite file; pass
+--database-url postgresql://... to run against Postgres.
+
+    python benchmarks/bench_attendance_writer.py --events 5000 --batch 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_events(count, employees):
+    from core.event_bus import AttendanceEvent
+    start = datetime.now() - timedelta(hours=1)
+    return [
+        AttendanceEvent(
+            employee_id=f"EMP{i % employees:05d}",
+            employee_name=f"Employee {i % employees}",
+            camera_id=i % 2,
+            event_type="check_in" if i % 2 == 0 else "check_out",
+            timestamp=start + timedelta(seconds=i),
+            tripwire="EntryDetection")
+        for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--baseline", type=int, default=1000, help="events written row by row for comparison")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_attendance_'), 'bench.db')}"
+    from db.db_config import create_tables
+    from db.db_manager import DatabaseManager
+    from db.db_models import AttendanceRecord
+    from core.attendance_writer import AttendanceWriter
+
+    create_tables()
+    db_manager = DatabaseManager()
+    events = make_events(args.events, args.employees)
+
+    started = time.perf_counter()
+    for event in events[:args.baseline]:
+        db_manager.log_attendance(event.employee_id, event.camera_id, event.event_type, notes=event.tripwire)
+    per_row = args.baseline / (time.perf_counter() - started)
+
+    session = db_manager.Session()
+    session.query(AttendanceRecord).delete()
+    session.commit()
+    session.close()
+
+    writer = AttendanceWriter()
+    started = time.perf_counter()
+    for i in range(0, len(events), args.batch):
+        writer.write_batch(events[i:i + args.batch])
+    grouped = len(events) / (time.perf_counter() - started)
+
+    replayed = sum(writer.write_batch(events[i:i + args.batch]) for i in range(0, len(events), args.batch))
+    session = db_manager.Session()
+    stored = session.query(AttendanceRecord).count()
+    session.close()
+
+    print(f"{os.environ['DATABASE_URL'].split(':')[0]}: {len(events)} events, batch {args.batch}")
+    print(f"session per row:  {per_row:10.0f} events/s")
+    print(f"group commit:     {grouped:10.0f} events/s ({grouped / per_row:.0f}x)")
+    print(f"replay inserted {replayed} rows; {stored} rows stored for {len(events)} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Kalman benchmark: one cv2.KalmanFilter per track vs the batched filter.
+
+Feeds the same noisy constant-velocity walks to per-object OpenCV filters
+(the previous KalmanTracker) and to BatchKalmanFilter, and reports the time
+per frame for a range of concurrent track counts together with the largest
+difference between the two sets of predictions.
+
+    python benchmarks/bench_batch_kalman.py --tracks 1 10 50 100 200 --frames 300
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.batch_kalman import BatchKalmanFilter
+
+PROCESS_NOISE = 0.1
+MEASUREMENT_NOISE = 0.1
+
+
+class KalmanTracker:
+    """The previous per-identity tracker."""
+    def __init__(self):
+        self.kalman = cv2.KalmanFilter(4, 2)
+        self.kalman.measurementMatrix = np.array([[1, 0, 0, 0],
+                                                  [0, 1, 0, 0]], np.float32)
+        self.kalman.transitionMatrix = np.array([[1, 0, 1, 0],
+                                                 [0, 1, 0, 1],
+                                                 [0, 0, 1, 0],
+                                                 [0, 0, 0, 1]], np.float32)
+        self.kalman.processNoiseCov = PROCESS_NOISE * np.eye(4, dtype=np.float32)
+        self.kalman.measurementNoiseCov = MEASUREMENT_NOISE * np.eye(2, dtype=np.float32)
+        self.kalman.errorCovPost = np.eye(4, dtype=np.float32)
+        self.initialized = False
+
+    def update(self, center_x: int, center_y: int):
+        measurement = np.array([[np.float32(center_x)], [np.float32(center_y)]])
+        if not self.initialized:
+            self.kalman.statePre = np.array([center_x, center_y, 0, 0], dtype=np.float32).reshape(4, 1)
+            self.kalman.statePost = np.array([center_x, center_y, 0, 0], dtype=np.float32).reshape(4, 1)
+            self.initialized = True
+        prediction = self.kalman.predict()
+        self.kalman.correct(measurement)
+        return int(prediction[0, 0]), int(prediction[1, 0])
+
+
+def make_walks(tracks, frames, seed=3):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0, 1280, size=(tracks, 2))
+    velocity = rng.uniform(-8, 8, size=(tracks, 2))
+    steps = np.arange(frames)[:, None, None]
+    noise = rng.normal(0, 2, size=(frames, tracks, 2))
+    return np.rint(start + velocity * steps + noise).astype(int)
+
+
+def bench(tracks, frames):
+    walks = make_walks(tracks, frames)
+    keys = [f"E{i:04d}" for i in range(tracks)]
+
+    trackers = {key: KalmanTracker() for key in keys}
+    per_object = np.empty((frames, tracks, 2))
+    started = time.perf_counter()
+    for frame in range(frames):
+        for i, key in enumerate(keys):
+            per_object[frame, i] = trackers[key].update(walks[frame, i, 0], walks[frame, i, 1])
+    per_object_time = (time.perf_counter() - started) / frames
+
+    batch = BatchKalmanFilter(process_noise=PROCESS_NOISE, measurement_noise=MEASUREMENT_NOISE)
+    batched = np.empty((frames, tracks, 2))
+    started = time.perf_counter()
+    for frame in range(frames):
+        batched[frame] = batch.update(keys, walks[frame], now=frame)
+    batch_time = (time.perf_counter() - started) / frames
+
+    # The per-object tracker truncates to int; compare against the same
+    max_diff = np.abs(per_object - np.trunc(batched)).max()
+    print(f"{tracks:>6} {per_object_time * 1e3:>14.3f} {batch_time * 1e3:>12.3f} "
+          f"{per_object_time / batch_time:>8.1f}x {max_diff:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    print(f"{'tracks':>6} {'cv2 ms/frame':>14} {'batch ms/frame':>12} {'speedup':>9} {'max diff px':>10}")
+    for tracks in args.tracks:
+        bench(tracks, args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Detection hand-off benchmark: lists of Face dict-objects vs DetectionBatch.
+
+Replays the path a frame's detections take: publishing them from the
+detection thread (previously also rebuilding the API's dict list with
+bbox.tolist() per face), consuming them on every displayed frame (copying the
+list and reading bbox and embedding per face), and serving them to an API
+client. The batch builds the API's JSON only when a client asks ("API"); the
+dict list used to be rebuilt on every detection. Also reports the memory held
+per detection.
+
+    python benchmarks/bench_detection_batch.py --faces 1 10 30 --reads 3
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detection_batch import DetectionBatch
+
+
+class Face(dict):
+    """Stand-in for insightface.app.common.Face: a dict with attribute access."""
+    def __getattr__(self, name):
+        return self.get(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def make_faces(count, rng):
+    faces = []
+    for _ in range(count):
+        side = rng.uniform(40, 160)
+        x, y = rng.uniform(0, 1100), rng.uniform(0, 560)
+        faces.append(Face(
+            bbox=np.array([x, y, x + side, y + side], dtype=np.float32),
+            kps=rng.uniform(0, 1280, (5, 2)).astype(np.float32),
+            det_score=np.float32(rng.uniform(0.5, 1.0)),
+            pose=rng.uniform(-20, 20, 3).astype(np.float32),
+            embedding=rng.standard_normal(512).astype(np.float32)))
+    return faces
+
+
+def legacy_publish(faces, scale):
+    for face in faces:
+        face.bbox = face.bbox / scale
+    return faces, [{"identity": face.get('identity', 'unknown'), "bbox": face.bbox.tolist(),
+                    "confidence": face.det_score} for face in faces]
+
+
+def legacy_frame(faces):
+    faces = faces[:]
+    for face in faces:
+        bbox = face.bbox.astype(int)
+        embedding = np.asarray(face.embedding, dtype=np.float32)
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+    return [face.bbox for face in faces]
+
+
+def batch_frame(detections):
+    boxes = detections.boxes
+    centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+    for index in range(len(detections)):
+        embedding = detections.embedding(index)
+    return boxes
+
+
+def best_time(function, number=300):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def held_bytes(build):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--reads", type=int, default=3, help="displayed frames per detection")
+    args = parser.parse_args()
+    rng = np.random.default_rng(6)
+    print(f"{'faces':>6} {'layout':<8} {'publish us':>11} {'frame us':>9} {'per detection us':>17} "
+          f"{'API us':>7} {'bytes/face':>11}")
+    for count in args.faces:
+        faces = make_faces(count, rng)
+        publish = best_time(lambda: legacy_publish(list(faces), 1.0))
+        frame = best_time(lambda: legacy_frame(faces))
+        held = held_bytes(lambda: legacy_publish(make_faces(count, np.random.default_rng(1)), 1.0))
+        print(f"{count:>6} {'faces':<8} {publish * 1e6:>11.1f} {frame * 1e6:>9.1f} "
+              f"{(publish + args.reads * frame) * 1e6:>17.1f} {0.0:>7.1f} {held / count:>11.0f}")
+        publish = best_time(lambda: DetectionBatch.from_faces(faces, 0, 0, 0.0))
+        detections = DetectionBatch.from_faces(faces, 0, 0, 0.0)
+        frame = best_time(lambda: batch_frame(detections))
+        api = best_time(lambda: (setattr(detections, '_json', None), detections.to_json()))
+        source = make_faces(count, np.random.default_rng(1))
+        held = held_bytes(lambda: DetectionBatch.from_faces(source, 0, 0, 0.0))
+        print(f"{count:>6} {'batch':<8} {publish * 1e6:>11.1f} {frame * 1e6:>9.1f} "
+              f"{(publish + args.reads * frame) * 1e6:>17.1f} {api * 1e6:>7.1f} {held / count:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Embedding loader benchmark: per-row ORM + .npy decoding vs the columnar loader.
+
+Fills a temporary SQLite database with --rows embeddings in the old .npy
+format (an enroll embedding and several updates per employee) and loads the
+active gallery the previous way: two ORM queries materializing full
+FaceEmbedding objects, a Python loop keeping each employee's 3 latest
+updates and np.load per row. It then runs the raw_float32_embeddings
+migration and loads the same gallery with DatabaseManager.get_active_gallery:
+one query of (id, employee_id, embedding_data) with a row_number() window
+for the top-3 updates, decoded with one np.frombuffer. Both loaders must
+return the same (label, vector) rows.
+
+    python benchmarks/bench_embedding_loader.py --rows 100000 --dim 512
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_embeddings_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'embeddings.db')}"
+
+from sqlalchemy import and_, desc  # noqa: E402
+
+from db.db_config import Base, SessionLocal, create_tables, engine  # noqa: E402
+from db.db_manager import DatabaseManager  # noqa: E402
+from db.db_models import Employee, FaceEmbedding  # noqa: E402
+
+
+def best_time(fn, repeat=3):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def npy_blob(vector):
+    buffer = BytesIO()
+    np.save(buffer, vector)
+    return buffer.getvalue()
+
+
+def fill_database(rows, dim, per_employee):
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(0)
+    employees = rows // per_employee
+    started = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(Employee.__table__.insert(),
+                           [{"id": f"EMP{i:06d}", "employee_name": f"Employee {i}"} for i in range(employees)])
+        for start in range(0, rows, 10_000):
+            vectors = rng.standard_normal((min(10_000, rows - start), dim), dtype=np.float32)
+            connection.execute(FaceEmbedding.__table__.insert(), [
+                {"employee_id": f"EMP{(start + i) // per_employee % employees:06d}",
+                 "embedding_data": npy_blob(vector),
+                 "embedding_type": "enroll" if (start + i) % per_employee == 0 else "update",
+                 "quality_score": 1.0, "is_active": True,
+                 "created_at": started + timedelta(seconds=start + i)}
+                for i, vector in enumerate(vectors)])
+
+
+def legacy_load():
+    """get_all_active_embeddings as it was: full ORM objects, Python top-3, np.load per row."""
+    session = SessionLocal()
+    try:
+        embeddings, labels = [], []
+        for record in session.query(FaceEmbedding).filter(
+                and_(FaceEmbedding.is_active == True, FaceEmbedding.embedding_type == 'enroll')).all():  # noqa: E712
+            embeddings.append(np.load(BytesIO(record.embedding_data)))
+            labels.append(record.employee_id)
+        counts = {}
+        for record in session.query(FaceEmbedding).filter(
+                and_(FaceEmbedding.is_active == True, FaceEmbedding.embedding_type == 'update')  # noqa: E712
+        ).order_by(desc(FaceEmbedding.created_at)).all():
+            if counts.get(record.employee_id, 0) < 3:
+                embeddings.append(np.load(BytesIO(record.embedding_data)))
+                labels.append(record.employee_id)
+                counts[record.employee_id] = counts.get(record.employee_id, 0) + 1
+        return np.array(embeddings, dtype=np.float32), labels
+    finally:
+        session.close()
+
+
+def gallery_rows(embeddings, labels):
+    return sorted(zip(labels, (vector.tobytes() for vector in embeddings)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000, help="face_embeddings rows")
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimension")
+    parser.add_argument("--per-employee", type=int, default=5, help="embeddings per employee (1 enroll, rest updates)")
+    args = parser.parse_args()
+    try:
+        fill_database(args.rows, args.dim, args.per_employee)
+        legacy = best_time(legacy_load)
+        expected, expected_labels = legacy_load()
+        started = time.perf_counter()
+        create_tables()
+        migration = time.perf_counter() - started
+        db = DatabaseManager()
+        columnar = best_time(db.get_active_gallery)
+        _, _, embeddings, labels = db.get_active_gallery()
+        # Same (label, vector) multiset as the old loader: the window keeps the same top-3 updates
+        assert embeddings.shape == expected.shape
+        assert gallery_rows(embeddings, labels) == gallery_rows(expected, expected_labels)
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    print(f"{args.rows} rows x {args.dim}, {len(expected)} active gallery embeddings")
+    print(f"{'loader':<22} {'seconds':>9} {'us/row':>8}")
+    for name, seconds in (("ORM + np.load", legacy), ("columnar", columnar)):
+        print(f"{name:<22} {seconds:>9.3f} {seconds / len(expected) * 1e6:>8.1f}")
+    print(f"one-off migration {migration:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
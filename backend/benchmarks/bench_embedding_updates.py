@@ -0,0 +1,88 @@
+"""
+Self-learning update benchmark: per-row commits vs one bulk batch.
+
+Fills a temporary SQLite database with --employees employees, each with an
+enrollment embedding and --history update embeddings, then persists batches
+of --batch updates (one per distinct employee) two ways. "per row" is the
+previous path with the pruning it intended: store_face_embedding (own
+session and commit) and cleanup_old_embeddings for each update. "bulk" is
+store_face_embeddings: one insert, one set-based prune and one commit for
+the whole batch. Reports milliseconds per batch and rows per second.
+
+    python benchmarks/bench_embedding_updates.py --employees 2000 --history 15 --batch 64
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_updates_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'updates.db')}"
+
+from db.db_config import create_tables, engine  # noqa: E402
+from db.db_manager import DatabaseManager  # noqa: E402
+from db.db_models import Employee, FaceEmbedding  # noqa: E402
+from db.embedding_codec import encode_embedding  # noqa: E402
+
+KEEP = 15
+
+
+def fill_database(employees, history, dim):
+    create_tables()
+    rng = np.random.default_rng(0)
+    with engine.begin() as connection:
+        connection.execute(Employee.__table__.insert(),
+                           [{"id": f"EMP{i:06d}", "employee_name": f"Employee {i}"} for i in range(employees)])
+        connection.execute(FaceEmbedding.__table__.insert(), [
+            {"employee_id": f"EMP{i % employees:06d}", "embedding_data": encode_embedding(vector),
+             "embedding_type": "enroll" if i < employees else "update", "quality_score": 1.0, "is_active": True}
+            for i, vector in enumerate(rng.standard_normal((employees * (history + 1), dim), dtype=np.float32))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, default=2000, help="employees in the database")
+    parser.add_argument("--history", type=int, default=15, help="update embeddings per employee already stored")
+    parser.add_argument("--batch", type=int, default=64, help="updates per batch")
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimension")
+    parser.add_argument("--repeat", type=int, default=5, help="batches timed per mode")
+    args = parser.parse_args()
+    # store_face_embedding prints a line per row
+    sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+    logging.disable(logging.INFO)
+    rng = np.random.default_rng(1)
+    try:
+        fill_database(args.employees, args.history, args.dim)
+        db = DatabaseManager()
+        batches = iter(lambda: [(f"EMP{rng.integers(args.employees):06d}", rng.standard_normal(args.dim).astype(np.float32))
+                                for _ in range(args.batch)], None)
+
+        def per_row():
+            for employee_id, embedding in next(batches):
+                db.store_face_embedding(employee_id, embedding, 'update', 0.0, None)
+                db.cleanup_old_embeddings(employee_id, max_embeddings=KEEP)
+
+        def bulk():
+            db.store_face_embeddings(next(batches), embedding_type='update', quality_score=0.0, keep_latest=KEEP)
+
+        timings = {name: min(timeit.repeat(fn, number=1, repeat=args.repeat)) for name, fn in
+                   (("per row", per_row), ("bulk", bulk))}
+    finally:
+        sys.stdout = stdout
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    print(f"{args.employees} employees x {args.history} updates, batches of {args.batch} x {args.dim}")
+    print(f"{'write':<10} {'ms/batch':>9} {'rows/s':>9}")
+    for name, seconds in timings.items():
+        print(f"{name:<10} {seconds * 1e3:>9.1f} {args.batch / seconds:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
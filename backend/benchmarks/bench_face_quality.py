@@ -0,0 +1,117 @@
+"""
+Face quality benchmark: per-face scoring vs the batch FaceQualityScorer.
+
+Scores synthetic detections on a 1280x720 frame with the previous
+_quality_filter (one face at a time, brightness from landmark coordinates,
+"sharpness" from embedding variance) and with FaceQualityScorer (all faces in
+one numpy pass, brightness and Laplacian-variance sharpness from 16x16 crops),
+and checks that the batch sharpness score is real by blurring the frame. Detector
+objects are packed into a DetectionBatch once per detection ("pack"); the
+pipeline scores once per detection, and "frame filter" is what every
+displayed frame still pays (selecting the faces above the threshold).
+
+    python benchmarks/bench_face_quality.py --faces 1 10 30 60
+"""
+import argparse
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detection_batch import DetectionBatch
+from core.face_quality import OVERALL, SHARPNESS, FaceQualityScorer
+
+WIDTH, HEIGHT = 1280, 720
+THRESHOLD = 0.65
+
+
+def legacy_quality(face, frame_width, frame_height):
+    """The previous _quality_filter and its helper scores."""
+    bbox = face.bbox.astype(int)
+    face_width = bbox[2] - bbox[0]
+    face_height = bbox[3] - bbox[1]
+    size_score = min(1.0, (face_width * face_height) / (100 * 100))
+    if face_width < 50 or face_height < 50:
+        size_score = 0.0
+    if face_width > frame_width * 0.8 or face_height > frame_height * 0.8:
+        size_score = 0.0
+    center_x = (bbox[0] + bbox[2]) / 2
+    center_y = (bbox[1] + bbox[3]) / 2
+    distance_from_center = np.sqrt((center_x - frame_width/2)**2 + (center_y - frame_height/2)**2)
+    max_distance = np.sqrt((frame_width/2)**2 + (frame_height/2)**2)
+    position_score = 1.0 - (distance_from_center / max_distance)
+    det_score = face.det_score if hasattr(face, 'det_score') else 0.5
+    try:
+        avg_intensity = np.mean(face.landmark_2d_106) / 255.0
+        brightness_score = min(1.0, max(0.0, 1.0 - abs(avg_intensity - 0.5) * 2))
+    except Exception:
+        brightness_score = 0.5
+    try:
+        sharpness_score = min(1.0, np.var(face.embedding) / 0.1)
+    except Exception:
+        sharpness_score = 0.5
+    try:
+        yaw, pitch, roll = face.pose
+        angle_score = max(0.0, 1.0 - (abs(yaw) + abs(pitch) + abs(roll)) / 90.0)
+    except Exception:
+        angle_score = 0.8
+    overall_quality = (0.3 * size_score + 0.2 * position_score + 0.2 * det_score
+                       + 0.1 * brightness_score + 0.1 * sharpness_score + 0.1 * angle_score)
+    return overall_quality >= THRESHOLD, (sharpness_score, brightness_score, angle_score, size_score, overall_quality)
+
+
+def make_faces(count, rng):
+    faces = []
+    for _ in range(count):
+        side = rng.uniform(40, 160)
+        x, y = rng.uniform(0, WIDTH - side), rng.uniform(0, HEIGHT - side)
+        faces.append(SimpleNamespace(
+            bbox=np.array([x, y, x + side, y + side], dtype=np.float32),
+            det_score=float(rng.uniform(0.5, 1.0)),
+            pose=rng.uniform(-20, 20, 3).astype(np.float32),
+            kps=(np.array([[0.3, 0.4], [0.7, 0.4], [0.5, 0.6], [0.35, 0.8], [0.65, 0.8]]) * side
+                 + (x, y)).astype(np.float32),
+            landmark_2d_106=rng.uniform(0, side, (106, 2)).astype(np.float32),
+            embedding=rng.standard_normal(512).astype(np.float32)))
+    return faces
+
+
+def best_time(function, number=300):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 10, 30, 60])
+    args = parser.parse_args()
+    rng = np.random.default_rng(4)
+    frame = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    scorer = FaceQualityScorer(THRESHOLD)
+    print(f"{'faces':>6} {'per-face ms':>12} {'pack ms':>8} {'batch ms':>9} {'speedup':>8} {'frame filter ms':>16}")
+    for count in args.faces:
+        faces = make_faces(count, rng)
+        legacy = best_time(lambda: [legacy_quality(face, WIDTH, HEIGHT) for face in faces])
+        pack = best_time(lambda: DetectionBatch.from_faces(faces, 0, 0, 0.0))
+        detections = DetectionBatch.from_faces(faces, 0, 0, 0.0)
+        batch = best_time(lambda: scorer.score(frame, detections))
+        quality, _ = scorer.score(frame, detections)
+        selected = best_time(lambda: np.flatnonzero(quality[:, OVERALL] >= THRESHOLD))
+        print(f"{count:>6} {legacy * 1e3:>12.3f} {pack * 1e3:>8.3f} {batch * 1e3:>9.3f} "
+              f"{legacy / batch:>7.1f}x {selected * 1e3:>16.3f}")
+    # Box-blurring a textured frame must lower every face's sharpness score
+    detections = DetectionBatch.from_faces(make_faces(30, rng), 0, 0, 0.0)
+    frame = np.clip(rng.normal(128, 8, (HEIGHT, WIDTH, 3)), 0, 255).astype(np.uint8)
+    blurred = frame.astype(np.float32)
+    blurred = (blurred + np.roll(blurred, 1, 0) + np.roll(blurred, 1, 1) + np.roll(blurred, (1, 1), (0, 1))) / 4
+    sharp = scorer.score(frame, detections)[0][:, SHARPNESS]
+    soft = scorer.score(blurred.astype(np.uint8), detections)[0][:, SHARPNESS]
+    print(f"sharpness, textured frame {sharp.mean():.2f} vs blurred {soft.mean():.2f} "
+          f"(lower for {np.mean(soft < sharp):.0%} of faces)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Detection preprocessing benchmark: per-frame allocations vs FramePreprocessor.
+
+Runs one detection cycle's preprocessing on 720p and 1080p frames through the
+previous path (frame copy, full-resolution LAB split/CLAHE/merge/blur,
+resize to 960 px wide, then the detector's own resize and zero-padded
+letterbox to det_size) and through FramePreprocessor (one INTER_AREA resize
+into the preallocated letterbox, enhancement in place at detector resolution,
+the detector's resize then being a same-size copy). Reports ms per frame and
+the peak memory each allocates per frame (tracemalloc sees numpy and OpenCV
+output arrays; what remains on the new path is the detector's own letterbox,
+FramePreprocessor.process itself allocates nothing once warm), and how far
+the detector inputs differ.
+
+    python benchmarks/bench_frame_preprocessor.py --resolutions 1280x720 1920x1080
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_preprocessor import FramePreprocessor
+
+DET_SIZE = (416, 416)
+
+
+def detector_input(img, input_size=DET_SIZE):
+    """insightface's SCRFD.detect resize and letterbox."""
+    im_ratio = float(img.shape[0]) / img.shape[1]
+    model_ratio = float(input_size[1]) / input_size[0]
+    if im_ratio > model_ratio:
+        new_height = input_size[1]
+        new_width = int(new_height / im_ratio)
+    else:
+        new_width = input_size[0]
+        new_height = int(new_width * im_ratio)
+    resized_img = cv2.resize(img, (new_width, new_height))
+    det_img = np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8)
+    det_img[:new_height, :new_width, :] = resized_img
+    return det_img
+
+
+def legacy_preprocess(frame):
+    """The previous detection thread: copy, _enhance_frame_for_cctv, 960 px resize."""
+    frame_copy = frame.copy()
+    lab = cv2.cvtColor(frame_copy, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    l = clahe.apply(l)
+    enhanced_lab = cv2.merge([l, a, b])
+    enhanced_frame = cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2BGR)
+    enhanced_frame = cv2.GaussianBlur(enhanced_frame, (3, 3), 0.5)
+    height, width = enhanced_frame.shape[:2]
+    if width > 960:
+        scale_factor = 960 / width
+        enhanced_frame = cv2.resize(enhanced_frame, (int(width * scale_factor), int(height * scale_factor)))
+    return detector_input(enhanced_frame)
+
+
+def best_time(function, number=20):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def peak_bytes(function):
+    function()  # warm up (first-call buffer allocation)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080"])
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+    print(f"{'frame':>10} {'path':<13} {'ms/frame':>9} {'allocated MB':>13} {'speedup':>8}")
+    for resolution in args.resolutions:
+        width, height = map(int, resolution.split("x"))
+        # Smooth gradients plus noise, so CLAHE and the blur have real work
+        ramp = np.linspace(40, 200, width, dtype=np.float32)[None, :, None] * np.ones((height, 1, 3), np.float32)
+        frame = np.clip(ramp + rng.normal(0, 12, (height, width, 3)), 0, 255).astype(np.uint8)
+        preprocessor = FramePreprocessor(DET_SIZE)
+        legacy = best_time(lambda: legacy_preprocess(frame))
+        legacy_peak = peak_bytes(lambda: legacy_preprocess(frame))
+        fused = best_time(lambda: detector_input(preprocessor.process(frame)))
+        fused_peak = peak_bytes(lambda: detector_input(preprocessor.process(frame)))
+        print(f"{resolution:>10} {'previous':<13} {legacy * 1e3:>9.2f} {legacy_peak / 2 ** 20:>13.2f} {'':>8}")
+        print(f"{resolution:>10} {'preallocated':<13} {fused * 1e3:>9.2f} {fused_peak / 2 ** 20:>13.2f} "
+              f"{legacy / fused:>7.1f}x")
+        difference = np.abs(legacy_preprocess(frame).astype(np.int16) - detector_input(preprocessor.process(frame)))
+        print(f"{'':>10} detector input mean abs difference {difference.mean():.2f} (0-255)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Gallery load benchmark: database load vs the memory-mapped GallerySnapshot.
+
+The database path is DatabaseManager.get_active_gallery (one .npy blob
+decoded per row, as every start used to do) against a temporary SQLite
+database of --db-rows embeddings; its time is extrapolated per row to
+--rows, since filling SQLite with half a million rows takes minutes by
+itself. The snapshot path opens a saved snapshot of --rows synthetic
+embeddings: "open" is what a warm restart waits for, "open + copy" adds
+reading every page (what building the FAISS flat index costs on top).
+
+    python benchmarks/bench_gallery_snapshot.py --rows 500000 --db-rows 20000 --dim 512
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from io import BytesIO
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_gallery_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'gallery.db')}"
+
+from core.gallery_snapshot import GallerySnapshot  # noqa: E402
+from db.db_config import create_tables, engine  # noqa: E402
+from db.db_manager import DatabaseManager  # noqa: E402
+from db.db_models import Employee, FaceEmbedding  # noqa: E402
+
+
+def best_time(fn, repeat=3):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def blob(vector):
+    buffer = BytesIO()
+    np.save(buffer, vector)
+    return buffer.getvalue()
+
+
+def fill_database(rows, dim, per_employee=5):
+    create_tables()
+    rng = np.random.default_rng(0)
+    employees = [{"id": f"EMP{i:06d}", "employee_name": f"Employee {i}"} for i in range(rows // per_employee + 1)]
+    embeddings = [{"employee_id": employees[i // per_employee]["id"], "embedding_data": blob(vector),
+                   "embedding_type": "enroll", "quality_score": 1.0, "is_active": True}
+                  for i, vector in enumerate(rng.standard_normal((rows, dim), dtype=np.float32))]
+    with engine.begin() as connection:
+        connection.execute(Employee.__table__.insert(), employees)
+        connection.execute(FaceEmbedding.__table__.insert(), embeddings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000, help="gallery size to report")
+    parser.add_argument("--db-rows", type=int, default=20_000, help="rows actually loaded from SQLite")
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimension")
+    args = parser.parse_args()
+    try:
+        fill_database(args.db_rows, args.dim)
+        db = DatabaseManager()
+        database = best_time(db.get_active_gallery) * args.rows / args.db_rows
+
+        snapshot = GallerySnapshot(os.path.join(WORKDIR, "snapshot"))
+        rng = np.random.default_rng(1)
+        embeddings = rng.standard_normal((args.rows, args.dim), dtype=np.float32)
+        labels = [f"EMP{i // 5:06d}" for i in range(args.rows)]
+        snapshot.save(1, 0, embeddings, labels, np.arange(args.rows))
+        del embeddings
+        opened = best_time(lambda: snapshot.load(1))
+        copied = best_time(lambda: np.array(snapshot.load(1)[0]))
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    size_mb = args.rows * args.dim * 4 / 2 ** 20
+    print(f"{args.rows} embeddings x {args.dim} ({size_mb:.0f} MB), database time extrapolated from {args.db_rows} rows")
+    print(f"{'load':<22} {'seconds':>9}")
+    print(f"{'database':<22} {database:>9.2f}")
+    print(f"{'snapshot open':<22} {opened:>9.3f}")
+    print(f"{'snapshot open + copy':<22} {copied:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Gallery delta benchmark: positional gallery copies vs the id-mapped GalleryIndex.
+
+Builds a gallery of --rows synthetic embeddings (4 per employee) and applies
+--syncs deltas of --employees employees, each dropping its oldest row and
+gaining a new one, as a self-learning batch does. "copy" is the previous
+delta: scan every label, copy the matrix without the employees' rows, stack
+their current rows on and rebuild the flat index (remove_ids by position
+when available costs the same pass). "id map" is GalleryIndex.replace:
+tombstones for the dropped rows, add_with_ids for the new ones and a
+compaction once tombstones reach 10% of the index. Reports milliseconds
+per sync (the time recognition waits on the index lock) and search time.
+Needs faiss for meaningful numbers (falls back to the patch_imports stub).
+
+    python benchmarks/bench_gallery_sync.py --rows 200000 --employees 64 --dim 512
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import faiss
+except ImportError:
+    import patch_imports  # noqa: F401
+    import faiss
+
+from core.gallery_index import GalleryIndex  # noqa: E402
+
+
+def copy_delta(embeddings, labels, employee_ids, new_embeddings, new_labels):
+    """_apply_gallery_delta as it was"""
+    removed = np.array([i for i, label in enumerate(labels) if label in employee_ids], dtype=np.int64)
+    keep = np.ones(len(labels), dtype=bool)
+    keep[removed] = False
+    embeddings = np.vstack([embeddings[keep], new_embeddings])
+    labels = [label for label, kept in zip(labels, keep) if kept] + list(new_labels)
+    index = faiss.IndexFlatIP(embeddings.shape[1])
+    index.add(embeddings)
+    return embeddings, labels, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000, help="gallery embeddings")
+    parser.add_argument("--employees", type=int, default=64, help="employees changed per sync")
+    parser.add_argument("--syncs", type=int, default=20, help="syncs timed per mode")
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimension")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.rows, args.dim), dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    ids = np.arange(args.rows, dtype=np.int64)
+    labels = [f"EMP{i // 4:06d}" for i in range(args.rows)]
+    gallery = GalleryIndex()
+    gallery.load(ids, embeddings, labels)
+    next_id = args.rows
+    timings = {"copy": [], "id map": []}
+    current, current_labels = embeddings, labels
+    for sync in range(args.syncs):
+        employee_ids = {f"EMP{i:06d}" for i in rng.choice(args.rows // 4, args.employees, replace=False)}
+        rows, row_labels = [], []
+        for employee_id in sorted(employee_ids):
+            kept = gallery.employee_rows[employee_id][1:].tolist() + [next_id]
+            next_id += 1
+            rows += kept
+            row_labels += [employee_id] * len(kept)
+        rows = np.array(rows, dtype=np.int64)
+        vectors = rng.standard_normal((len(rows), args.dim), dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        if sync < 3:
+            started = time.perf_counter()
+            current, current_labels, _ = copy_delta(current, current_labels, employee_ids, vectors, row_labels)
+            timings["copy"].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        gallery.replace(employee_ids, rows, vectors, row_labels)
+        timings["id map"].append(time.perf_counter() - started)
+    query = embeddings[:1]
+    started = time.perf_counter()
+    for _ in range(5):
+        gallery.search(query, 3)
+    search = (time.perf_counter() - started) / 5
+
+    print(f"{args.rows} embeddings x {args.dim}, {args.employees} employees per sync "
+          f"({len(timings['copy'])} copy syncs, {args.syncs} id map syncs)")
+    print(f"{'delta':<10} {'median ms':>10} {'max ms':>8}")
+    for name, seconds in timings.items():
+        print(f"{name:<10} {np.median(seconds) * 1e3:>10.1f} {max(seconds) * 1e3:>8.1f}")
+    print(f"search {search * 1e3:.1f} ms with {len(gallery.dead)} tombstones, {gallery.compactions} compactions")
+
+
+if __name__ == "__main__":
+    main()
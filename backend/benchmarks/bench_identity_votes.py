@@ -0,0 +1,147 @@
+"""
+Identity voting benchmark: votes keyed by predicted identity vs by track slot.
+
+People walk through a camera; each detection's embedding is a noisy copy of
+the person's gallery embedding, so the nearest-neighbour match is sometimes
+another employee. Every detection is recognised through the previous
+smoothing (votes filed under the identity that was just predicted, so a
+wrong match only ever votes for itself) and through IdentityVotes (faces
+associated with tracks by IoU, decayed score sums per track, gallery search
+skipped while a track's vote is confident). Reports the share of displayed
+identities that are wrong, the gallery searches per face and the time per face.
+
+    python benchmarks/bench_identity_votes.py --people 20 --gallery 1000 --frames 600
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.identity_votes import IdentityVotes
+
+THRESHOLD = 0.6
+FPS = 10
+WIDTH, HEIGHT = 1280, 720
+BOX = 90
+
+
+def make_scene(args, rng):
+    gallery = rng.standard_normal((args.gallery, args.dim)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    people = rng.choice(args.gallery, 2 * args.people, replace=False)
+    # Every walker has an enrolled lookalike, the usual source of wrong matches
+    lookalikes, people = people[args.people:], people[:args.people]
+    gallery[lookalikes] = gallery[people] + rng.standard_normal((args.people, args.dim)) * args.lookalike / np.sqrt(args.dim)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    start = rng.uniform([BOX, BOX], [WIDTH - 2 * BOX, HEIGHT - 2 * BOX], size=(args.people, 2))
+    velocity = rng.uniform(-8, 8, size=(args.people, 2))
+    return gallery, people, start, velocity
+
+
+def observations(args, rng, gallery, people, start, velocity, frame):
+    """Boxes and noisy embeddings of everyone visible in one frame."""
+    position = start + velocity * frame
+    position = np.abs(np.mod(position, 2 * np.array([WIDTH - BOX, HEIGHT - BOX]))
+                      - np.array([WIDTH - BOX, HEIGHT - BOX]))
+    boxes = np.hstack((position, position + BOX))
+    embeddings = gallery[people] + rng.standard_normal((len(people), args.dim)).astype(np.float32) * (args.noise / np.sqrt(args.dim))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return boxes, embeddings
+
+
+def search(gallery, embedding):
+    scores = gallery @ embedding
+    best = int(np.argmax(scores))
+    return (f"E{best:04d}", float(scores[best])) if scores[best] > THRESHOLD else ("unknown", 0.0)
+
+
+def legacy_smoothing(votes, identity, score, now):
+    """The previous _temporal_smoothing, keyed by the identity it was asked to smooth."""
+    track_data = votes.get(identity)
+    if track_data is None:
+        track_data = votes[identity] = {'votes': deque(maxlen=5), 'last_update': now}
+    if now - track_data['last_update'] > 2.0:
+        track_data['votes'].clear()
+    track_data['votes'].append((identity, score))
+    track_data['last_update'] = now
+    if len(track_data['votes']) >= 3:
+        identity_counts = {}
+        total_score = 0
+        for vote_identity, vote_score in track_data['votes']:
+            identity_counts[vote_identity] = max(identity_counts.get(vote_identity, 0), vote_score)
+            total_score += vote_score
+        best_identity = max(identity_counts.items(), key=lambda x: x[1])
+        return best_identity[0], min(best_identity[1], total_score / len(track_data['votes']))
+    return identity, score
+
+
+def run_legacy(args, scene, frames):
+    gallery, people = scene[0], scene[1]
+    votes = {}
+    wrong = searches = 0
+    started = time.perf_counter()
+    for frame, (boxes, embeddings) in enumerate(frames):
+        now = frame / FPS
+        for person, embedding in zip(people, embeddings):
+            identity, score = search(gallery, embedding)
+            searches += 1
+            if identity != "unknown":
+                identity, score = legacy_smoothing(votes, identity, score, now)
+            wrong += identity != f"E{person:04d}"
+    return wrong, searches, time.perf_counter() - started
+
+
+def run_voting(args, scene, frames):
+    gallery, people = scene[0], scene[1]
+    votes = IdentityVotes()
+    latest = {}
+    wrong = searches = 0
+    started = time.perf_counter()
+    for frame, (boxes, embeddings) in enumerate(frames):
+        now = frame / FPS
+        slots = votes.assign(boxes, now)
+        for person, slot, embedding in zip(people, slots, embeddings):
+            reused = votes.confident(slot, now)
+            previous = latest.get(reused[0]) if reused is not None else None
+            if previous is not None and float(embedding @ previous) >= THRESHOLD:
+                identity, score = reused
+            else:
+                identity, score = search(gallery, embedding)
+                searches += 1
+                if identity != "unknown":
+                    votes.vote(slot, identity, score, now)
+                    identity, score = votes.smoothed(slot, identity, score)
+            if identity != "unknown":
+                latest[identity] = embedding
+            wrong += identity != f"E{person:04d}"
+        votes.evict_stale(now - 2.0)
+    return wrong, searches, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--people", type=int, default=20)
+    parser.add_argument("--gallery", type=int, default=1000, help="enrolled identities")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--dim", type=int, default=512, help="embedding size")
+    parser.add_argument("--noise", type=float, default=0.48, help="embedding noise (norm)")
+    parser.add_argument("--lookalike", type=float, default=0.06, help="gallery distance to the lookalike (norm)")
+    args = parser.parse_args()
+    rng = np.random.default_rng(3)
+    scene = make_scene(args, rng)
+    frames = [observations(args, rng, *scene, frame) for frame in range(args.frames)]
+    faces = args.people * args.frames
+    print(f"{args.people} people, {args.gallery} enrolled, {args.frames} frames")
+    print(f"{'voting':<10} {'wrong identity':>15} {'searches/face':>14} {'us/face':>9}")
+    for label, run in (("identity", run_legacy), ("track", run_voting)):
+        wrong, searches, elapsed = run(args, scene, frames)
+        print(f"{label:<10} {wrong / faces:>15.2%} {searches / faces:>14.2f} {elapsed / faces * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Model loading benchmark: one FaceAnalysis per consumer vs the shared ModelRegistry.
+
+Replays the model requests the API process makes at startup. Previously
+that was a 640 FaceAnalysis plus one 416 app per GPU for each of the three
+FaceTrackingPipeline instances (embeddings router, streaming router, camera
+monitor), plus the enroller's own. Now every consumer asks the registry for
+the same (model, providers, det_size). Each mode runs in a fresh
+interpreter; reports models loaded, load time and the RSS they add. With
+insightface and the antelopev2 pack installed the real models are loaded;
+otherwise the patch_imports stubs are, and each stubbed load is given a
+duration and allocates (and touches) the memory of the pack's weights, as
+bench_startup does.
+
+    python benchmarks/bench_model_registry.py --gpus 1 --model-load 3.0 --model-mb 250
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def with_costs(model_load, model_mb):
+    """Give the stubbed model pack a load time and the memory of its weights."""
+    from insightface.app import FaceAnalysis
+    prepare = FaceAnalysis.prepare
+
+    def slow_prepare(self, *a, **kw):
+        time.sleep(model_load)
+        # Written to, so the pages count in RSS like loaded weights
+        self.weights = np.ones(int(model_mb * 2 ** 20), dtype=np.uint8)
+        return prepare(self, *a, **kw)
+
+    FaceAnalysis.prepare = slow_prepare
+
+
+def run(mode, gpus, model_load, model_mb):
+    try:
+        import insightface.app  # noqa: F401
+    except ImportError:
+        import patch_imports  # noqa: F401
+        with_costs(model_load, model_mb)
+    from insightface.app import FaceAnalysis
+    from core.model_registry import gpu_providers, model_registry
+    baseline = rss_mb()
+    started = time.perf_counter()
+    if mode == "legacy":
+        # Every consumer kept its apps for the life of the process
+        apps = []
+        for _ in range(3):
+            apps.append(FaceAnalysis(name='antelopev2'))
+            apps[-1].prepare(ctx_id=0, det_size=(640, 640))
+            for gpu_id in range(gpus):
+                apps.append(FaceAnalysis(name='antelopev2', providers=gpu_providers(gpu_id),
+                                         allowed_modules=['detection', 'recognition']))
+                apps[-1].prepare(ctx_id=gpu_id, det_size=(416, 416), det_thresh=0.5)
+        apps.append(FaceAnalysis(name='antelopev2', providers=['CUDAExecutionProvider', 'CPUExecutionProvider']))
+        apps[-1].prepare(ctx_id=0, det_size=(416, 416))
+        loads = len(apps)
+    else:
+        # Pipeline, per-GPU apps and enroller, as the shared pipeline requests them
+        for gpu_id in [0] + list(range(gpus)) + [0]:
+            model_registry.get_face_analysis(providers=gpu_providers(gpu_id), det_size=(416, 416))
+        loads = model_registry.loads
+    print(f"{loads} {time.perf_counter() - started} {rss_mb() - baseline}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--gpus", type=int, default=1, help="GPUs the cameras are spread over")
+    parser.add_argument("--model-load", type=float, default=3.0,
+                        help="seconds to load and prepare a stubbed model pack")
+    parser.add_argument("--model-mb", type=float, default=250, help="weights allocated per stubbed model pack, MB")
+    parser.add_argument("--mode", choices=["legacy", "registry"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        run(args.mode, args.gpus, args.model_load, args.model_mb)
+        return
+    print(f"{'loading':<10} {'models':>7} {'seconds':>9} {'RSS MB':>8}")
+    results = {}
+    for mode in ("legacy", "registry"):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, "--gpus", str(args.gpus),
+                                 "--model-load", str(args.model_load), "--model-mb", str(args.model_mb)],
+                                cwd=BACKEND, capture_output=True, text=True, check=True).stdout
+        loads, seconds, rss = output.split()[-3:]
+        results[mode] = (int(loads), float(seconds), float(rss))
+        print(f"{mode:<10} {results[mode][0]:>7} {results[mode][1]:>9.3f} {results[mode][2]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Startup benchmark: serial initialisation vs the StartupGraph, on the stubs.
+
+Builds a FaceTrackingSystem with the patch_imports stubs, with the slow
+parts given realistic costs: loading and preparing a model pack, and
+connecting to each camera (an RTSP handshake). The database, gallery,
+metadata and work-status loads are the real ones against the local SQLite
+database. The same stage functions are then run one at a time, plus what
+the previous startup also paid: the Zoho token refresh in APILogger and the
+1 s pause between camera threads. "API up" is when the constructor
+returns and non-vision endpoints can be served; "vision ready" is when
+every stage has finished.
+
+    python benchmarks/bench_startup.py --model-load 3.0 --camera-connect 1.5 --token-refresh 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import patch_imports  # noqa: F401,E402
+import cv2  # noqa: E402  (the stub)
+from insightface.app import FaceAnalysis  # noqa: E402  (the stub)
+
+from core import fts_system  # noqa: E402
+from core.model_registry import model_registry  # noqa: E402
+from core.startup_graph import StartupGraph  # noqa: E402
+
+
+def with_costs(args):
+    """Give the stubbed model load and camera connection a duration."""
+    prepare = FaceAnalysis.prepare
+
+    def slow_prepare(self, *a, **kw):
+        time.sleep(args.model_load)
+        return prepare(self, *a, **kw)
+
+    class Capture(cv2.VideoCapture):
+        def __init__(self, source=0):
+            time.sleep(args.camera_connect)
+            super().__init__(source)
+            self.isOpened = lambda: True
+
+    FaceAnalysis.prepare = slow_prepare
+    cv2.VideoCapture = Capture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model-load", type=float, default=3.0, help="seconds to load and prepare a model pack")
+    parser.add_argument("--camera-connect", type=float, default=1.5, help="seconds to open a camera stream")
+    parser.add_argument("--token-refresh", type=float, default=0.5, help="seconds of the Zoho token request")
+    args = parser.parse_args()
+    with_costs(args)
+    cameras = len(fts_system.CAMERAS)
+
+    started = time.perf_counter()
+    system = fts_system.FaceTrackingSystem()
+    api_up = time.perf_counter() - started
+    system.startup.wait()
+    ready = time.perf_counter() - started
+    status = system.startup.status()
+
+    # The same stages, one at a time, plus the previous blocking token refresh and camera stagger
+    model_registry.clear()
+    serial = StartupGraph(max_workers=1)
+    for stage in system.startup.stages.values():
+        serial.add(stage.name, stage.function, stage.depends_on)
+    started = time.perf_counter()
+    serial.start()
+    serial.wait()
+    previous = time.perf_counter() - started + args.token_refresh + cameras * 1.0
+    system.shutdown()
+
+    print(f"{cameras} cameras, model load {args.model_load}s, camera connect {args.camera_connect}s")
+    print(f"{'startup':<10} {'API up s':>9} {'vision ready s':>15}")
+    print(f"{'serial':<10} {previous:>9.2f} {previous:>15.2f}")
+    print(f"{'graph':<10} {api_up:>9.2f} {ready:>15.2f}")
+    for name, component in status["components"].items():
+        print(f"  {name:<14} {component['state']:<8} {component['seconds']:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Per-track state benchmark: allocations on the per-face, per-frame update path.
+
+Replays the same sightings through the previous layout (dataclasses of deques
+of tuples and FaceQualityMetrics objects, a float32 copy of every embedding,
+tripwire state in string-keyed dicts) and through the compact slotted,
+array-backed state, measuring with tracemalloc the memory allocated per update
+and the memory retained per track once the histories are full.
+
+    python benchmarks/bench_track_state.py --tracks 200 --frames 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.track_state import GlobalTrack, TrackHistory
+from core.tripwire_engine import ZONE_NONE, ZONE_LOW, ZONE_HIGH
+
+EMBEDDING_HISTORY_SIZE = 5
+STATE_HISTORY_SIZE = 30
+FRAME_WIDTH = 1280
+# (position, spacing) of the camera's vertical tripwires
+TRIPWIRES = [(0.5, 0.1), (0.3, 0.05)]
+TRIPWIRE_NAMES = ["EntryDetection", "LobbyDetection"]
+
+
+@dataclass
+class LegacyGlobalTrack:
+    employee_id: str
+    last_seen_time: float
+    last_camera_id: int
+    embedding_history: deque
+    confidence_score: float = 0.0
+    work_status: str = "working"
+
+
+@dataclass
+class LegacyQualityMetrics:
+    sharpness_score: float
+    brightness_score: float
+    angle_score: float
+    size_score: float
+    overall_quality: float
+
+
+@dataclass
+class LegacyTrackingState:
+    position_history: deque
+    velocity: Tuple[float, float]
+    predicted_position: Tuple[int, int]
+    confidence_history: deque
+    quality_history: deque
+
+
+class LegacyTrack:
+    def __init__(self, identity, now):
+        self.track = LegacyGlobalTrack(identity, now, 0, deque(maxlen=EMBEDDING_HISTORY_SIZE))
+        self.tracking = LegacyTrackingState(
+            deque(maxlen=STATE_HISTORY_SIZE), (0, 0), (0, 0),
+            deque(maxlen=STATE_HISTORY_SIZE), deque(maxlen=STATE_HISTORY_SIZE))
+        self.crossing = {}
+
+    def update(self, camera_id, now, raw_embedding, x, y, score, quality):
+        embedding = raw_embedding.astype('float32')
+        metrics = LegacyQualityMetrics(*quality)
+        self.track.last_seen_time = now
+        self.track.confidence_score = score
+        self.track.embedding_history.append(embedding)
+        state = self.tracking
+        state.position_history.append((x, y))
+        state.confidence_history.append(score)
+        state.quality_history.append(metrics)
+        if len(state.position_history) >= 2:
+            state.velocity = (state.position_history[-1][0] - state.position_history[-2][0],
+                              state.position_history[-1][1] - state.position_history[-2][1])
+        camera_state = self.crossing.setdefault(f"{camera_id}", {})
+        crossings = 0
+        for (position, spacing), name in zip(TRIPWIRES, TRIPWIRE_NAMES):
+            key = f"{name}"
+            if key not in camera_state:
+                camera_state[key] = {'state': 'none', 'last_position': x, 'direction': None}
+            info = camera_state[key]
+            low = int(FRAME_WIDTH * (position - spacing / 2))
+            high = int(FRAME_WIDTH * (position + spacing / 2))
+            if info['state'] == 'none':
+                if x < low:
+                    info['state'], info['direction'] = 'left_zone', 'left->right'
+                elif x > high:
+                    info['state'], info['direction'] = 'right_zone', 'right->left'
+            elif (info['state'] == 'left_zone' and x > high) or (info['state'] == 'right_zone' and x < low):
+                crossings += 1
+                info['state'], info['direction'] = 'none', None
+            info['last_position'] = x
+        return crossings
+
+
+class CompactTrack:
+    def __init__(self, identity, now):
+        self.track = GlobalTrack(identity, now, 0, history_size=EMBEDDING_HISTORY_SIZE)
+        self.tracking = TrackHistory(STATE_HISTORY_SIZE)
+        self.crossing = {}
+
+    def update(self, camera_id, now, raw_embedding, x, y, score, quality):
+        embedding = np.asarray(raw_embedding, dtype=np.float32)
+        self.track.last_seen_time = now
+        self.track.confidence_score = score
+        self.track.add_embedding(embedding)
+        self.tracking.push(x, y, score, quality)
+        zones = self.crossing.get(camera_id)
+        if zones is None:
+            zones = self.crossing[camera_id] = bytearray(len(TRIPWIRES))
+        crossings = 0
+        for index, (position, spacing) in enumerate(TRIPWIRES):
+            low = int(FRAME_WIDTH * (position - spacing / 2))
+            high = int(FRAME_WIDTH * (position + spacing / 2))
+            zone = zones[index]
+            if zone == ZONE_NONE:
+                if x < low:
+                    zones[index] = ZONE_LOW
+                elif x > high:
+                    zones[index] = ZONE_HIGH
+            elif (zone == ZONE_LOW and x > high) or (zone == ZONE_HIGH and x < low):
+                crossings += 1
+                zones[index] = ZONE_NONE
+        return crossings
+
+
+def make_sightings(args):
+    rng = random.Random(5)
+    embeddings = [np.random.default_rng(i).standard_normal(512).astype(np.float32) for i in range(32)]
+    sightings = []
+    for frame in range(args.frames):
+        for track in range(args.tracks):
+            # Walk back and forth across the frame so tripwires fire
+            x = int((frame * 17 + track * 41) % (2 * FRAME_WIDTH))
+            x = x if x < FRAME_WIDTH else 2 * FRAME_WIDTH - x
+            quality = tuple(rng.uniform(0.5, 1.0) for _ in range(5))
+            sightings.append((track, embeddings[(frame + track) % 32], x, rng.randrange(720),
+                              rng.uniform(0.6, 1.0), quality))
+    return sightings
+
+
+def run(label, factory, sightings, args):
+    tracks = {}
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    allocated = 0
+    crossings = 0
+    for track_id, embedding, x, y, score, quality in sightings:
+        track = tracks.get(track_id)
+        if track is None:
+            track = tracks[track_id] = factory(f"E{track_id:04d}", 0.0)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        crossings += track.update(0, 0.0, embedding, x, y, score, quality)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    for track_id, embedding, x, y, score, quality in sightings:
+        tracks[track_id].update(0, 0.0, embedding, x, y, score, quality)
+    elapsed = time.perf_counter() - started
+    updates = len(sightings)
+    print(f"{label:<10} {allocated / updates:>14.0f} {(retained - base) / len(tracks):>16.0f} "
+          f"{elapsed / updates * 1e6:>12.2f} {crossings:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    sightings = make_sightings(args)
+    print(f"{len(sightings)} updates over {args.tracks} tracks")
+    print(f"{'layout':<10} {'bytes/update':>14} {'retained B/track':>16} {'us/update':>12} {'crossings':>10}")
+    run("previous", LegacyTrack, sightings, args)
+    run("compact", CompactTrack, sightings, args)
+
+
+if __name__ == "__main__":
+    main()
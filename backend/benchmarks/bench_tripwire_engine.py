@@ -0,0 +1,116 @@
+"""
+Tripwire benchmark: per-identity dict state machine vs the vectorized engine.
+
+Walks a crowd back and forth across a camera with the configured axis
+tripwires and evaluates every frame with the previous per-identity
+_check_tripwire_crossing logic and with TripwireEngine, checking that both
+report the same crossings and timing a frame at several crowd sizes. The
+engine is timed as configured (track by track up to scalar_tracks, one numpy
+pass above) and with the numpy pass forced at every size.
+
+    python benchmarks/bench_tripwire_engine.py --tracks 1 10 50 100 200 --frames 300
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tripwire_engine import TripwireConfig, TripwireEngine
+
+WIDTH, HEIGHT = 1280, 720
+TRIPWIRES = [
+    TripwireConfig(position=0.5, spacing=0.01, direction="vertical", name="EntryDetection"),
+    TripwireConfig(position=0.755551, spacing=0.01, direction="horizontal", name="LobbyDetection"),
+    TripwireConfig(position=0.3, spacing=0.05, direction="vertical", name="DeskDetection")]
+
+
+def legacy_check(crossing_state, identity, center_x, center_y, frame_width, frame_height, fired, frame):
+    """The previous per-identity state machine (string-keyed dicts, positions recomputed per call)."""
+    camera_state = crossing_state.setdefault(identity, {}).setdefault("0", {})
+    for index, tripwire in enumerate(TRIPWIRES):
+        tripwire_key = f"{tripwire.name}"
+        if tripwire_key not in camera_state:
+            camera_state[tripwire_key] = {
+                'state': 'none',
+                'last_position': center_x if tripwire.direction == 'vertical' else center_y,
+                'direction': None}
+        state_info = camera_state[tripwire_key]
+        extent, current_pos = (frame_width, center_x) if tripwire.direction == 'vertical' else (frame_height, center_y)
+        low_zone, high_zone = ('left_zone', 'right_zone') if tripwire.direction == 'vertical' else ('top_zone', 'bottom_zone')
+        tripwire1_pos = int(extent * (tripwire.position - tripwire.spacing/2))
+        tripwire2_pos = int(extent * (tripwire.position + tripwire.spacing/2))
+        if state_info['state'] == 'none':
+            if current_pos < tripwire1_pos:
+                state_info['state'] = low_zone
+                state_info['direction'] = 'forward'
+            elif current_pos > tripwire2_pos:
+                state_info['state'] = high_zone
+                state_info['direction'] = 'backward'
+        elif state_info['state'] == low_zone and current_pos > tripwire2_pos:
+            fired.add((frame, identity, index))
+            state_info['state'] = 'none'
+            state_info['direction'] = None
+        elif state_info['state'] == high_zone and current_pos < tripwire1_pos:
+            fired.add((frame, identity, index))
+            state_info['state'] = 'none'
+            state_info['direction'] = None
+        state_info['last_position'] = current_pos
+
+
+def make_walks(tracks, frames, seed=9):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0, [WIDTH, HEIGHT], size=(tracks, 2))
+    velocity = rng.uniform(-25, 25, size=(tracks, 2))
+    position = start + velocity * np.arange(frames)[:, None, None]
+    # Reflect off the frame edges
+    position = np.abs(np.mod(position, 2 * np.array([WIDTH, HEIGHT])) - np.array([WIDTH, HEIGHT]))
+    return np.rint(position).astype(int)
+
+
+def run_engine(engine, keys, positions):
+    fired = set()
+    started = time.perf_counter()
+    for frame, frame_positions in enumerate(positions):
+        for crossing in engine.update(keys, frame_positions, WIDTH, HEIGHT, now=frame):
+            fired.add((frame, crossing.key, crossing.tripwire))
+    return (time.perf_counter() - started) / len(positions), fired
+
+
+def bench(tracks, frames):
+    walks = make_walks(tracks, frames)
+    keys = [f"E{i:04d}" for i in range(tracks)]
+    positions = [[(int(x), int(y)) for x, y in walks[frame]] for frame in range(frames)]
+
+    legacy_state = {}
+    legacy_fired = set()
+    started = time.perf_counter()
+    for frame in range(frames):
+        for key, (x, y) in zip(keys, positions[frame]):
+            legacy_check(legacy_state, key, x, y, WIDTH, HEIGHT, legacy_fired, frame)
+    legacy_time = (time.perf_counter() - started) / frames
+
+    engine_time, engine_fired = run_engine(TripwireEngine(TRIPWIRES), keys, positions)
+    numpy_time, numpy_fired = run_engine(TripwireEngine(TRIPWIRES, scalar_tracks=0), keys, positions)
+
+    match = "yes" if legacy_fired == engine_fired == numpy_fired else "NO"
+    print(f"{tracks:>6} {legacy_time * 1e3:>12.3f} {engine_time * 1e3:>12.3f} {numpy_time * 1e3:>12.3f} "
+          f"{legacy_time / engine_time:>8.1f}x {len(engine_fired):>10} {match:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[1, 10, 32, 50, 100, 200])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    print(f"{'tracks':>6} {'dict ms/frame':>12} {'engine ms/frame':>12} {'numpy ms/frame':>12} "
+          f"{'speedup':>9} {'crossings':>10} {'same':>6}")
+    for tracks in args.tracks:
+        bench(tracks, args.frames)
+
+
+if __name__ == "__main__":
+    main()
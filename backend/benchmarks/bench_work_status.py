@@ -0,0 +1,92 @@
+"""
+Tripwire event latency: per-event attendance query vs. the in-memory work status table.
+
+Seeds a throwaway SQLite database with attendance history and times the
+work-status decision taken before every check_out.
+
+    python benchmarks/bench_work_status.py --employees 500 --records 20000 --events 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, samples):
+    print(f"{label:<28} p50={percentile(samples, 50) * 1e6:9.1f}us  "
+          f"p99={percentile(samples, 99) * 1e6:9.1f}us  "
+          f"mean={statistics.mean(samples) * 1e6:9.1f}us")
+
+
+def seed(db_manager, employees, records):
+    from db.db_models import Employee, AttendanceRecord
+    session = db_manager.Session()
+    now = datetime.now()
+    session.add_all(Employee(id=f"EMP{i:05d}", employee_name=f"Employee {i}") for i in range(employees))
+    session.add_all(
+        AttendanceRecord(
+            employee_id=f"EMP{random.randrange(employees):05d}",
+            camera_id=random.randrange(2),
+            event_type=random.choice(("check_in", "check_out")),
+            timestamp=now - timedelta(minutes=random.uniform(0, 24 * 60)))
+        for _ in range(records))
+    session.commit()
+    session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_work_status_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from db.db_config import create_tables
+    from db.db_manager import DatabaseManager
+    from core.work_status import WorkStatusTable
+
+    create_tables()
+    db_manager = DatabaseManager()
+    random.seed(7)
+    seed(db_manager, args.employees, args.records)
+    employee_ids = [f"EMP{random.randrange(args.employees):05d}" for _ in range(args.events)]
+
+    before = []
+    for employee_id in employee_ids:
+        started = time.perf_counter()
+        record = db_manager.get_latest_attendance_by_employee(employee_id, hours_back=10)
+        _ = record is not None and record.event_type == 'check_in'
+        before.append(time.perf_counter() - started)
+
+    table = WorkStatusTable(window_hours=10)
+    started = time.perf_counter()
+    hydrated = table.hydrate(db_manager)
+    hydrate_time = time.perf_counter() - started
+    after = []
+    for employee_id in employee_ids:
+        started = time.perf_counter()
+        table.try_record(employee_id, "check_out", db_manager=db_manager)
+        after.append(time.perf_counter() - started)
+
+    print(f"{args.employees} employees, {args.records} attendance rows, {args.events} exit events")
+    print(f"hydrate: {hydrated} employees in {hydrate_time * 1e3:.1f}ms (one query)")
+    report("before (query per event)", before)
+    report("after (in-memory table)", after)
+    print(f"db lookups after hydration: {table.db_lookups}")
+
+
+if __name__ == "__main__":
+    main()
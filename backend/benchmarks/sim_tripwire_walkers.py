@@ -0,0 +1,123 @@
+"""
+Synthetic walker simulation: missed tripwire crossings vs detection interval.
+
+Walkers approach the entry camera's horizontal tripwire and either walk
+through it and out of the frame, or stop short of it and turn back. Faces are
+only detected every `interval` frames, only inside the region where the
+quality filter accepts them, and each detection can randomly fail. Every walk
+is evaluated twice through TripwireEngine: with detected positions only (the
+previous behaviour), and with the batched Kalman filter coasting tracks along
+their predicted path between detections (a predicted crossing counts once a
+detection past the tripwire confirms it, or once the track goes undetected
+for the pending window, i.e. it left the frame beyond the tripwire). Reports
+the share of real crossings missed and of turn-backs wrongly counted as
+crossings.
+
+    python benchmarks/sim_tripwire_walkers.py --walkers 2000 --intervals 1 2 3 4 5 6 8
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.batch_kalman import BatchKalmanFilter
+from core.tripwire_engine import TripwireConfig, TripwireEngine
+
+WIDTH, HEIGHT = 1280, 720
+TRIPWIRE = TripwireConfig(position=0.755551, spacing=0.01, direction="horizontal", name="EntryDetection")
+# Faces near the frame edges (too close to the camera) fail the quality filter
+DETECTABLE_Y = (60, 640)
+
+
+def make_walk(rng, crosser: bool, speed_range):
+    """Per-frame true (x, y) of one walker until they leave the frame."""
+    speed = rng.uniform(*speed_range)
+    x = rng.uniform(200, WIDTH - 200)
+    y = rng.uniform(150, 350)
+    drift = rng.normal(0, 1.5)
+    line = TRIPWIRE.position * HEIGHT
+    stop_at = None if crosser else rng.uniform(line - 90, line - 15)
+    positions = []
+    paused = 0
+    direction = 1.0
+    while -20 < y < HEIGHT + 60 and len(positions) < 2000:
+        positions.append((x, y))
+        if stop_at is not None and direction > 0 and y >= stop_at:
+            paused += 1
+            if paused > 10:
+                direction = -1.0
+            continue
+        y += direction * speed
+        if stop_at is not None and direction > 0:
+            y = min(y, stop_at)
+        x += drift
+    return np.array(positions)
+
+
+def evaluate(walk, rng, interval, coast_frames, pending_frames, miss_rate, noise):
+    """Crossings counted (detections only, with coasting) for one walk."""
+    phase = rng.integers(interval)
+    measured = TripwireEngine([TRIPWIRE])
+    predicted = TripwireEngine([TRIPWIRE])
+    kalman = BatchKalmanFilter()
+    counts = [0, 0]
+    for frame, (x, y) in enumerate(walk):
+        detected = ((frame + phase) % interval == 0 and DETECTABLE_Y[0] <= y <= DETECTABLE_Y[1]
+                    and rng.random() >= miss_rate)
+        if detected:
+            position = [(int(x + rng.normal(0, noise)), int(y + rng.normal(0, noise)))]
+            counts[0] += len(measured.update(["w"], position, WIDTH, HEIGHT, frame))
+            kalman.update(["w"], position, frame)
+            counts[1] += len(predicted.update(["w"], position, WIDTH, HEIGHT, frame))
+        else:
+            keys, coasted = kalman.coast(coast_frames)
+            if keys:
+                counts[1] += len(predicted.update(keys, coasted, WIDTH, HEIGHT, frame, predicted=True))
+        counts[1] += len(predicted.expire_pending(frame - pending_frames))
+    # The walker has left the frame: the rest of their pending window passes without detections
+    counts[1] += len(predicted.expire_pending(len(walk) + pending_frames))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--walkers", type=int, default=2000, help="walks per detection interval")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 2, 3, 4, 5, 6, 8])
+    parser.add_argument("--turn-back", type=float, default=0.3, help="share of walkers who stop and turn back")
+    parser.add_argument("--speed", type=float, nargs=2, default=[6, 30], help="walking speed range, px/frame")
+    parser.add_argument("--coast-frames", type=int, default=8)
+    parser.add_argument("--pending-frames", type=int, default=15,
+                        help="frames after which a predicted crossing is settled: confirmed if the track was not seen again")
+    parser.add_argument("--miss-rate", type=float, default=0.2, help="chance a due detection fails")
+    parser.add_argument("--noise", type=float, default=3.0, help="detection jitter, px")
+    args = parser.parse_args()
+    print(f"{args.walkers} walks per interval, {args.turn_back:.0%} turn back, speed {args.speed[0]:g}-{args.speed[1]:g} px/frame, "
+          f"coast {args.coast_frames} frames, pending for {args.pending_frames}")
+    print(f"{'interval':>8} {'missed (detections)':>20} {'missed (coasting)':>18} "
+          f"{'false (detections)':>19} {'false (coasting)':>17}")
+    for interval in args.intervals:
+        rng = np.random.default_rng(interval)
+        missed = np.zeros(2)
+        false = np.zeros(2)
+        crossers = turners = 0
+        for _ in range(args.walkers):
+            crosser = rng.random() >= args.turn_back
+            walk = make_walk(rng, crosser, args.speed)
+            counts = np.array(evaluate(walk, rng, interval, args.coast_frames, args.pending_frames,
+                                       args.miss_rate, args.noise))
+            if crosser:
+                crossers += 1
+                missed += counts == 0
+            else:
+                turners += 1
+                false += counts > 0
+        missed /= max(crossers, 1)
+        false /= max(turners, 1)
+        print(f"{interval:>8} {missed[0]:>20.1%} {missed[1]:>18.1%} {false[0]:>19.1%} {false[1]:>17.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Identity state soak test: 24h of synthetic sightings on a simulated clock.
+
+A steady stream of people (employees and visitors drawn from a large pool)
+walks past the cameras; each sighting updates the same per-identity state the
+pipeline keeps. Prints live identities and RSS per simulated hour, once with the
+TTL-evicting IdentityStateStore and once with the previous unbounded dicts.
+
+    python benchmarks/soak_identity_state.py --hours 24 --step 5 --concurrent 40
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.identity_state import IdentityStateStore
+from core.track_state import GlobalTrack, TrackHistory
+
+GLOBAL_TRACK_TIMEOUT = 300
+STATE_HISTORY_SIZE = 30
+EMBEDDING_HISTORY_SIZE = 5
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class UnboundedState:
+    """The previous layout: separate dicts per concern, nothing ever evicted."""
+    def __init__(self):
+        self.global_tracks = {}
+        self.tracking_states = {}
+        self.identity_crossing_state = {}
+        self.identity_tracks = {}
+
+    def update(self, identity, camera_id, now, embedding, position, score):
+        track = self.global_tracks.setdefault(
+            identity, SimpleNamespace(embedding_history=deque(maxlen=EMBEDDING_HISTORY_SIZE), last_seen_time=now))
+        track.last_seen_time = now
+        track.embedding_history.append(embedding)
+        tracking = self.tracking_states.setdefault(
+            identity, SimpleNamespace(position_history=[], confidence_history=[], quality_history=[]))
+        tracking.position_history.append(position)
+        tracking.confidence_history.append(score)
+        tracking.quality_history.append((score, score, score, score, score))
+        self.identity_crossing_state.setdefault(identity, {}).setdefault(str(camera_id), {}).setdefault(
+            "EntryDetection", {'state': 'none', 'last_position': position[0], 'direction': None})
+        self.identity_tracks[identity] = identity
+
+    def __len__(self):
+        return len(self.global_tracks)
+
+
+class BoundedState:
+    def __init__(self, clock):
+        self.store = IdentityStateStore(ttl=GLOBAL_TRACK_TIMEOUT, clock=clock)
+
+    def update(self, identity, camera_id, now, embedding, position, score):
+        state = self.store.touch(identity, camera_id, now)
+        if state.track is None:
+            state.track = GlobalTrack(identity, now, camera_id, history_size=EMBEDDING_HISTORY_SIZE)
+        state.track.last_seen_time = now
+        state.track.add_embedding(embedding)
+        if state.tracking is None:
+            state.tracking = TrackHistory(STATE_HISTORY_SIZE)
+        state.tracking.push(position[0], position[1], score, (score,) * 5)
+
+    def __len__(self):
+        return len(self.store)
+
+
+def soak(label, make_state, args):
+    rng = random.Random(11)
+    embeddings = [np.random.default_rng(i).standard_normal(512).astype(np.float32) for i in range(64)]
+    sim = {"now": 0.0}
+    state = make_state(lambda: sim["now"])
+    visible = {}  # identity -> sim time they leave the cameras
+    sweep_every = 30.0
+    next_sweep = sweep_every
+    started = time.perf_counter()
+    print(f"\n{label}")
+    print(f"{'hour':>4} {'identities':>10} {'rss MB':>8} {'estimate MB':>12}")
+    for step in range(int(args.hours * 3600 / args.step) + 1):
+        now = sim["now"] = step * args.step
+        while len(visible) < args.concurrent:
+            identity = f"P{rng.randrange(args.population):06d}"
+            visible[identity] = now + rng.uniform(30, 600)
+        for identity, leaves_at in list(visible.items()):
+            if now >= leaves_at:
+                del visible[identity]
+                continue
+            state.update(identity, rng.randrange(2), now, embeddings[rng.randrange(64)].copy(),
+                         (rng.randrange(1280), rng.randrange(720)), rng.uniform(0.6, 1.0))
+        if isinstance(state, BoundedState) and now >= next_sweep:
+            state.store.sweep(now)
+            next_sweep += sweep_every
+        if now % 3600 == 0:
+            estimate = f"{state.store.estimated_bytes / 2 ** 20:.2f}" if isinstance(state, BoundedState) else "-"
+            print(f"{int(now // 3600):>4} {len(state):>10} {rss_mb():>8.1f} {estimate:>12}")
+    print(f"({time.perf_counter() - started:.1f}s wall)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--step", type=float, default=5, help="simulated seconds between frames")
+    parser.add_argument("--concurrent", type=int, default=40, help="people in view at any time")
+    parser.add_argument("--population", type=int, default=50000, help="distinct people over the run")
+    parser.add_argument("--skip-unbounded", action="store_true")
+    args = parser.parse_args()
+    soak("TTL-evicting IdentityStateStore", BoundedState, args)
+    if not args.skip_unbounded:
+        soak("Unbounded per-identity dicts (previous layout)", lambda clock: UnboundedState(), args)
+
+
+if __name__ == "__main__":
+    main()
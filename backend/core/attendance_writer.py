@@ -0,0 +1,123 @@
+"""
+Group-commit attendance writer.
+Persists batches of attendance events in a single transaction. Every row
+carries a deterministic idempotency key backed by a unique index, so retried
+batches and crash replays can never insert the same crossing twice.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+
+from db.db_config import SessionLocal
+from db.db_models import AttendanceRecord
+from utils.logging import get_logger
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING
+CONFLICT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def make_idempotency_key(employee_id: str, camera_id: int, tripwire: Optional[str],
+                         timestamp: datetime, bucket_seconds: int) -> str:
+    """Same employee crossing the same tripwire within one time bucket maps to one key."""
+    bucket = int(timestamp.timestamp() // bucket_seconds)
+    return f"{employee_id}:{camera_id}:{tripwire or '-'}:{bucket}"
+
+
+class AttendanceWriter:
+    """
+    Batched, idempotent attendance_records inserts.
+    Args:
+        session_factory: SQLAlchemy session factory
+        bucket_seconds: Width of the time bucket in the idempotency key
+        max_retries: Retries of a batch on transient errors (e.g. database locked)
+    """
+    def __init__(self, session_factory=SessionLocal, bucket_seconds: int = 10, max_retries: int = 3):
+        self.session_factory = session_factory
+        self.bucket_seconds = bucket_seconds
+        self.max_retries = max_retries
+        self.logger = get_logger(__name__)
+        self._metrics_lock = threading.Lock()
+        self.batches = 0
+        self.rows_written = 0
+        self.duplicates = 0
+        self.retries = 0
+        self.last_commit_seconds = 0.0
+
+    def to_row(self, event) -> Dict[str, Any]:
+        return {
+            "employee_id": event.employee_id,
+            "camera_id": event.camera_id,
+            "event_type": event.event_type,
+            "timestamp": event.timestamp,
+            "confidence_score": 0.0,
+            "work_status": event.work_status,
+            "is_valid": True,
+            "notes": event.tripwire,
+            "idempotency_key": make_idempotency_key(
+                event.employee_id, event.camera_id, event.tripwire, event.timestamp, self.bucket_seconds)}
+
+    def write_batch(self, events: Iterable) -> int:
+        """
+        Insert a batch of events in one transaction.
+        Returns:
+            Number of rows actually inserted (duplicates are skipped)
+        """
+        rows = {}
+        for event in events:
+            row = self.to_row(event)
+            rows.setdefault(row["idempotency_key"], row)
+        return self.write_rows(list(rows.values()))
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        for attempt in range(self.max_retries + 1):
+            session = self.session_factory()
+            try:
+                started = time.perf_counter()
+                inserted = self._insert(session, rows)
+                session.commit()
+                with self._metrics_lock:
+                    self.batches += 1
+                    self.rows_written += inserted
+                    self.duplicates += len(rows) - inserted
+                    self.last_commit_seconds = time.perf_counter() - started
+                return inserted
+            except OperationalError as e:
+                session.rollback()
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                self.logger.warning(f"Attendance batch of {len(rows)} failed ({e}); retrying")
+                time.sleep(0.05 * 2 ** attempt)
+            finally:
+                session.close()
+        return 0
+
+    def _insert(self, session, rows: List[Dict[str, Any]]) -> int:
+        conflict_insert = CONFLICT_INSERTS.get(session.get_bind().dialect.name)
+        if conflict_insert is not None:
+            statement = conflict_insert(AttendanceRecord).on_conflict_do_nothing(
+                index_elements=["idempotency_key"]).returning(AttendanceRecord.id)
+            return len(session.execute(statement, rows).all())
+        # Other dialects: skip keys that already exist, the unique index guards races
+        keys = [row["idempotency_key"] for row in rows]
+        existing = {key for (key,) in session.query(AttendanceRecord.idempotency_key).filter(
+            AttendanceRecord.idempotency_key.in_(keys))}
+        fresh = [row for row in rows if row["idempotency_key"] not in existing]
+        if fresh:
+            session.bulk_insert_mappings(AttendanceRecord, fresh)
+        return len(fresh)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "duplicates_skipped": self.duplicates,
+            "retries": self.retries,
+            "last_commit_ms": round(self.last_commit_seconds * 1000, 2)}
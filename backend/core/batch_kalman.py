@@ -0,0 +1,157 @@
+"""
+Batched constant-velocity Kalman filter for all tracks of a camera.
+State vectors and covariances of every track are stacked in numpy arrays
+indexed by slot, so a frame's predict/correct is a handful of vectorized
+operations instead of one cv2.KalmanFilter call (and its temporary arrays)
+per face. Slots are reused when tracks are removed or go stale.
+Between detections, recently measured tracks can coast along their predicted
+trajectory so downstream consumers see a position every frame.
+"""
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.slot_map import SlotMap
+
+
+class BatchKalmanFilter:
+    """
+    Stacked [x, y, vx, vy] Kalman filters with position-only measurements.
+    Args:
+        capacity: Initial number of slots (doubles when full)
+        process_noise: Diagonal process noise (Q = q * I)
+        measurement_noise: Diagonal measurement noise (R = r * I)
+        dt: Time step between updates, in frames
+    """
+    def __init__(self, capacity: int = 64, process_noise: float = 0.1, measurement_noise: float = 0.1,
+                 dt: float = 1.0):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.process_covariance = process_noise * np.eye(4)
+        self.transition = np.array([[1, 0, dt, 0],
+                                    [0, 1, 0, dt],
+                                    [0, 0, 1, 0],
+                                    [0, 0, 0, 1]], dtype=np.float64)
+        self.slots = SlotMap(capacity)
+        self.state = np.zeros((capacity, 4), dtype=np.float64)
+        self.covariance = np.zeros((capacity, 4, 4), dtype=np.float64)
+        # Frames each track has been predicted without a measurement
+        self.coasted = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.slots
+
+    def slot(self, key: Hashable) -> Optional[int]:
+        return self.slots.get(key)
+
+    def add(self, key: Hashable, x: float, y: float, now: float = 0.0) -> int:
+        """Start a track at (x, y) with zero velocity; returns its slot."""
+        slot = self.slots.acquire(key, now)
+        if self.slots.capacity > len(self.state):
+            grow = self.slots.capacity - len(self.state)
+            self.state = np.concatenate((self.state, np.zeros((grow, 4))))
+            self.covariance = np.concatenate((self.covariance, np.zeros((grow, 4, 4))))
+            self.coasted = np.concatenate((self.coasted, np.zeros(grow, dtype=np.int32)))
+        self.state[slot] = (x, y, 0.0, 0.0)
+        self.covariance[slot] = np.eye(4)
+        self.coasted[slot] = 0
+        self.slots.last_update[slot] = now
+        return slot
+
+    def remove(self, key: Hashable) -> bool:
+        return self.slots.release(key) is not None
+
+    def evict_stale(self, cutoff: float) -> List[Hashable]:
+        """Remove tracks not updated since `cutoff`; returns their keys."""
+        keys = self.slots.stale(cutoff)
+        for key in keys:
+            self.remove(key)
+        return keys
+
+    def _predict(self, state: np.ndarray, covariance: np.ndarray):
+        transition = self.transition
+        state = state @ transition.T
+        covariance = transition @ covariance @ transition.T
+        covariance += self.process_covariance
+        return state, covariance
+
+    def _correct(self, state: np.ndarray, covariance: np.ndarray, measurements: np.ndarray):
+        # Innovation covariance S = H P H^T + R is the 2x2 position block; invert it in closed form
+        s00 = covariance[:, 0, 0] + self.measurement_noise
+        s11 = covariance[:, 1, 1] + self.measurement_noise
+        s01 = covariance[:, 0, 1]
+        s10 = covariance[:, 1, 0]
+        det = s00 * s11 - s01 * s10
+        s_inv = np.empty((len(state), 2, 2))
+        s_inv[:, 0, 0] = s11 / det
+        s_inv[:, 1, 1] = s00 / det
+        s_inv[:, 0, 1] = -s01 / det
+        s_inv[:, 1, 0] = -s10 / det
+        gain = covariance[:, :, :2] @ s_inv
+        innovation = measurements - state[:, :2]
+        state = state + (gain @ innovation[:, :, None])[:, :, 0]
+        covariance = covariance - gain @ covariance[:, :2, :]
+        return state, covariance
+
+    def predict(self, slots: np.ndarray) -> np.ndarray:
+        """Advance the given slots one step without a measurement; returns their predicted (x, y)."""
+        self.state[slots], self.covariance[slots] = self._predict(self.state[slots], self.covariance[slots])
+        return self.state[slots, :2].copy()
+
+    def correct(self, slots: np.ndarray, measurements: np.ndarray):
+        """Fold (n, 2) position measurements into the given slots."""
+        self.state[slots], self.covariance[slots] = self._correct(
+            self.state[slots], self.covariance[slots], np.asarray(measurements, dtype=np.float64))
+
+    def update(self, keys: Sequence[Hashable], measurements, now: float = 0.0) -> np.ndarray:
+        """
+        Predict and correct the tracks for one frame, creating unseen ones.
+        Args:
+            keys: Track keys, one per measurement (no duplicates)
+            measurements: (n, 2) measured positions
+            now: Timestamp recorded for staleness eviction
+        Returns:
+            (n, 2) positions predicted before the correction
+        """
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, 2)
+        if not len(keys):
+            return np.empty((0, 2))
+        slots, created = self.slots.acquire_many(keys, now)
+        for i in created:
+            self.add(keys[i], measurements[i, 0], measurements[i, 1], now)
+        # Gather once, predict and correct on the stacked copies, scatter once
+        state, covariance = self._predict(self.state[slots], self.covariance[slots])
+        predicted = state[:, :2].copy()
+        self.state[slots], self.covariance[slots] = self._correct(state, covariance, measurements)
+        self.slots.last_update[slots] = now
+        self.coasted[slots] = 0
+        return predicted
+
+    def coast(self, max_frames: int, skip: Sequence[Hashable] = ()) -> Tuple[List[Hashable], np.ndarray]:
+        """
+        Advance tracks that have gone unmeasured for fewer than `max_frames` frames.
+        Args:
+            max_frames: Coasting limit per track since its last measurement
+            skip: Keys to leave alone (e.g. the ones just measured this frame)
+        Returns:
+            (keys, (n, 2) predicted positions)
+        """
+        capacity = self.slots.capacity
+        mask = self.slots.active[:capacity] & (self.coasted[:capacity] < max_frames)
+        for key in skip:
+            slot = self.slots.get(key)
+            if slot is not None:
+                mask[slot] = False
+        slots = np.flatnonzero(mask)
+        if not len(slots):
+            return [], np.empty((0, 2))
+        self.state[slots], self.covariance[slots] = self._predict(self.state[slots], self.covariance[slots])
+        self.coasted[slots] += 1
+        return [self.slots.key(slot) for slot in slots], self.state[slots, :2].copy()
+
+    def position(self, key: Hashable) -> Optional[np.ndarray]:
+        slot = self.slots.get(key)
+        return None if slot is None else self.state[slot, :2].copy()
@@ -0,0 +1,211 @@
+"""
+Buffered, rotating CSV backup of attendance events.
+The file stays open; rows are buffered and flushed when enough have
+accumulated, when the flush interval elapses and on close. The active file is
+rotated to a dated archive (optionally gzip-compressed) when the day changes.
+A backup can be replayed into the database through the attendance writer.
+"""
+import csv
+import gzip
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from utils.logging import get_logger
+
+CSV_HEADER = ["Timestamp", "EmployeeID", "EmployeeName", "CameraID", "Event", "Status", "Tripwire"]
+# Files started before the Tripwire column existed; appended to as they are
+LEGACY_CSV_HEADER = CSV_HEADER[:-1]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class CsvBackupAppender:
+    """
+    Append-only attendance CSV owned by a single writer.
+    Args:
+        path: Active CSV file; archives are written next to it as <name>-YYYY-MM-DD.csv[.gz]
+        flush_rows: Flush once this many rows are buffered
+        flush_interval: Flush buffered rows at least this often (seconds)
+        compress: Gzip rotated archives
+    """
+    def __init__(self, path: str, flush_rows: int = 100, flush_interval: float = 1.0, compress: bool = False):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.logger = get_logger(__name__)
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        self._writer = None
+        self._day: Optional[date] = None
+        self._columns = len(CSV_HEADER)
+        self._pending = 0
+        self._closed = threading.Event()
+        self.rows_written = 0
+        self.flushes = 0
+        self.rotations = 0
+        self._open()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name="csv_backup_flusher")
+        self._flusher.start()
+
+    def _archive_path(self, day: date) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f"{root}-{day.isoformat()}{ext or '.csv'}" + (".gz" if self.compress else "")
+
+    def _open(self):
+        header = None
+        if os.path.exists(self.path):
+            with open(self.path, newline='', encoding='utf-8') as existing:
+                header = next(csv.reader(existing), None)
+                has_rows = next(existing, None) is not None
+            file_day = datetime.fromtimestamp(os.path.getmtime(self.path)).date()
+            known = header in (CSV_HEADER, LEGACY_CSV_HEADER)
+            if has_rows and (not known or file_day != date.today()):
+                self._archive(file_day)
+            elif not has_rows and not known:
+                os.remove(self.path)
+        is_new = not os.path.exists(self.path)
+        # Large userspace buffer; rows reach the disk on our flush policy
+        self._file = open(self.path, 'a', newline='', encoding='utf-8', buffering=1 << 16)
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(CSV_HEADER)
+            header = CSV_HEADER
+        # Rows follow the file's own header: a legacy file gets no Tripwire column
+        self._columns = len(header)
+        self._day = date.today()
+
+    def _archive(self, day: date):
+        target = self._archive_path(day)
+        if self.compress:
+            with open(self.path, 'rb') as source, gzip.open(target, 'ab') as archive:
+                shutil.copyfileobj(source, archive)
+            os.remove(self.path)
+        elif os.path.exists(target):
+            with open(self.path, 'rb') as source, open(target, 'ab') as archive:
+                source.readline()
+                shutil.copyfileobj(source, archive)
+            os.remove(self.path)
+        else:
+            os.replace(self.path, target)
+        self.rotations += 1
+        self.logger.info(f"Rotated attendance backup to {target}")
+
+    def _rotate_if_needed(self, day: date):
+        if day == self._day:
+            return
+        self._flush()
+        self._file.close()
+        self._archive(self._day)
+        self._open()
+
+    def append(self, events: Iterable):
+        """Buffer attendance events (bus consumer handler); never blocks on the disk unless flushing."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._rotate_if_needed(date.today())
+            for event in events:
+                self._writer.writerow([
+                    event.timestamp.strftime(TIMESTAMP_FORMAT),
+                    event.employee_id,
+                    event.employee_name,
+                    event.camera_id,
+                    event.event_type,
+                    "logged",
+                    event.tripwire or ""][:self._columns])
+                self._pending += 1
+                self.rows_written += 1
+            if self._pending >= self.flush_rows:
+                self._flush()
+
+    def _flush(self):
+        if self._file is None or not self._pending:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self.flushes += 1
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                try:
+                    self._flush()
+                except Exception as e:
+                    self.logger.error(f"Attendance backup flush failed: {e}")
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def get_metrics(self):
+        return {
+            "rows_written": self.rows_written,
+            "pending": self._pending,
+            "flushes": self.flushes,
+            "rotations": self.rotations}
+
+
+def read_backup(path: str) -> Iterator:
+    """Yield AttendanceEvents from a backup file (plain or .gz, old or current header)."""
+    from core.event_bus import AttendanceEvent
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as source:
+        for row in csv.DictReader(source):
+            if row.get("Timestamp") == "Timestamp" or row.get("Status", "logged") != "logged":
+                continue
+            try:
+                yield AttendanceEvent(
+                    employee_id=row["EmployeeID"],
+                    employee_name=row.get("EmployeeName") or row["EmployeeID"],
+                    camera_id=int(row["CameraID"]),
+                    event_type=row["Event"],
+                    timestamp=datetime.strptime(row["Timestamp"], TIMESTAMP_FORMAT),
+                    tripwire=row.get("Tripwire") or None)
+            except (KeyError, ValueError, TypeError):
+                continue
+
+
+def replay_backup(path: str, writer, batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Re-insert a CSV backup into attendance_records for disaster recovery.
+    Rows already in the database are skipped through their idempotency keys.
+    Returns:
+        (rows read, rows inserted)
+    """
+    read = inserted = 0
+    batch: List = []
+    for event in read_backup(path):
+        batch.append(event)
+        read += 1
+        if len(batch) >= batch_size:
+            inserted += writer.write_batch(batch)
+            batch = []
+    if batch:
+        inserted += writer.write_batch(batch)
+    return read, inserted
+
+
+if __name__ == "__main__":
+    # python -m core.csv_backup replay attendance_log.csv [more files...]
+    if len(sys.argv) < 3 or sys.argv[1] != "replay":
+        print("usage: python -m core.csv_backup replay <backup.csv[.gz]> [...]")
+        sys.exit(2)
+    from db.db_config import create_tables
+    from core.attendance_writer import AttendanceWriter
+    create_tables()
+    attendance_writer = AttendanceWriter()
+    for backup_path in sys.argv[2:]:
+        started = time.perf_counter()
+        rows_read, rows_inserted = replay_backup(backup_path, attendance_writer)
+        print(f"{backup_path}: {rows_read} rows read, {rows_inserted} inserted "
+              f"in {time.perf_counter() - started:.2f}s")
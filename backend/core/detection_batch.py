@@ -0,0 +1,136 @@
+"""
+Compact per-frame detection results.
+A frame's detections are one numpy structured array (box, detector score,
+keypoints, head pose, embedding row) plus a float32 embedding matrix, tagged
+with the frame sequence number and timestamp they were detected at. The
+batch is built once in the detection thread and then shared read-only by
+quality scoring, matching, tracking and the API: consumers take field views
+and row subsets instead of walking lists of detector objects, and the JSON
+form is only built (once) when an API client asks for it.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.track_state import QUALITY_FIELDS
+
+DETECTION_DTYPE = np.dtype([
+    ("bbox", np.float32, (4,)),
+    ("score", np.float32),
+    ("kps", np.float32, (5, 2)),
+    ("pose", np.float32, (3,)),
+    ("embedding", np.int32),   # row in the batch's embedding matrix, -1 if none
+])
+
+
+class DetectionBatch:
+    """
+    Detections of one frame.
+    Args:
+        camera_id: Camera the frame came from
+        frame_seq: Sequence number of the detected frame
+        timestamp: When the frame was detected
+        detections: (n,) DETECTION_DTYPE records
+        embeddings: (m, d) float32 embedding matrix referenced by the records
+    """
+    __slots__ = ("camera_id", "frame_seq", "timestamp", "detections", "embeddings", "quality", "_json")
+
+    def __init__(self, camera_id: int, frame_seq: int, timestamp: float,
+                 detections: Optional[np.ndarray] = None, embeddings: Optional[np.ndarray] = None):
+        self.camera_id = camera_id
+        self.frame_seq = frame_seq
+        self.timestamp = timestamp
+        self.detections = np.zeros(0, dtype=DETECTION_DTYPE) if detections is None else detections
+        self.embeddings = np.zeros((0, 0), dtype=np.float32) if embeddings is None else embeddings
+        # Quality scores in QUALITY_FIELDS order, filled in by the detection thread (zero until scored)
+        self.quality = np.zeros((len(self.detections), len(QUALITY_FIELDS)), dtype=np.float32)
+        self._json: Optional[List[Dict]] = None
+
+    @classmethod
+    def from_faces(cls, faces: Sequence, camera_id: int, frame_seq: int, timestamp: float,
+                   scale: float = 1.0) -> "DetectionBatch":
+        """
+        Pack detector Face objects; missing poses and keypoints are NaN.
+        Args:
+            scale: Factor the detector's input was resized by; coordinates are mapped back
+        """
+        detections = np.zeros(len(faces), dtype=DETECTION_DTYPE)
+        detections["kps"] = np.nan
+        detections["pose"] = np.nan
+        detections["embedding"] = -1
+        boxes, scores, embedded = [], [], []
+        # One pass reading each attribute once (insightface Face attributes are dict lookups)
+        for i, face in enumerate(faces):
+            boxes.append(face.bbox)
+            score = getattr(face, 'det_score', None)
+            scores.append(0.5 if score is None else score)
+            kps = getattr(face, 'kps', None)
+            if kps is not None and len(kps) == 5:
+                detections["kps"][i] = kps
+            pose = getattr(face, 'pose', None)
+            if pose is not None:
+                detections["pose"][i] = pose
+            embedding = getattr(face, 'embedding', None)
+            if embedding is not None:
+                detections["embedding"][i] = len(embedded)
+                embedded.append(embedding)
+        if boxes:
+            detections["bbox"] = boxes
+            detections["score"] = scores
+        embeddings = np.array(embedded, dtype=np.float32) if embedded else np.zeros((0, 0), dtype=np.float32)
+        if scale != 1.0:
+            detections["bbox"] /= scale
+            detections["kps"] /= scale
+        return cls(camera_id, frame_seq, timestamp, detections, embeddings)
+
+    @classmethod
+    def from_arrays(cls, camera_id: int, frame_seq: int, timestamp: float, boxes: np.ndarray,
+                    scores: np.ndarray, keypoints: np.ndarray,
+                    embeddings: Optional[np.ndarray] = None) -> "DetectionBatch":
+        """
+        Pack the detector's output arrays (no head pose); with `embeddings`, row i belongs to detection i.
+        """
+        detections = np.zeros(len(boxes), dtype=DETECTION_DTYPE)
+        detections["bbox"] = boxes
+        detections["score"] = scores
+        detections["kps"] = keypoints
+        detections["pose"] = np.nan
+        if embeddings is None:
+            detections["embedding"] = -1
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+        else:
+            detections["embedding"] = np.arange(len(boxes))
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+        return cls(camera_id, frame_seq, timestamp, detections, embeddings)
+
+    def __len__(self) -> int:
+        return len(self.detections)
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self.detections["bbox"]
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self.detections["score"]
+
+    @property
+    def keypoints(self) -> np.ndarray:
+        return self.detections["kps"]
+
+    @property
+    def poses(self) -> np.ndarray:
+        return self.detections["pose"]
+
+    def embedding(self, index: int) -> Optional[np.ndarray]:
+        """View of detection `index`'s embedding row."""
+        row = self.detections["embedding"][index]
+        return None if row < 0 else self.embeddings[row]
+
+    def to_json(self) -> List[Dict]:
+        """API form of the detections, built on first request and cached."""
+        if self._json is None:
+            self._json = [
+                {"identity": "unknown", "bbox": bbox, "confidence": round(score, 4)}
+                for bbox, score in zip(self.boxes.tolist(), self.scores.tolist())]
+        return self._json
@@ -0,0 +1,123 @@
+"""
+Bounded queue of self-learning embedding updates.
+Camera threads offer an update (identity, normalized embedding, timestamp)
+when a confident match passes the per-identity cooldown. A token bucket caps
+how many updates per minute are accepted across all identities, and the
+queue holds at most max_pending updates: when the writer falls behind, the
+oldest pending update is dropped, since a newer embedding of the same scene
+is worth more than an old one. The writer drains the queue in batches and
+persists each batch with one bulk insert; its throughput and database time
+are recorded here too, so one metrics block covers the whole path.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+import numpy as np
+
+EmbeddingUpdate = Tuple[str, np.ndarray, float]
+
+
+class EmbeddingUpdateQueue:
+    """
+    Drop-oldest update queue with a rate limit.
+    Args:
+        max_pending: Updates held before the oldest is dropped
+        max_per_minute: Updates accepted per minute (bursts up to this many); 0 disables the limit
+    """
+    def __init__(self, max_pending: int = 256, max_per_minute: float = 60.0):
+        self.max_pending = max_pending
+        self.max_per_minute = max_per_minute
+        self._pending: Deque[EmbeddingUpdate] = deque()
+        self._ready = threading.Condition()
+        self._tokens = float(max_per_minute)
+        self._refilled = time.monotonic()
+        self.closed = False
+        self.accepted = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.batches = 0
+        self.rows_written = 0
+        self.failed = 0
+        self.db_seconds = 0.0
+        self.last_batch_seconds = 0.0
+        self._started = time.monotonic()
+
+    def _take_token(self) -> bool:
+        if self.max_per_minute <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.max_per_minute, self._tokens + (now - self._refilled) * self.max_per_minute / 60.0)
+        self._refilled = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def offer(self, update: EmbeddingUpdate) -> bool:
+        """Queue an update; False if the rate limit rejected it (or the queue is closed)."""
+        with self._ready:
+            if self.closed:
+                return False
+            if not self._take_token():
+                self.rate_limited += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(update)
+            self.accepted += 1
+            self._ready.notify()
+            return True
+
+    def drain(self, max_batch: int = 64, timeout: float = 1.0, max_wait: float = 0.5) -> List[EmbeddingUpdate]:
+        """
+        Args:
+            max_batch: Most updates returned at once
+            timeout: Seconds to wait for the first update
+            max_wait: Seconds to keep collecting a batch after the first update
+        Returns:
+            Oldest-first batch, empty on timeout or once closed and drained
+        """
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._pending or self.closed, timeout):
+                return []
+            deadline = time.monotonic() + max_wait
+            while len(self._pending) < max_batch and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._ready.wait(remaining):
+                    break
+            return [self._pending.popleft() for _ in range(min(max_batch, len(self._pending)))]
+
+    def close(self):
+        """Stop accepting updates and wake the writer, which drains what is left."""
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def record_batch(self, rows: int, seconds: float, ok: bool = True):
+        self.batches += 1
+        self.db_seconds += seconds
+        self.last_batch_seconds = seconds
+        if ok:
+            self.rows_written += rows
+        else:
+            self.failed += rows
+
+    def get_metrics(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        return {
+            "queued": len(self._pending),
+            "capacity": self.max_pending,
+            "max_per_minute": self.max_per_minute,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "failed": self.failed,
+            "rows_per_minute": round(self.rows_written * 60.0 / elapsed, 2) if elapsed > 0 else 0.0,
+            "db_seconds": round(self.db_seconds, 4),
+            "db_rows_per_second": round(self.rows_written / self.db_seconds, 1) if self.db_seconds > 0 else None,
+            "last_batch_seconds": round(self.last_batch_seconds, 4)}
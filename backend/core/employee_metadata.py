@@ -0,0 +1,109 @@
+"""
+In-memory employee metadata store.
+Loaded once in bulk from the database and kept current by enrollment and
+employee CRUD, so per-frame lookups (display names, departments) never touch
+the filesystem or open a database session.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+METADATA_FIELDS = ('employee_name', 'department', 'designation', 'email', 'phone')
+
+
+class EmployeeMetadataStore:
+    """
+    Thread-safe cache of employee display metadata keyed by employee id.
+    Args:
+        negative_ttl: Seconds an id that was not found stays cached as unknown
+    """
+    def __init__(self, negative_ttl: float = 300.0):
+        self.negative_ttl = negative_ttl
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._missing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    @staticmethod
+    def _record_from_employee(employee) -> Dict[str, Any]:
+        return {field: getattr(employee, field, None) for field in METADATA_FIELDS}
+
+    def load(self, employees: Iterable) -> int:
+        """Replace the whole store from Employee rows (bulk query result)."""
+        records = {employee.id: self._record_from_employee(employee) for employee in employees}
+        with self._lock:
+            self._records = records
+            self._missing = {}
+            self.loaded = True
+        return len(records)
+
+    def upsert(self, employee_id: str, **fields):
+        """Create or update one employee; fields left as None keep their cached value."""
+        with self._lock:
+            # Records are replaced, never mutated, so readers need no lock
+            record = dict(self._records.get(employee_id) or dict.fromkeys(METADATA_FIELDS))
+            record.update({k: v for k, v in fields.items() if k in METADATA_FIELDS and v is not None})
+            if not record.get('employee_name'):
+                record['employee_name'] = employee_id
+            self._records[employee_id] = record
+            self._missing.pop(employee_id, None)
+
+    def upsert_employee(self, employee):
+        """Create or update one employee from an Employee row."""
+        record = self._record_from_employee(employee)
+        with self._lock:
+            self._records[employee.id] = record
+            self._missing.pop(employee.id, None)
+
+    def remove(self, employee_id: str):
+        with self._lock:
+            self._records.pop(employee_id, None)
+            self._missing[employee_id] = time.time() + self.negative_ttl
+
+    def get(self, employee_id: str, loader: Optional[Callable[[str], Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up an employee's metadata.
+        Args:
+            employee_id: Employee identifier
+            loader: Optional fallback returning an Employee row (or None) on a cache miss;
+                    unknown ids are then cached negatively for negative_ttl seconds
+        Returns:
+            Metadata dict, or None for unknown employees
+        """
+        record = self._records.get(employee_id)
+        if record is not None:
+            self.hits += 1
+            return record
+        expiry = self._missing.get(employee_id)
+        if expiry is not None and expiry > time.time():
+            self.negative_hits += 1
+            return None
+        self.misses += 1
+        if loader is None:
+            return None
+        employee = loader(employee_id)
+        if employee is None:
+            with self._lock:
+                self._missing[employee_id] = time.time() + self.negative_ttl
+            return None
+        self.upsert_employee(employee)
+        return self._records.get(employee_id)
+
+    def get_name(self, employee_id: str, loader: Optional[Callable[[str], Any]] = None) -> str:
+        record = self.get(employee_id, loader)
+        return record['employee_name'] if record else employee_id
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "employees": len(self._records),
+            "negative_entries": len(self._missing),
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits}
+
+
+# Process-wide store shared by the tracking pipeline, the enroller and the API
+employee_metadata_store = EmployeeMetadataStore()
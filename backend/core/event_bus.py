@@ -0,0 +1,154 @@
+"""
+Internal attendance event bus.
+Camera threads publish a compact AttendanceEvent and return immediately; each
+consumer (database, CSV backup, external API, live clients) drains its own
+bounded queue on its own thread, so a slow sink only delays itself.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logging import get_logger
+
+
+@dataclass(frozen=True)
+class AttendanceEvent:
+    employee_id: str
+    employee_name: str
+    camera_id: int
+    event_type: str
+    timestamp: datetime
+    tripwire: Optional[str] = None
+    published_at: float = field(default_factory=time.time, compare=False)
+
+    @property
+    def event_id(self) -> str:
+        """Stable key of this event for live clients (database ids are assigned later, by the writer)"""
+        return f"{self.employee_id}:{self.camera_id}:{self.timestamp.isoformat()}"
+
+    @property
+    def work_status(self) -> str:
+        return "working" if self.event_type == "check_in" else "on_break"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.event_id,
+            "employee_id": self.employee_id,
+            "employee_name": self.employee_name,
+            "event_type": self.event_type,
+            "work_status": self.work_status,
+            "timestamp": self.timestamp.isoformat(),
+            "camera_id": self.camera_id}
+
+
+class EventConsumer:
+    """
+    One bus subscriber with its own queue and worker thread.
+    Args:
+        name: Consumer name used in metrics and logs
+        handler: Callable receiving a list of events (a batch of one unless max_batch > 1)
+        max_queue: Queue bound; events published while it is full are dropped and counted
+        max_batch: Maximum number of events handed to the handler at once
+        max_wait: Seconds to keep collecting a batch after its first event
+    """
+    def __init__(self, name: str, handler: Callable[[List[AttendanceEvent]], None],
+                 max_queue: int = 1000, max_batch: int = 1, max_wait: float = 0.0):
+        self.name = name
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.queue: "queue.Queue[Optional[AttendanceEvent]]" = queue.Queue(maxsize=max_queue)
+        self.logger = get_logger(f"event_bus.{name}")
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"attendance_{name}")
+        self._thread.start()
+
+    def offer(self, event: AttendanceEvent) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _collect(self, first: AttendanceEvent) -> List[AttendanceEvent]:
+        batch = [first]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.time()
+            try:
+                event = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is None:
+                # Put the stop marker back so the run loop sees it after this batch
+                self.queue.put(None)
+                break
+            batch.append(event)
+        return batch
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            batch = self._collect(event)
+            try:
+                self.handler(batch)
+                self.processed += len(batch)
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"Attendance consumer '{self.name}' failed on {len(batch)} event(s): {e}")
+            self.last_lag = time.time() - batch[0].published_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+    def stop(self, timeout: float = 5.0):
+        """Let the worker drain what is already queued, then exit."""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_lag_seconds": round(self.last_lag, 4),
+            "max_lag_seconds": round(self.max_lag, 4)}
+
+
+class AttendanceEventBus:
+    """Fans attendance events out to independent consumers without blocking the publisher."""
+    def __init__(self):
+        self._consumers: Dict[str, EventConsumer] = {}
+        self.published = 0
+
+    def subscribe(self, name: str, handler: Callable[[List[AttendanceEvent]], None], **options) -> EventConsumer:
+        consumer = EventConsumer(name, handler, **options)
+        self._consumers[name] = consumer
+        return consumer
+
+    def publish(self, event: AttendanceEvent):
+        self.published += 1
+        for consumer in self._consumers.values():
+            consumer.offer(event)
+
+    def shutdown(self, timeout: float = 5.0):
+        for consumer in self._consumers.values():
+            consumer.stop(timeout)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "consumers": {name: consumer.get_metrics() for name, consumer in self._consumers.items()}}
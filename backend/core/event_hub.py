@@ -0,0 +1,120 @@
+"""
+Live event fan-out for WebSocket clients.
+Pipeline threads publish small deltas (attendance events, per-camera face
+boxes, presence changes and stats ticks); each connected client receives the
+topics it subscribed to through its own bounded queue, so a slow client only
+ever drops its own oldest messages.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+TOPICS = ("attendance", "faces", "presence", "stats")
+
+
+class EventSubscriber:
+    """
+    Pending-message queue of one WebSocket client.
+    Messages published with a coalesce key replace an older, still unsent
+    message with the same key (e.g. face boxes of the same camera).
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, topics: Iterable[str], max_pending: int):
+        self.loop = loop
+        self.topics = set(topics)
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.sent = 0
+        self._pending: "OrderedDict[Any, str]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._ready = asyncio.Event()
+
+    def _offer(self, message: str, coalesce_key: Optional[Any]):
+        # Runs on the subscriber's event loop
+        key = coalesce_key if coalesce_key is not None else next(self._sequence)
+        if key in self._pending:
+            self._pending[key] = message
+            return
+        if len(self._pending) >= self.max_pending:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+        self._pending[key] = message
+        self._ready.set()
+
+    async def next_message(self) -> str:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        _, message = self._pending.popitem(last=False)
+        self.sent += 1
+        return message
+
+
+class EventHub:
+    """
+    Thread-safe publisher of live pipeline events.
+    Args:
+        max_pending: Per-client queue bound before the oldest messages are dropped
+        faces_interval: Minimum seconds between face-box updates of one camera
+    """
+    def __init__(self, max_pending: int = 256, faces_interval: float = 0.5):
+        self.max_pending = max_pending
+        self.faces_interval = faces_interval
+        self._subscribers: List[EventSubscriber] = []
+        self._lock = threading.Lock()
+        self._last_faces_publish: Dict[int, float] = {}
+
+    def register(self, loop: asyncio.AbstractEventLoop, topics: Optional[Iterable[str]] = None) -> EventSubscriber:
+        subscriber = EventSubscriber(loop, topics or TOPICS, self.max_pending)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unregister(self, subscriber: EventSubscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return any(topic in subscriber.topics for subscriber in self._subscribers)
+
+    def faces_due(self, camera_id: int) -> bool:
+        """Check the per-camera throttle and whether anyone wants face boxes at all."""
+        if not self.has_subscribers("faces"):
+            return False
+        now = time.time()
+        if now - self._last_faces_publish.get(camera_id, 0.0) < self.faces_interval:
+            return False
+        self._last_faces_publish[camera_id] = now
+        return True
+
+    def publish(self, topic: str, data: Any, coalesce_key: Optional[Any] = None):
+        """Serialise once and hand the message to every interested client."""
+        with self._lock:
+            subscribers = [s for s in self._subscribers if topic in s.topics]
+        if not subscribers:
+            return
+        message = json.dumps({"topic": topic, "ts": time.time(), "data": data}, default=str)
+        key = (topic, coalesce_key) if coalesce_key is not None else None
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber._offer, message, key)
+            except RuntimeError:
+                # Event loop already closed; the client is gone
+                self.unregister(subscriber)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "clients": len(subscribers),
+            "pending": sum(len(s._pending) for s in subscribers),
+            "sent": sum(s.sent for s in subscribers),
+            "dropped": sum(s.dropped for s in subscribers)}
+
+
+# Process-wide hub shared by the tracking pipeline and the API
+event_hub = EventHub()
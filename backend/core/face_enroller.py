@@ -1,15 +1,16 @@
 import os
-import cv2
 import numpy as np
 import logging
 from datetime import datetime
 from typing import List, Union, Optional
-from insightface.app import FaceAnalysis
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db.db_manager import DatabaseManager
 from db.db_models import FaceEmbedding
-from core.fts_system import FaceTrackingPipeline
+from core.model_registry import gpu_providers, model_registry
+from core.employee_metadata import employee_metadata_store
+from utils.lazy_import import lazy_module
+cv2 = lazy_module('cv2')
 class FaceEnrollmentError(Exception):
     pass
 class EmployeeNotFoundError(FaceEnrollmentError):
@@ -23,9 +24,8 @@ class FaceEnroller:
     def __init__(self, tracking_system=None):
         self.db_manager = DatabaseManager()
         self.tracking_system = tracking_system
-        self.face_app = FaceAnalysis(name='antelopev2',
-                                     providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
-        self.face_app.prepare(ctx_id=0, det_size=(416, 416))
+        # The tracking pipeline's session, not a separate copy of the model
+        self.face_app = model_registry.get_face_analysis(providers=gpu_providers(0), det_size=(416, 416))
         self.logger = logging.getLogger(__name__)
         if not self.logger.handlers:
             logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -67,6 +67,7 @@ class FaceEnroller:
             if not created:
                 self.logger.error(f"Error creating employee {employee_id} in database")
                 raise DatabaseOperationError(f"Failed to create employee {employee_id}")
+            employee_metadata_store.upsert(employee_id, employee_name=employee_name)
             self.logger.info(f"Created new employee {employee_name} ({employee_id}) in database")
         valid_count = 0
         for img_path in image_paths:
@@ -225,6 +226,7 @@ class FaceEnroller:
             success = self.db_manager.delete_employee(employee_id)
             if success:
                 self.logger.info(f"Deleted employee {employee_id} from database")
+                employee_metadata_store.remove(employee_id)
                 if rebuild_index and not self._batch_mode and self.tracking_system:
                     self.tracking_system.reload_embeddings_and_rebuild_index()
             else:
@@ -0,0 +1,123 @@
+"""
+Batch face quality scoring.
+Every component score is computed for all detections of a frame in one numpy
+pass over the DetectionBatch fields (boxes, detector scores, head poses,
+keypoints). Brightness and sharpness come from small crops of the green
+channel: a few samples per crop cell are gathered straight out of the frame
+in one pass, and all crops, stacked as one image, are area-averaged down to
+one value per cell with a single resize, so no per-face resize or colour
+conversion is needed and the crops aren't aliased. Sharpness is the variance
+of their Laplacian (one cv2.Laplacian over the stack); on point-sampled crops
+it mostly measured aliasing and sensor noise.
+Scores are laid out in QUALITY_FIELDS order.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from core.detection_batch import DetectionBatch
+from core.track_state import QUALITY_FIELDS
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+SHARPNESS, BRIGHTNESS, ANGLE, SIZE, OVERALL = range(len(QUALITY_FIELDS))
+# Laplacian variance (on area-averaged 0-255 crops) at which a face counts as fully sharp
+SHARP_LAPLACIAN_VAR = 500.0
+MIN_FACE_SIZE = 50
+# Area at which a face gets the full size score
+FULL_SIZE_AREA = 100 * 100
+
+
+class FaceQualityScorer:
+    """
+    Scores every face of a frame at once.
+    Args:
+        threshold: Overall quality a face needs to be kept
+        crop_size: Side of the crop used for brightness and sharpness
+        samples: Samples averaged per crop cell along each axis
+    """
+    def __init__(self, threshold: float, crop_size: int = 16, samples: int = 2):
+        self.threshold = threshold
+        self.crop_size = crop_size
+        self.samples = samples
+        # Sample at the centres of a (crop_size * samples) square grid over each box
+        self._grid = (np.arange(crop_size * samples, dtype=np.float32) + 0.5) / (crop_size * samples)
+        # Row means as matrix-vector products, which beat axis reductions on small rows
+        self._crop_mean = np.full(crop_size * crop_size, 1.0 / crop_size ** 2, dtype=np.float32)
+        self._laplacian_mean = np.full((crop_size - 2) ** 2, 1.0 / (crop_size - 2) ** 2, dtype=np.float32)
+
+    def _crops(self, frame: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        """(n * crop_size, crop_size) uint8 crops stacked vertically, each cell the mean of samples x samples points."""
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        origin = boxes[:, :2, None]
+        points = origin + (boxes[:, 2:, None] - origin) * self._grid
+        np.clip(points, 0, ((width - 1,), (height - 1,)), out=points)
+        points = points.astype(np.intp)
+        # Flat offsets of each sampled column and row; green stands in for luma (a third of the gather)
+        columns = points[:, 0] * channels + (channels > 1)
+        rows = points[:, 1] * (width * channels)
+        index = rows[:, :, None] + columns[:, None, :]
+        gathered = np.ascontiguousarray(frame).ravel().take(index)
+        # Area-average each samples x samples block: one resize of all faces stacked as one image
+        side = self.crop_size * self.samples
+        return cv2.resize(gathered.reshape(-1, side), (self.crop_size, len(boxes) * self.crop_size),
+                          interpolation=cv2.INTER_AREA)
+
+    def score(self, frame: np.ndarray, detections: DetectionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            frame: The BGR (or grayscale) frame the detections were made on
+            detections: The frame's detections
+        Returns:
+            (n, len(QUALITY_FIELDS)) scores and the (n,) mask of faces passing the threshold
+        """
+        if not len(detections):
+            return np.empty((0, len(QUALITY_FIELDS)), dtype=np.float32), np.zeros(0, dtype=bool)
+        return self.score_arrays(frame, detections.boxes, detections.scores, detections.poses,
+                                 detections.keypoints)
+
+    def score_arrays(self, frame: np.ndarray, boxes: np.ndarray, det_scores: np.ndarray,
+                     poses: np.ndarray, keypoints: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        height, width = frame.shape[:2]
+        quality = np.empty((len(boxes), len(QUALITY_FIELDS)), dtype=np.float32)
+        face_width = boxes[:, 2] - boxes[:, 0]
+        face_height = boxes[:, 3] - boxes[:, 1]
+        size = np.minimum(1.0, face_width * face_height / FULL_SIZE_AREA)
+        # Too small to recognise, or too close to the camera
+        size[(face_width < MIN_FACE_SIZE) | (face_height < MIN_FACE_SIZE)] = 0.0
+        size[(face_width > width * 0.8) | (face_height > height * 0.8)] = 0.0
+        quality[:, SIZE] = size
+        centre_x = (boxes[:, 0] + boxes[:, 2]) / 2 - width / 2
+        centre_y = (boxes[:, 1] + boxes[:, 3]) / 2 - height / 2
+        position = 1.0 - np.hypot(centre_x, centre_y) / np.hypot(width / 2, height / 2)
+        crops = self._crops(frame, boxes)
+        n, size = len(boxes), self.crop_size
+        quality[:, BRIGHTNESS] = 1.0 - np.abs(crops.reshape(n, -1) @ self._crop_mean / 255.0 - 0.5) * 2
+        # 4-neighbour Laplacian of the stacked crops; each crop's border cells (which see the
+        # neighbouring crop or the image border) are dropped
+        laplacian = cv2.Laplacian(crops, cv2.CV_32F, ksize=1).reshape(n, size, size)[:, 1:-1, 1:-1].reshape(n, -1)
+        # Variance from the first two moments
+        variance = (laplacian * laplacian) @ self._laplacian_mean - (laplacian @ self._laplacian_mean) ** 2
+        quality[:, SHARPNESS] = np.minimum(1.0, variance / SHARP_LAPLACIAN_VAR)
+        quality[:, ANGLE] = self._angle_scores(poses, keypoints)
+        quality[:, OVERALL] = (0.3 * quality[:, SIZE] + 0.2 * position + 0.2 * det_scores
+                               + 0.1 * quality[:, BRIGHTNESS] + 0.1 * quality[:, SHARPNESS]
+                               + 0.1 * quality[:, ANGLE])
+        return quality, quality[:, OVERALL] >= self.threshold
+
+    @staticmethod
+    def _angle_scores(poses: np.ndarray, keypoints: np.ndarray) -> np.ndarray:
+        # Head pose when the detector estimates it
+        angle = np.maximum(0.0, 1.0 - np.abs(poses).sum(axis=1) / 90.0)
+        missing = np.isnan(angle)
+        if missing.any():
+            # Otherwise yaw from the nose's offset between the eyes (5-point keypoints), else a neutral 0.8
+            kps = keypoints[missing]
+            eyes_x = (kps[:, 0, 0] + kps[:, 1, 0]) / 2
+            eye_distance = np.hypot(*(kps[:, 1] - kps[:, 0]).T)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                estimate = np.clip(1.0 - np.abs(kps[:, 2, 0] - eyes_x) / eye_distance, 0.0, 1.0)
+            angle[missing] = np.where(np.isnan(estimate), 0.8, estimate)
+        return angle
@@ -1,18 +1,12 @@
-import cv2
 import os
 import numpy as np
-import faiss
-import torch
 import time
 import threading
-import csv
-import pickle
 import sys
+import logging
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
-from insightface.app import FaceAnalysis
-from bytetracker.byte_tracker import BYTETracker
 import requests
 import json
 from datetime import datetime
@@ -24,11 +18,40 @@ from db.db_config import create_tables
 from db.db_models import Employee, FaceEmbedding, AttendanceRecord
 from datetime import timedelta
 from utils.logging import get_logger
+from utils.lazy_import import lazy_module
+from utils.log_store import log_store
+from core.stream_broadcaster import StreamBroadcaster
+from core.event_hub import event_hub
+from core.employee_metadata import employee_metadata_store
+from core.work_status import WorkStatusTable
+from core.event_bus import AttendanceEvent, AttendanceEventBus
+from core.attendance_writer import AttendanceWriter
+from core.csv_backup import CsvBackupAppender
+from core.identity_state import IdentityStateStore
+from core.batch_kalman import BatchKalmanFilter
+from core.identity_votes import IdentityVotes
+from core.track_state import GlobalTrack, TrackHistory
+from core.face_quality import OVERALL, FaceQualityScorer
+from core.detection_batch import DetectionBatch
+from core.embedding_updates import EmbeddingUpdateQueue
+from core.frame_preprocessor import FaceAligner, FramePreprocessor
+from core.gallery_index import GalleryIndex
+from core.gallery_snapshot import GallerySnapshot
+from core.gallery_syncer import GallerySyncer
+from core.model_registry import gpu_providers, model_registry
+from core.startup_graph import StartupGraph
+from core.tripwire_engine import TripwireConfig, TripwireEngine, segment_band
+
+# The vision stack loads when the pipeline first uses it, not when the API imports this module
+cv2 = lazy_module('cv2')
+faiss = lazy_module('faiss')
+byte_tracker = lazy_module('bytetracker.byte_tracker')
 
 # Global variables for Django integration
 system_instance = None
+_shared_pipeline = None
+_shared_pipeline_lock = threading.Lock()
 is_tracking_running = False
-log_buffer = []
 latest_faces = {}
 latest_attendance = deque(maxlen=100)
 system_stats = {
@@ -41,24 +64,16 @@ system_stats = {
 present_users_by_department = defaultdict(list)
 start_time = None
 
-def log_message(msg):
-    """Log messages to buffer instead of stdout"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] {msg}"
-    log_buffer.append(log_entry)
-    # Keep last 1000 log entries
-    if len(log_buffer) > 1000:
-        log_buffer.pop(0)
-
-# Replace all print statements with log_message
-print = log_message
+pipeline_logger = get_logger(__name__)
+# Keyed by the tag's last word, so "[ZOHO ERROR]" and "[GPU WARNING]" log at their real level
+LEVEL_TAGS = {"ERROR": logging.ERROR, "WARNING": logging.WARNING}
 
-@dataclass
-class TripwireConfig:
-    position: float
-    spacing: float
-    direction: str
-    name: str
+def log_message(msg, camera_id: int = None, employee_id: str = None):
+    """Log through the queued pipeline logger; "[... ERROR]"/"[... WARNING]" prefixes set the level"""
+    level = logging.INFO
+    if msg.startswith("[") and "]" in msg:
+        level = LEVEL_TAGS.get(msg[1:msg.find("]")].rsplit(" ", 1)[-1], logging.INFO)
+    pipeline_logger.log(level, msg, extra={"camera_id": camera_id, "employee_id": employee_id})
 
 @dataclass
 class CameraConfig:
@@ -70,49 +85,43 @@ class CameraConfig:
     fps: int
 
 @dataclass
-class GlobalTrack:
-    employee_id: str
-    last_seen_time: float
-    last_camera_id: int
-    embedding_history: deque
-    confidence_score: float = 0.0
-    work_status: str = "working"
-
-@dataclass
-class EmployeeMetadata:
-    employee_id: str
-    employee_name: str
-    enrollment_date: str
-    embedding_count: int
-    source_images: List[str]
+class FaceAnnotation:
+    bbox: Tuple[int, int, int, int]
+    identity: str
+    display_id: str
+    score: float
+    quality: float
 
 @dataclass
-class FaceQualityMetrics:
-    sharpness_score: float
-    brightness_score: float
-    angle_score: float
-    size_score: float
-    overall_quality: float
-
-@dataclass
-class TrackingState:
-    position_history: List[Tuple[int, int]]
-    velocity: Tuple[float, float]
-    predicted_position: Tuple[int, int]
-    confidence_history: List[float]
-    quality_history: List[FaceQualityMetrics]
+class FrameAnnotations:
+    camera_id: int
+    frame_seq: int
+    timestamp: float
+    faces: List[FaceAnnotation]
 
 known_faces_dir = r"D:\Python Course\SEDL AI\insightface-env\known_faces"
 THRESHOLD = 0.6
-DET_THRESH = 0.5
+DET_SIZE = (416, 416)
 MATCH_THRESH = 0.8
 MAX_LIFETIME = 60
 EMBED_UPDATE_COOLDOWN = 10
+# Self-learning updates accepted per minute across all identities, and pending before the oldest is dropped
+EMBED_UPDATE_RATE = 60
+EMBED_UPDATE_QUEUE_SIZE = 256
+# Update embeddings kept per employee (the gallery uses the newest 3)
+EMBED_UPDATES_KEPT = 15
 FRAME_INTERVAL = 1 / 10
+STREAM_FPS = 10
 GLOBAL_TRACK_TIMEOUT = 300
 EMBEDDING_HISTORY_SIZE = 5
 TRACK_BUFFER_SIZE = 30
+STATE_HISTORY_SIZE = 30
+KALMAN_TRACK_TIMEOUT = 5
+TRIPWIRE_COAST_FRAMES = 8
+TRIPWIRE_PENDING_SECONDS = 1.5
+IDENTITY_VOTE_TIMEOUT = 2
 log_file_path = "attendance_log.csv"
+CSV_BACKUP_COMPRESS = False
 ENHANCED_CONFIG = {'face_quality_threshold': 0.65}
 
 API_CONFIG = {
@@ -145,59 +154,6 @@ CAMERAS = [
         resolution=(1280, 720),
         fps=15)]
 
-def load_employee_metadata(employee_id: str) -> Optional[EmployeeMetadata]:
-    emp_folder = os.path.join(known_faces_dir, employee_id)
-    metadata_path = os.path.join(emp_folder, "metadata.pkl")
-    if os.path.exists(metadata_path):
-        try:
-            with open(metadata_path, 'rb') as f:
-                data = pickle.load(f)
-                if isinstance(data, dict):
-                    return EmployeeMetadata(
-                        employee_id=data.get('employee_id', employee_id),
-                        employee_name=data.get('employee_name', employee_id),
-                        enrollment_date=data.get('enrollment_date', ''),
-                        embedding_count=data.get('embedding_count', 0),
-                        source_images=data.get('source_images', []))
-                elif isinstance(data, EmployeeMetadata):
-                    return data
-                else:
-                    return None
-        except:
-            return None
-    return None
-
-def save_employee_metadata(metadata: EmployeeMetadata):
-    emp_folder = os.path.join(known_faces_dir, metadata.employee_id)
-    os.makedirs(emp_folder, exist_ok=True)
-    metadata_path = os.path.join(emp_folder, "metadata.pkl")
-    with open(metadata_path, 'wb') as f:
-        pickle.dump(metadata, f)
-
-class KalmanTracker:
-    def __init__(self):
-        self.kalman = cv2.KalmanFilter(4, 2)
-        self.kalman.measurementMatrix = np.array([[1, 0, 0, 0],
-                                                  [0, 1, 0, 0]], np.float32)
-        self.kalman.transitionMatrix =  np.array([[1, 0, 1, 0],
-                                                  [0, 1, 0, 1],
-                                                  [0, 0, 1, 0],
-                                                  [0, 0, 0, 1]], np.float32)
-        self.kalman.processNoiseCov = ENHANCED_CONFIG.get('kalman_process_noise', 0.1) * np.eye(4, dtype=np.float32)
-        self.kalman.measurementNoiseCov = ENHANCED_CONFIG.get('kalman_measurement_noise', 0.1) * np.eye(2, dtype=np.float32)
-        self.kalman.errorCovPost = np.eye(4, dtype=np.float32)
-        self.initialized = False
-
-    def update(self, center_x: int, center_y: int) -> Tuple[int, int]:
-        measurement = np.array([[np.float32(center_x)], [np.float32(center_y)]])
-        if not self.initialized:
-            self.kalman.statePre = np.array([center_x, center_y, 0, 0], dtype=np.float32).reshape(4, 1)
-            self.kalman.statePost = np.array([center_x, center_y, 0, 0], dtype=np.float32).reshape(4, 1)
-            self.initialized = True
-        prediction = self.kalman.predict()
-        self.kalman.correct(measurement)
-        return int(prediction[0]), int(prediction[1])
-
 class APILogger:
     def __init__(self, config):
         self.config = config
@@ -214,8 +170,7 @@ class APILogger:
         self.refresh_token = config.get('refresh_token', '')
         self.client_id = config.get('client_id', '')
         self.client_secret = config.get('client_secret', '')
-        self.token_expiry = 0  # Force immediate refresh
-        self._refresh_token()
+        self.token_expiry = 0  # Refreshed by the API worker before the first send, not at startup
         self.lock = threading.Lock()
         self.retry_thread = threading.Thread(target=self._retry_failed_logs_worker, daemon=True)
         self.retry_thread.start()
@@ -397,67 +352,60 @@ class APILogger:
         self.api_worker_thread.join(timeout=5)
 
 class FaceTrackingSystem:
-    def __init__(self, face_app):
+    def __init__(self, face_app=None):
+        # GPU 0's shared model unless given; loaded by the startup graph
         self.face_app = face_app
-        self.embeddings = []
-        self.labels = []
-        self.employee_metadata = {}
-        self.index = None
+        # Id-mapped FAISS index of the active embeddings; guarded by faiss_index_lock
+        self.gallery = GalleryIndex()
+        # face_embeddings version the gallery was loaded at; the snapshot makes warm restarts cheap
+        self.gallery_version = None
+        self.gallery_snapshot = GallerySnapshot()
+        self.employee_metadata = employee_metadata_store
         self.apps = {}
         self.trackers = {}
-        self.global_tracks = {}
-        self.track_identities = {}
-        self.track_lifetimes = {}
         self.track_positions = {}
-        self.last_embedding_update = {}
         self.frame_locks = {}
         self.latest_frames = {}
-        self.latest_faces = {}
+        self.latest_detections = {}
+        self.latest_annotations = {}
+        self.frame_seq = {}
+        self.stream_broadcasters = {}
         self.face_detection_threads = {}
         self.embedding_cache = {}
-        self.next_global_track_id = 1
-        self.last_faces_reload = time.time()
-        self.faces_reload_interval = 30
-        self.frame_skip_counter = {}
         self.detection_interval = {}
-        self.identity_tracks = {}
-        self.identity_last_seen = {}
-        self.identity_cameras = {}
-        self.identity_positions = {}
-        self.identity_trip_logged = {}
-        self.identity_crossing_state = {}
-        self.identity_zone_state = {}
-        self.kalman_trackers = {}
-        self.tracking_states = {}
+        self.identity_votes = {}
+        self.preprocessors = {}
+        self.quality_scorer = FaceQualityScorer(ENHANCED_CONFIG['face_quality_threshold'])
+        self.present_employees = {}
+        self.identity_states = IdentityStateStore(ttl=GLOBAL_TRACK_TIMEOUT)
+        self.work_status = WorkStatusTable(window_hours=10)
         self.logger = get_logger(__name__)
         self.api_logger = APILogger(API_CONFIG)
         self.enable_csv_backup = True
         self.global_tracks_lock = threading.RLock()
         self.embedding_update_lock = threading.RLock()
-        self.identity_tracks_lock = threading.RLock()
         self.embedding_cache_lock = threading.RLock()
         self.faiss_index_lock = threading.RLock()
-        self.metadata_lock = threading.RLock()
-        self.embedding_update_queue = queue.Queue()
+        self.embedding_update_queue = EmbeddingUpdateQueue(EMBED_UPDATE_QUEUE_SIZE, EMBED_UPDATE_RATE)
         self.shutdown_flag = threading.Event()
         self.embedding_update_worker = None
-        self.batch_update_threshold = 5
-        self.updates_since_last_rebuild = 0
-        self.max_updates_before_rebuild = 20
         self.db_manager = DatabaseManager()
-        create_tables()
+        # Applies enrollment/archive/delete changes to the live gallery off the camera threads
+        self.gallery_syncer = GallerySyncer(self.db_manager, self.employee_metadata,
+                                            self._apply_gallery_delta, self._refresh_gallery,
+                                            load_snapshot=self._load_gallery_snapshot,
+                                            save_snapshot=self._save_gallery_snapshot)
         self.embedding_update_worker = threading.Thread(target=self._embedding_update_worker, daemon=True)
         self.embedding_update_worker.start()
-        if self.enable_csv_backup:
-            self._prepare_csv()
+        self._start_attendance_bus()
         self.camera_threads = []
-        self._load_known_faces()
-        self._load_employee_metadata()
-        self._initialize_faiss()
-        self._initialize_multi_gpu_insightface()
+        self.captures = {}
         self._initialize_cameras()
-        self._prepare_csv()
-        
+        # Database, gallery, models and camera connections load in the background
+        self.startup = self._build_startup_graph()
+        self.startup.start()
+        self.gallery_syncer.start(self.shutdown_flag)
+        self.identity_states.start_sweeper(self.shutdown_flag)
         # Start stats updater thread
         self.stats_thread = threading.Thread(target=self._update_stats, daemon=True)
         self.stats_thread.start()
@@ -468,8 +416,8 @@ class FaceTrackingSystem:
             # Update present users by department
             with self.global_tracks_lock:
                 active_tracks = [
-                    track for track in self.global_tracks.values() 
-                    if time.time() - track.last_seen_time < GLOBAL_TRACK_TIMEOUT
+                    state.track for state in self.identity_states.active(GLOBAL_TRACK_TIMEOUT)
+                    if state.track is not None
                 ]
                 
                 # Reset department map
@@ -479,86 +427,132 @@ class FaceTrackingSystem:
                 # Update with active users
                 for track in active_tracks:
                     emp_id = track.employee_id
-                    with self.metadata_lock:
-                        if emp_id in self.employee_metadata:
-                            dept = self.employee_metadata[emp_id].get('department', 'Unknown')
-                            present_users_by_department[dept].append(emp_id)
+                    metadata = self.employee_metadata.get(emp_id)
+                    if metadata:
+                        present_users_by_department[metadata.get('department') or 'Unknown'].append(emp_id)
             
             # Update other stats
             system_stats["cam_count"] = len(CAMERAS)
             system_stats["faces_detected"] = len(active_tracks)
             system_stats["attendance_count"] = len(latest_attendance)
+            self._publish_presence_changes(present_users_by_department)
+            event_hub.publish("stats", get_system_status(), coalesce_key="system")
             
             time.sleep(5)  # Update every 5 seconds
 
+    def _publish_presence_changes(self, users_by_department):
+        """Push only the employees that arrived or left since the previous stats tick"""
+        present = {emp_id: dept for dept, emp_ids in users_by_department.items() for emp_id in emp_ids}
+        arrived = [{"employee_id": emp_id, "department": dept}
+                   for emp_id, dept in present.items() if emp_id not in self.present_employees]
+        left = [{"employee_id": emp_id, "department": dept}
+                for emp_id, dept in self.present_employees.items() if emp_id not in present]
+        self.present_employees = present
+        if arrived or left:
+            event_hub.publish("presence", {"arrived": arrived, "left": left, "present_count": len(present)})
+
+    def _refresh_gallery(self, force: bool = False) -> bool:
+        """Load the gallery from the database unless already at its version; True if loaded"""
+        version = self.db_manager.get_gallery_version()
+        if not force and version >= 0 and version == self.gallery_version:
+            return False
+        started = time.time()
+        version, ids, embeddings, labels = self.db_manager.get_active_gallery()
+        if len(embeddings) > 0:
+            faiss.normalize_L2(embeddings)
+        self._set_gallery(version, ids, embeddings, labels, "database", started)
+        return True
+
+    def _load_gallery_snapshot(self, max_age: float) -> Optional[int]:
+        """Load the gallery from its snapshot; returns the change-log cursor to replay from, None if unusable"""
+        started = time.time()
+        version = self.db_manager.get_gallery_version()
+        cursor = self.db_manager.get_gallery_change_cursor()
+        if version < 0 or cursor < 0:
+            return None
+        snapshot = self.gallery_snapshot.load(version, max_age)
+        # A cursor past the log's end means the snapshot belongs to another database
+        if snapshot is None or self.gallery_snapshot.cursor > cursor:
+            return None
+        # Read-only mmap: the index copies the rows it is built from
+        embeddings, labels, ids = snapshot
+        self._set_gallery(self.gallery_snapshot.version, ids, embeddings, labels, "snapshot", started)
+        return self.gallery_snapshot.cursor
+
+    def _save_gallery_snapshot(self, version: int, cursor: int):
+        with self.faiss_index_lock:
+            embeddings, labels, ids = self.gallery.export()
+        self.gallery_snapshot.save(version, cursor, embeddings, labels, ids)
+        log_message(f"[GALLERY] Saved snapshot of {len(labels)} embeddings (gallery v{version}, change {cursor})")
+
+    def _set_gallery(self, version: int, ids: np.ndarray, embeddings: np.ndarray, labels: List[str],
+                     source: str, started: float):
+        with self.faiss_index_lock:
+            self.gallery.load(ids, embeddings, labels)
+            self.gallery_version = version
+        with self.embedding_cache_lock:
+            self.embedding_cache.clear()
+        log_message(f"[GALLERY] Loaded {len(set(labels))} employees with {len(labels)} embeddings "
+                    f"from {source} (gallery v{version}) in {time.time() - started:.2f}s")
+
+    def _apply_gallery_delta(self, version: int, employee_ids, ids: np.ndarray, embeddings: np.ndarray, labels: List[str]):
+        """Replace the gallery rows of employee_ids with their current rows; costs O(rows changed)"""
+        if len(embeddings) > 0:
+            faiss.normalize_L2(embeddings)
+        with self.faiss_index_lock:
+            removed, added = self.gallery.replace(employee_ids, ids, embeddings, labels)
+            self.gallery_version = version
+        with self.embedding_cache_lock:
+            self.embedding_cache.clear()
+        log_message(f"[GALLERY] Synced {len(employee_ids)} employees: -{removed} +{added} embeddings (gallery v{version})")
+
     def _load_known_faces(self):
         try:
-            embeddings_list, labels_list = self.db_manager.get_all_active_embeddings()
-            if embeddings_list:
-                self.embeddings = np.array(embeddings_list).astype('float32')
-                self.labels = labels_list
-                faiss.normalize_L2(self.embeddings)
-            log_message(f"[INIT] Loaded {len(set(labels_list)) if labels_list else 0} employees with {len(embeddings_list)} embeddings from database")
+            self.gallery_syncer.load()
         except Exception as e:
             log_message(f"[ERROR] Failed to load known faces from database: {e}")
-            self.embeddings = []
-            self.labels = []
+            with self.faiss_index_lock:
+                self.gallery = GalleryIndex()
 
     def _load_employee_metadata(self):
         try:
-            employees = self.db_manager.get_all_employees()
-            for employee in employees:
-                self.employee_metadata[employee.id] = {
-                    'employee_name': employee.employee_name,
-                    'department': employee.department,
-                    'designation': employee.designation,
-                    'email': employee.email,
-                    'phone': employee.phone
-                }
-            log_message(f"[INIT] Loaded metadata for {len(employees)} employees from database")
+            count = self.employee_metadata.load(self.db_manager.get_all_employees())
+            log_message(f"[INIT] Loaded metadata for {count} employees from database")
         except Exception as e:
             log_message(f"[ERROR] Failed to load employee metadata from database: {e}")
 
     def get_employee_name(self, employee_id: str) -> str:
-        with self.metadata_lock:
-            if employee_id in self.employee_metadata:
-                return self.employee_metadata[employee_id]['employee_name']
-            employee = self.db_manager.get_employee(employee_id)
-            if employee:
-                return employee.employee_name
-            return employee_id
+        return self.employee_metadata.get_name(employee_id, loader=self.db_manager.get_employee)
+
+    def _load_work_status(self):
+        count = self.work_status.hydrate(self.db_manager)
+        if self.work_status.hydrated:
+            log_message(f"[INIT] Loaded work status for {count} employees from database")
+        else:
+            log_message("[WARNING] Could not load work status - falling back to per-employee lookups")
 
     def _check_employee_work_status(self, employee_id: str) -> bool:
-        try:
-            latest_record = self.db_manager.get_latest_attendance_by_employee(employee_id, hours_back=10)
-            if latest_record:
-                is_working = latest_record.event_type == 'check_in'
-                log_message(f"[STATUS CHECK] {employee_id} is {'working' if is_working else 'not working'} (last {latest_record.event_type} at {latest_record.timestamp})")
-                return is_working
-            else:
-                log_message(f"[STATUS CHECK] No recent attendance records found for {employee_id}")
-                return False
-        except Exception as e:
-            log_message(f"[STATUS CHECK] Database error for {employee_id}: {str(e)}")
-            return False
+        return self.work_status.is_working(employee_id, self.db_manager)
 
     def _update_embeddings(self, identity: str, embedding: np.ndarray):
         current_time = time.time()
+        state = self.identity_states.get(identity)
+        if state is None:
+            return False
         with self.embedding_update_lock:
-            if identity in self.last_embedding_update:
-                if current_time - self.last_embedding_update[identity] < EMBED_UPDATE_COOLDOWN:
-                    return False
+            # The cooldown lives in the identity's state, so the TTL sweep drops it with the rest
+            last_update = state.last_embedding_update
+            if last_update is not None and current_time - last_update < EMBED_UPDATE_COOLDOWN:
+                return False
             emb_norm = np.linalg.norm(embedding)
             if emb_norm > 0:
                 embedding = embedding / emb_norm
             else:
                 return False
-            try:
-                self.embedding_update_queue.put((identity, embedding, current_time), timeout=0.1)
-                self.last_embedding_update[identity] = current_time
-                return True
-            except queue.Full:
+            if not self.embedding_update_queue.offer((identity, embedding, current_time)):
                 return False
+            state.last_embedding_update = current_time
+            return True
 
     def _cleanup_old_embeddings(self, identity: str, max_embeddings: int = 25):
         try:
@@ -566,50 +560,6 @@ class FaceTrackingSystem:
         except Exception as e:
             log_message(f"[WARNING] Could not cleanup old embeddings for {identity}: {e}")
 
-    def _log_attendance(self, employee_id: str, event_type: str, camera_id: str, confidence: float, 
-                       position: tuple, zone: str = None, metadata: dict = None):
-        try:
-            employee_name = self.get_employee_name(employee_id)
-            success = self.db_manager.create_attendance_record(
-                employee_id=employee_id,
-                event_type=event_type,
-                camera_id=camera_id,
-                confidence=confidence,
-                position_x=position[0] if position else None,
-                position_y=position[1] if position else None,
-                zone=zone,
-                metadata=metadata)
-            if success:
-                log_message(f"[ATTENDANCE] {employee_name} ({employee_id}) - {event_type} - Camera: {camera_id} - Confidence: {confidence:.2f}")
-                if hasattr(self, 'api_logger') and self.api_logger:
-                    self.api_logger.log_attendance(
-                        employee_id=employee_id,
-                        employee_name=employee_name,
-                        event_type=event_type,
-                        camera_id=camera_id,
-                        confidence=confidence,
-                        zone=zone,
-                        metadata=metadata)
-                if self.enable_csv_backup:
-                    self._log_to_csv(employee_id, employee_name, event_type, camera_id, confidence, zone)
-                
-                # Add to latest attendance buffer
-                attendance_event = {
-                    "employee_id": employee_id,
-                    "employee_name": employee_name,
-                    "event_type": event_type,
-                    "timestamp": datetime.now().isoformat(),
-                    "camera_id": camera_id,
-                    "confidence": confidence,
-                    "zone": zone
-                }
-                latest_attendance.append(attendance_event)
-                
-            else:
-                log_message(f"[ERROR] Failed to log attendance for {employee_id}")
-        except Exception as e:
-            log_message(f"[ERROR] Exception in _log_attendance: {e}")
-
     def get_attendance_history(self, employee_id: str = None, start_date: str = None, 
                               end_date: str = None, limit: int = 100):
         """Get attendance history from database"""
@@ -648,13 +598,13 @@ class FaceTrackingSystem:
                 email=email,
                 phone=phone)
             if success:
-                with self.metadata_lock:
-                    self.employee_metadata[employee_id] = {
-                        'employee_name': employee_name,
-                        'department': department,
-                        'designation': designation,
-                        'email': email,
-                        'phone': phone}
+                self.employee_metadata.upsert(
+                    employee_id,
+                    employee_name=employee_name,
+                    department=department,
+                    designation=designation,
+                    email=email,
+                    phone=phone)
                 log_message(f"[REGISTER] Successfully registered employee: {employee_name} ({employee_id})")
                 return True
             else:
@@ -678,15 +628,8 @@ class FaceTrackingSystem:
                 quality_score=1.0,
                 source_image_path=image_path)
             if success:
-                with self.faiss_index_lock:
-                    if len(self.embeddings) > 0:
-                        self.embeddings = np.vstack([self.embeddings, embedding.reshape(1, -1)])
-                    else:
-                        self.embeddings = embedding.reshape(1, -1)
-                    self.labels.append(employee_id)
-                    faiss.normalize_L2(self.embeddings)
-                    self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
-                    self.index.add(self.embeddings)
+                # The store logged a gallery change; applying it adds just this row
+                self.gallery_syncer.sync()
                 log_message(f"[FACE ADD] Successfully added face for employee: {employee_id}")
                 return True
             else:
@@ -702,30 +645,12 @@ class FaceTrackingSystem:
             cutoff_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
             deleted_count = self.db_manager.cleanup_old_attendance_records(cutoff_date)
             log_message(f"[CLEANUP] Deleted {deleted_count} old attendance records")
-            employees = self.db_manager.get_all_employees()
-            for employee in employees:
-                self.db_manager.cleanup_old_embeddings(employee.id, max_embeddings=15)
+            deleted_count = self.db_manager.cleanup_old_embeddings(max_embeddings=EMBED_UPDATES_KEPT)
+            log_message(f"[CLEANUP] Deleted {deleted_count} old update embeddings")
             log_message("[CLEANUP] Database cleanup completed")
         except Exception as e:
             log_message(f"[ERROR] Exception in cleanup_database: {e}")
 
-    def shutdown(self):
-        """Properly shutdown the system"""
-        try:
-            log_message("[SHUTDOWN] Initiating shutdown...")
-            self.shutdown_flag.set()
-            if self.embedding_update_worker and self.embedding_update_worker.is_alive():
-                log_message("[SHUTDOWN] Waiting for embedding update worker...")
-                self.embedding_update_worker.join(timeout=5)
-            for thread in self.camera_threads:
-                if thread.is_alive():
-                    thread.join(timeout=2)
-            if hasattr(self, 'db_manager'):
-                self.db_manager.close()
-            log_message("[SHUTDOWN] Shutdown completed")
-        except Exception as e:
-            log_message(f"[ERROR] Exception during shutdown: {e}")
-
     def get_database_stats(self):
         """Get database statistics"""
         try:
@@ -733,79 +658,90 @@ class FaceTrackingSystem:
                 'total_employees': self.db_manager.get_employee_count(),
                 'total_embeddings': self.db_manager.get_embedding_count(),
                 'total_attendance_records': self.db_manager.get_attendance_count(),
-                'active_employees': len(set(self.labels)) if self.labels else 0,
-                'loaded_embeddings': len(self.embeddings) if len(self.embeddings) > 0 else 0}
+                'active_employees': self.gallery.employee_count,
+                'loaded_embeddings': len(self.gallery)}
             return stats
         except Exception as e:
             log_message(f"[ERROR] Failed to get database stats: {e}")
             return {}
 
-    def _initialize_faiss(self):
-        if len(self.embeddings) > 0:
-            self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
-            self.index.add(self.embeddings)
-        else:
-            self.index = None
     def reload_embeddings_and_rebuild_index(self):
         """Reload embeddings from DB and rebuild FAISS index."""
-        with self.faiss_index_lock:
-            self.embeddings, self.labels = self.db_manager.get_all_active_embeddings()
-            if self.embeddings:
-                self.embeddings = np.array(self.embeddings).astype('float32')
-                faiss.normalize_L2(self.embeddings)
-                self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
-                self.index.add(self.embeddings)
-            else:
-                self.embeddings = []
-                self.labels = []
-                self.index = None
-            print("[INDEX REBUILD] FAISS index rebuilt with current active embeddings.")
+        # Applies just the logged changes; a full reload if the gallery was never loaded
+        if self.gallery_syncer.cursor is None:
+            self.gallery_syncer.reload(force=True)
+        else:
+            self.gallery_syncer.sync()
+        log_message("[INDEX REBUILD] FAISS index updated with current active embeddings.")
 
-    def _initialize_multi_gpu_insightface(self):
-        gpu_ids = list(set([cam.gpu_id for cam in CAMERAS]))
-        for gpu_id in gpu_ids:
-            providers = ['CPUExecutionProvider']
-            if torch.cuda.is_available() and gpu_id < torch.cuda.device_count():
-                providers = [('CUDAExecutionProvider', {'device_id': gpu_id}), 'CPUExecutionProvider']
-            else:
-                log_message(f"[GPU WARNING] GPU ID {gpu_id} unavailable, using CPU")
-            self.apps[gpu_id] = FaceAnalysis(name='antelopev2',
-                providers=providers,
-                allowed_modules=['detection', 'recognition'])
-            self.apps[gpu_id].prepare(ctx_id=gpu_id, det_size=(416, 416), det_thresh=DET_THRESH)
+    def _build_startup_graph(self) -> StartupGraph:
+        startup = StartupGraph()
+        startup.add("database", create_tables)
+        startup.add("gallery", self._load_gallery, depends_on=["database"])
+        startup.add("metadata", self._load_employee_metadata, depends_on=["database"])
+        startup.add("work_status", self._load_work_status, depends_on=["database"])
+        for gpu_id in sorted({cam.gpu_id for cam in CAMERAS} | {0}):
+            startup.add(f"models:gpu{gpu_id}", lambda gpu_id=gpu_id: self._load_models(gpu_id))
+        for cam_config in CAMERAS:
+            startup.add(f"camera:{cam_config.camera_id}",
+                        lambda cam_config=cam_config: self._connect_camera(cam_config))
+        return startup
+
+    def _load_gallery(self):
+        self._load_known_faces()
+
+    def _load_models(self, gpu_id: int):
+        providers = gpu_providers(gpu_id)
+        if providers == ['CPUExecutionProvider']:
+            log_message(f"[GPU WARNING] GPU ID {gpu_id} unavailable, using CPU")
+        # Shared with the pipeline and the enroller, loaded (and warmed up) once per process
+        self.apps[gpu_id] = model_registry.get_face_analysis(providers=providers, det_size=DET_SIZE)
+        if gpu_id == 0 and self.face_app is None:
+            self.face_app = self.apps[gpu_id]
+
+    def _open_camera(self, camera_config: CameraConfig):
+        cap = cv2.VideoCapture(camera_config.camera_id)
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open camera {camera_config.camera_id}")
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_FPS, camera_config.fps)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_config.resolution[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_config.resolution[1])
+        return cap
+
+    def _connect_camera(self, camera_config: CameraConfig):
+        self.captures[camera_config.camera_id] = self._open_camera(camera_config)
 
     def _initialize_cameras(self):
         for cam_config in CAMERAS:
             cam_id = cam_config.camera_id
-            self.trackers[cam_id] = BYTETracker(
+            self.trackers[cam_id] = byte_tracker.BYTETracker(
                 frame_rate=cam_config.fps,
                 track_buffer=TRACK_BUFFER_SIZE,
                 match_thresh=MATCH_THRESH)
             self.frame_locks[cam_id] = threading.Lock()
             self.latest_frames[cam_id] = None
-            self.latest_faces[cam_id] = []
-            self.track_identities[cam_id] = {}
-            self.track_lifetimes[cam_id] = {}
+            self.latest_detections[cam_id] = DetectionBatch(cam_id, frame_seq=0, timestamp=0.0)
+            self.latest_annotations[cam_id] = None
+            self.frame_seq[cam_id] = 0
+            self.stream_broadcasters[cam_id] = StreamBroadcaster(
+                cam_id,
+                frame_source=lambda cam_id=cam_id: self.get_stream_source(cam_id),
+                renderer=lambda frame, annotations, cam_config=cam_config: self.render_overlay(frame, annotations, cam_config),
+                fps=STREAM_FPS)
             self.track_positions[cam_id] = {}
-            self.frame_skip_counter[cam_id] = 0
             self.detection_interval[cam_id] = 3
-            self.track_identities[cam_id] = {}
-
-    def _prepare_csv(self):
-        if not os.path.exists(log_file_path):
-            with open(log_file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(["Timestamp", "EmployeeID", "EmployeeName", "CameraID", "Event", "Status"])
 
-    def _enhance_frame_for_cctv(self, frame):
-        lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-        enhanced_lab = cv2.merge([l, a, b])
-        enhanced_frame = cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2BGR)
-        enhanced_frame = cv2.GaussianBlur(enhanced_frame, (3, 3), 0.5)
-        return enhanced_frame
+    def _detect_faces(self, app, preprocessor: FramePreprocessor, aligner: FaceAligner, frame,
+                      camera_id: int, frame_seq: int, current_time: float) -> DetectionBatch:
+        """Detect on the camera's preprocessed input, embed crops aligned from the full-resolution frame."""
+        bboxes, kpss = app.det_model.detect(preprocessor.process(frame), max_num=0, metric='default')
+        if kpss is None or not len(bboxes):
+            return DetectionBatch(camera_id, frame_seq, current_time)
+        boxes, keypoints = preprocessor.to_frame(bboxes[:, :4], kpss)
+        embeddings = app.models['recognition'].get_feat(list(aligner.align(frame, keypoints)))
+        return DetectionBatch.from_arrays(camera_id, frame_seq, current_time, boxes, bboxes[:, 4],
+                                          keypoints, embeddings)
 
     def _adaptive_detection_interval(self, camera_id: int, num_faces: int):
         if num_faces == 0:
@@ -816,48 +752,31 @@ class FaceTrackingSystem:
             self.detection_interval[camera_id] = 3
 
     def _face_detection_thread(self, camera_id: int, gpu_id: int):
+        preprocessor = self.preprocessors[camera_id] = FramePreprocessor(DET_SIZE)
+        aligner = FaceAligner(self.apps[gpu_id].models['recognition'].input_size[0])
         while not self.shutdown_flag.is_set():
             try:
                 current_time = time.time()
-                if current_time - self.last_faces_reload > 300:
-                    if self._reload_known_faces_and_metadata():
-                        self.last_faces_reload = current_time
                 with self.frame_locks[camera_id]:
-                    if self.latest_frames[camera_id] is None:
-                        time.sleep(0.02)
-                        continue
-                    frame_copy = self.latest_frames[camera_id].copy()
-                self.frame_skip_counter[camera_id] += 1
-                if self.frame_skip_counter[camera_id] < self.detection_interval[camera_id]:
+                    # Detect on every detection_interval-th captured frame
+                    frame_seq = self.frame_seq[camera_id]
+                    due = (self.latest_frames[camera_id] is not None and
+                           frame_seq - self.latest_detections[camera_id].frame_seq >= self.detection_interval[camera_id])
+                    if due:
+                        # Published frames are replaced, never written to, so no copy is needed
+                        frame = self.latest_frames[camera_id]
+                if not due:
                     time.sleep(0.01)
                     continue
-                self.frame_skip_counter[camera_id] = 0
-                enhanced_frame = self._enhance_frame_for_cctv(frame_copy)
-                height, width = enhanced_frame.shape[:2]
-                scale_factor = 1.0
-                if width > 960:
-                    scale_factor = 960 / width
-                    new_width = int(width * scale_factor)
-                    new_height = int(height * scale_factor)
-                    enhanced_frame = cv2.resize(enhanced_frame, (new_width, new_height))
-                faces = self.apps[gpu_id].get(enhanced_frame)
-                if scale_factor != 1.0:
-                    for face in faces:
-                        face.bbox = face.bbox / scale_factor
+                detections = self._detect_faces(self.apps[gpu_id], preprocessor, aligner, frame,
+                                                camera_id, frame_seq, current_time)
+                # Scored once per detection (on the raw frame) rather than on every displayed frame
+                detections.quality, _ = self.quality_scorer.score(frame, detections)
                 with self.frame_locks[camera_id]:
-                    self.latest_faces[camera_id] = faces
-                    
-                    # Update latest_faces for Django
-                    latest_faces[camera_id] = [
-                        {
-                            "identity": face.get('identity', 'unknown'),
-                            "bbox": face.bbox.tolist(),
-                            "confidence": face.det_score
-                        }
-                        for face in faces
-                    ]
-                    
-                self._adaptive_detection_interval(camera_id, len(faces))
+                    self.latest_detections[camera_id] = detections
+                # API clients get the JSON form lazily from the same batch
+                latest_faces[camera_id] = detections
+                self._adaptive_detection_interval(camera_id, len(detections))
             except Exception as e:
                 if not self.shutdown_flag.is_set():
                     log_message(f"[ERROR] Face detection thread {camera_id}: {e}")
@@ -873,7 +792,7 @@ class FaceTrackingSystem:
         Returns:
             List of detected faces with bounding boxes and landmarks
         """
-        if frame is None:
+        if frame is None or self.face_app is None:
             return []
             
         try:
@@ -894,7 +813,7 @@ class FaceTrackingSystem:
             if emb_hash in self.embedding_cache:
                 return self.embedding_cache[emb_hash]
         with self.faiss_index_lock:
-            if self.index is None or not hasattr(self.index, 'ntotal') or self.index.ntotal == 0 or len(self.labels) == 0:
+            if len(self.gallery) == 0:
                 return "unknown", 0.0
             emb_norm = np.linalg.norm(embedding)
             if emb_norm > 0:
@@ -902,15 +821,11 @@ class FaceTrackingSystem:
             else:
                 return "unknown", 0.0
             try:
-                k = min(3, len(self.labels))
-                D, I = self.index.search(embedding.reshape(1, -1), k)
-                if len(D[0]) > 0 and len(I[0]) > 0:
-                    best_scores = D[0]
-                    best_indices = I[0]
+                neighbours = self.gallery.search(embedding, 3)
+                if neighbours:
                     weighted_scores = {}
-                    for score, idx in zip(best_scores, best_indices):
-                        if score > THRESHOLD and idx < len(self.labels):
-                            identity = self.labels[idx]
+                    for identity, score in neighbours:
+                        if score > THRESHOLD:
                             if identity in weighted_scores:
                                 weighted_scores[identity] = max(weighted_scores[identity], score)
                             else:
@@ -930,71 +845,29 @@ class FaceTrackingSystem:
                 self.embedding_cache[emb_hash] = result
         return result
 
-    def _temporal_smoothing(self, identity: str, score: float, camera_id: int) -> Tuple[str, float]:
-        current_time = time.time()
-        track_key = f"{camera_id}_{identity}"
-        if track_key not in self.track_identities:
-            self.track_identities[camera_id][track_key] = {
-                'votes': deque(maxlen=5),
-                'last_update': current_time}
-        track_data = self.track_identities[camera_id][track_key]
-        if current_time - track_data['last_update'] > 2.0:
-            track_data['votes'].clear()
-        track_data['votes'].append((identity, score))
-        track_data['last_update'] = current_time
-        if len(track_data['votes']) >= 3:
-            identity_counts = {}
-            total_score = 0
-            for vote_identity, vote_score in track_data['votes']:
-                if vote_identity in identity_counts:
-                    identity_counts[vote_identity] = max(identity_counts[vote_identity], vote_score)
-                else:
-                    identity_counts[vote_identity] = vote_score
-                total_score += vote_score
-            if identity_counts:
-                best_identity = max(identity_counts.items(), key=lambda x: x[1])
-                avg_score = total_score / len(track_data['votes'])
-                return best_identity[0], min(best_identity[1], avg_score)
-        return identity, score
+    def _temporal_smoothing(self, votes: IdentityVotes, slot: int, identity: str, score: float,
+                            current_time: float, fresh: bool) -> Tuple[str, float]:
+        # Only new detections vote; frames in between reuse the track's standing
+        if fresh:
+            votes.vote(slot, identity, score, current_time)
+        return votes.smoothed(slot, identity, score)
 
-    def _quality_filter(self, face, frame_width: int, frame_height: int) -> Tuple[bool, FaceQualityMetrics]:
-        bbox = face.bbox.astype(int)
-        face_width = bbox[2] - bbox[0]
-        face_height = bbox[3] - bbox[1]
-        size_score = min(1.0, (face_width * face_height) / (100 * 100))
-        if face_width < 50 or face_height < 50:
-            size_score = 0.0
-        if face_width > frame_width * 0.8 or face_height > frame_height * 0.8:
-            size_score = 0.0
-        center_x = (bbox[0] + bbox[2]) / 2
-        center_y = (bbox[1] + bbox[3]) / 2
-        distance_from_center = np.sqrt((center_x - frame_width/2)**2 + (center_y - frame_height/2)**2)
-        max_distance = np.sqrt((frame_width/2)**2 + (frame_height/2)**2)
-        position_score = 1.0 - (distance_from_center / max_distance)
-        det_score = face.det_score if hasattr(face, 'det_score') else 0.5
-        brightness_score = self._compute_brightness_score(face, bbox)
-        sharpness_score = self._compute_sharpness_score(face, bbox)
-        angle_score = self._compute_face_angle_score(face)
-        overall_quality = (
-            0.3 * size_score +
-            0.2 * position_score +
-            0.2 * det_score +
-            0.1 * brightness_score +
-            0.1 * sharpness_score +
-            0.1 * angle_score)
-        quality_metrics = FaceQualityMetrics(
-            sharpness_score=sharpness_score,
-            brightness_score=brightness_score,
-            angle_score=angle_score,
-            size_score=size_score,
-            overall_quality=overall_quality)
-        is_valid = overall_quality >= ENHANCED_CONFIG['face_quality_threshold']
-        return is_valid, quality_metrics
+    def _matches_track(self, identity: str, embedding: np.ndarray) -> bool:
+        """Whether an embedding still resembles the latest one recorded for identity."""
+        state = self.identity_states.get(identity)
+        if state is None or state.track is None:
+            return False
+        latest = state.track.latest_embedding
+        if latest is None:
+            return False
+        norm = np.linalg.norm(embedding) * np.linalg.norm(latest)
+        return norm > 0 and float(embedding @ latest) / norm >= THRESHOLD
 
     def _adaptive_threshold(self, identity: str, base_score: float) -> float:
-        if identity in self.global_tracks:
-            track = self.global_tracks[identity]
-            recent_scores = list(track.embedding_history)[-10:] if hasattr(track, 'embedding_history') else []
+        state = self.identity_states.get(identity)
+        if state is not None and state.track is not None:
+            track = state.track
+            recent_scores = track.embedding_history[-10:]
             if len(recent_scores) >= 5:
                 avg_recent_score = np.mean([self._compute_embedding_similarity(emb)[1] for emb in recent_scores])
                 if avg_recent_score > 0.8:
@@ -1003,266 +876,94 @@ class FaceTrackingSystem:
                     return THRESHOLD * 1.1
         return THRESHOLD
 
-    def _compute_brightness_score(self, face, bbox) -> float:
-        try:
-            if hasattr(face, 'landmark_2d_106'):
-                landmarks = face.landmark_2d_106
-                if landmarks is not None and len(landmarks) > 0:
-                    avg_intensity = np.mean(landmarks) / 255.0
-                    return min(1.0, max(0.0, 1.0 - abs(avg_intensity - 0.5) * 2))
-            return 0.5
-        except:
-            return 0.5
-
-    def _compute_sharpness_score(self, face, bbox) -> float:
-        try:
-            if hasattr(face, 'embedding'):
-                embedding_var = np.var(face.embedding)
-                normalized_var = min(1.0, embedding_var / 0.1)
-                return normalized_var
-            return 0.5
-        except:
-            return 0.5
-
-    def _compute_face_angle_score(self, face) -> float:
-        try:
-            if hasattr(face, 'pose'):
-                yaw, pitch, roll = face.pose
-                angle_penalty = (abs(yaw) + abs(pitch) + abs(roll)) / 90.0
-                return max(0.0, 1.0 - angle_penalty)
-            return 0.8
-        except:
-            return 0.8
-
     def _embedding_update_worker(self):
-        pending_updates = []
-        while not self.shutdown_flag.is_set():
+        while True:
             try:
-                try:
-                    update = self.embedding_update_queue.get(timeout=1.0)
-                    if update is None:
-                        break
-                    pending_updates.append(update)
-                except queue.Empty:
-                    if pending_updates:
-                        self._process_pending_updates(pending_updates)
-                        pending_updates = []
-                    continue
-                if len(pending_updates) >= self.batch_update_threshold:
+                pending_updates = self.embedding_update_queue.drain(max_batch=64, timeout=1.0)
+                if pending_updates:
                     self._process_pending_updates(pending_updates)
-                    pending_updates = []
+                elif self.embedding_update_queue.closed:
+                    break
             except Exception as e:
                 log_message(f"[ERROR] Embedding update worker: {e}")
                 time.sleep(0.1)
-        if pending_updates:
-            self._process_pending_updates(pending_updates)
 
     def _process_pending_updates(self, pending_updates):
-        with self.embedding_update_lock:
-            new_embeddings = []
-            new_labels = []
-            for identity, embedding, timestamp in pending_updates:
-                success = self.db_manager.store_face_embedding(
-                    employee_id=identity,
-                    embedding=embedding,
-                    embedding_type='update',
-                    quality_score=0.0,
-                    source_image_path=None
-                )
-                if success:
-                    new_embeddings.append(embedding)
-                    new_labels.append(identity)
-                    self.db_manager.cleanup_old_embeddings(identity, max_embeddings=15)
-            if new_embeddings:
-                self.updates_since_last_rebuild += len(new_embeddings)
-                if self.updates_since_last_rebuild >= self.max_updates_before_rebuild:
-                    with self.faiss_index_lock:
-                        self.embeddings = np.vstack([self.embeddings] + new_embeddings)
-                        self.labels.extend(new_labels)
-                        faiss.normalize_L2(self.embeddings)
-                        self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
-                        self.index.add(self.embeddings)
-                    self.updates_since_last_rebuild = 0
-                    with self.embedding_cache_lock:
-                        self.embedding_cache.clear()
-                else:
-                    with self.faiss_index_lock:
-                        self.embeddings = np.vstack([self.embeddings] + new_embeddings)
-                        self.labels.extend(new_labels)
-                        faiss.normalize_L2(self.embeddings)
-                        for i, emb in enumerate(new_embeddings):
-                            self.index.add(emb.reshape(1, -1))
-
-    def _reload_known_faces_and_metadata(self):
-        try:
-            with self.faiss_index_lock:
-                old_employee_count = len(set(self.labels)) if self.labels else 0
-            embeddings_list, labels_list = self.db_manager.get_all_active_embeddings()
-            employees = self.db_manager.get_all_employees()
-            employee_metadata = {}
-            for employee in employees:
-                employee_metadata[employee.id] = {
-                    'employee_name': employee.employee_name,
-                    'department': employee.department,
-                    'designation': employee.designation,
-                    'email': employee.email,
-                    'phone': employee.phone}
-            with self.faiss_index_lock:
-                if embeddings_list:
-                    self.embeddings = np.array(embeddings_list).astype('float32')
-                    self.labels = labels_list
-                    faiss.normalize_L2(self.embeddings)
-                    self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
-                    self.index.add(self.embeddings)
-                else:
-                    self.embeddings = []
-                    self.labels = []
-                    self.index = None
-                new_employee_count = len(set(labels_list)) if labels_list else 0
-            with self.metadata_lock:
-                self.employee_metadata = employee_metadata         
-            with self.embedding_cache_lock:
-                self.embedding_cache.clear()
-            log_message(f"[RELOAD] Reloaded faces and metadata: {old_employee_count} -> {new_employee_count} employees")
-            self.last_faces_reload = time.time()
-        except Exception as e:
-            log_message(f"[ERROR] Failed to reload known faces and metadata: {e}")
+        """
+        Persist a batch of updates in one transaction. The rows reach the gallery through the
+        change log on the syncer's next poll, which replaces these employees' rows (keeping each
+        one's 3 newest updates) together with whatever else changed in between.
+        """
+        started = time.time()
+        stored = self.db_manager.store_face_embeddings(
+            [(identity, embedding) for identity, embedding, _ in pending_updates],
+            embedding_type='update', quality_score=0.0, keep_latest=EMBED_UPDATES_KEPT)
+        self.embedding_update_queue.record_batch(len(pending_updates), time.time() - started, ok=stored > 0)
 
     def _get_consistent_track_id(self, identity: str, camera_id: int) -> str:
         current_time = time.time()
         if identity == "unknown":
             return f"unknown_{camera_id}_{int(current_time)}"
-        with self.identity_tracks_lock:
-            if identity in self.identity_tracks:
-                self.identity_last_seen[identity] = current_time
-                self.identity_cameras[identity] = camera_id
-                return self.identity_tracks[identity]
-            track_id = identity
-            self.identity_tracks[identity] = track_id
-            self.identity_last_seen[identity] = current_time
-            self.identity_cameras[identity] = camera_id
-            self.identity_positions[identity] = {}
-            self.identity_trip_logged[identity] = set()
-            self.identity_crossing_state[identity] = {}
-            self.identity_zone_state[identity] = {}
-            return track_id
-
-    def _update_work_status(self, identity: str, camera_id: int, direction: str):
-        if identity not in self.global_tracks:
-            return
-        track = self.global_tracks[identity]
-        if camera_id == 0 and direction == "left->right":
-            track.work_status = "working"
-            self._log_event(identity, camera_id, "WorkAreaEntry", track.work_status)
-        elif camera_id == 1 and direction == "right->left":
-            track.work_status = "working"
-            self._log_event(identity, camera_id, "WorkAreaEntry", track.work_status)
-        elif camera_id == 0 and direction == "right->left":
-            track.work_status = "on_break"
-            self._log_event(identity, camera_id, "WorkAreaExit", track.work_status)
-        elif camera_id == 1 and direction == "left->right":
-            track.work_status = "on_break"
-            self._log_event(identity, camera_id, "WorkAreaExit", track.work_status)
-        elif camera_id == 0 and direction == "top->bottom":
-            track.work_status = "working"
-            self._log_event(identity, camera_id, "WorkAreaEntry", track.work_status)
-        elif camera_id == 1 and direction == "bottom->top":
-            track.work_status = "working"
-            self._log_event(identity, camera_id, "WorkAreaEntry", track.work_status)
-        elif camera_id == 0 and direction == "bottom->top":
-            track.work_status = "on_break"
-            self._log_event(identity, camera_id, "WorkAreaExit", track.work_status)
-        elif camera_id == 1 and direction == "top->bottom":
-            track.work_status = "on_break"
-            self._log_event(identity, camera_id, "WorkAreaExit", track.work_status)
+        return self.identity_states.touch(identity, camera_id, current_time).track_id
 
-    def _log_event(self, identity: str, camera_id: int, event: str):
+    def _log_event(self, identity: str, camera_id: int, event: str, tripwire: str = None):
+        """Decide the event on the camera thread; everything slow happens in bus consumers"""
         event_type = "check_in" if event in ["entry", "WorkAreaEntry"] else "check_out"
-        if event_type == "check_out":
-            if not self._check_employee_work_status(identity):
-                log_message(f"[EVENT BLOCKED] {identity} not currently working - exit not logged")
-                return
-        employee_name = self.get_employee_name(identity)
-        self.api_logger.log_attendance_async(identity, event_type)
+        now = datetime.now()
+        if not self.work_status.try_record(identity, event_type, now, self.db_manager):
+            log_message(f"[EVENT BLOCKED] {identity} not currently working - exit not logged",
+                        camera_id=camera_id, employee_id=identity)
+            return
+        self.attendance_bus.publish(AttendanceEvent(
+            employee_id=identity,
+            employee_name=self.employee_metadata.get_name(identity),
+            camera_id=camera_id,
+            event_type=event_type,
+            timestamp=now,
+            tripwire=tripwire))
+    def _start_attendance_bus(self):
+        self.attendance_bus = AttendanceEventBus()
+        self.attendance_writer = AttendanceWriter()
+        # Group commit: one transaction per 500 events or 50 ms, whichever comes first
+        self.attendance_bus.subscribe(
+            "database", self.attendance_writer.write_batch, max_queue=10000, max_batch=500, max_wait=0.05)
+        self.csv_backup = None
         if self.enable_csv_backup:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self._write_csv_backup(
-                timestamp,
-                identity,
-                employee_name,
-                camera_id,
-                event_type,
-                "logged")
-        log_message(f"[EVENT] Camera {camera_id}: {identity} - {event_type}")
-    def _write_csv_backup(self, timestamp, identity, employee_name, camera_id, event, status):
-        try:
-            with open(log_file_path, 'a', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([timestamp, identity, employee_name, camera_id, event, status])
-        except Exception as e:
-            log_message(f"[WARNING] CSV backup failed: {e}")
-    def _check_tripwire_crossing(self, identity: str, center_x: int, center_y: int, camera_config: CameraConfig, frame_width: int, frame_height: int):
-        current_time = time.time()
-        camera_key = f"{camera_config.camera_id}"
-        if identity not in self.identity_crossing_state:
-            self.identity_crossing_state[identity] = {}
-        if camera_key not in self.identity_crossing_state[identity]:
-            self.identity_crossing_state[identity][camera_key] = {}
-        for tripwire in camera_config.tripwires:
-            tripwire_key = f"{tripwire.name}"
-            if tripwire_key not in self.identity_crossing_state[identity][camera_key]:
-                self.identity_crossing_state[identity][camera_key][tripwire_key] = {
-                    'state': 'none',
-                    'last_position': center_x if tripwire.direction == 'vertical' else center_y,
-                    'direction': None}
-            state_info = self.identity_crossing_state[identity][camera_key][tripwire_key]
-            if tripwire.direction == 'vertical':
-                tripwire1_pos = int(frame_width * (tripwire.position - tripwire.spacing/2))
-                tripwire2_pos = int(frame_width * (tripwire.position + tripwire.spacing/2))
-                current_pos = center_x
-                if state_info['state'] == 'none':
-                    if current_pos < tripwire1_pos:
-                        state_info['state'] = 'left_zone'
-                        state_info['direction'] = 'left->right'
-                    elif current_pos > tripwire2_pos:
-                        state_info['state'] = 'right_zone'
-                        state_info['direction'] = 'right->left'
-                elif state_info['state'] == 'left_zone' and state_info['direction'] == 'left->right':
-                    if current_pos > tripwire2_pos:
-                        self._log_event(identity, camera_config.camera_id, camera_config.camera_type)
-                        state_info['state'] = 'none'
-                        state_info['direction'] = None
-                elif state_info['state'] == 'right_zone' and state_info['direction'] == 'right->left':
-                    if current_pos < tripwire1_pos:
-                        self._log_event(identity, camera_config.camera_id, camera_config.camera_type)
-                        state_info['state'] = 'none'
-                        state_info['direction'] = None
-            else:
-                tripwire1_pos = int(frame_height * (tripwire.position - tripwire.spacing/2))
-                tripwire2_pos = int(frame_height * (tripwire.position + tripwire.spacing/2))
-                current_pos = center_y
-                if state_info['state'] == 'none':
-                    if current_pos < tripwire1_pos:
-                        state_info['state'] = 'top_zone'
-                        state_info['direction'] = 'top->bottom'
-                    elif current_pos > tripwire2_pos:
-                        state_info['state'] = 'bottom_zone'
-                        state_info['direction'] = 'bottom->top'
-                elif state_info['state'] == 'top_zone' and state_info['direction'] == 'top->bottom':
-                    if current_pos > tripwire2_pos:
-                        self._log_event(identity, camera_config.camera_id, camera_config.camera_type)
-                        state_info['state'] = 'none'
-                        state_info['direction'] = None
-                elif state_info['state'] == 'bottom_zone' and state_info['direction'] == 'bottom->top':
-                    if current_pos < tripwire1_pos:
-                        self._log_event(identity, camera_config.camera_id, camera_config.camera_type)
-                        state_info['state'] = 'none'
-                        state_info['direction'] = None
-            state_info['last_position'] = current_pos
+            self.csv_backup = CsvBackupAppender(log_file_path, compress=CSV_BACKUP_COMPRESS)
+            self.attendance_bus.subscribe("csv", self.csv_backup.append, max_queue=10000, max_batch=500)
+        self.attendance_bus.subscribe("api", self._sync_attendance, max_queue=1000)
+        self.attendance_bus.subscribe("websocket", self._broadcast_attendance, max_queue=1000)
+        self.attendance_bus.subscribe("recent", self._remember_attendance, max_queue=1000)
+    def _sync_attendance(self, events):
+        for event in events:
+            self.api_logger.log_attendance_async(event.employee_id, event.event_type)
+    def _broadcast_attendance(self, events):
+        for event in events:
+            event_hub.publish("attendance", event.to_dict())
+    def _remember_attendance(self, events):
+        for event in events:
+            latest_attendance.append(event.to_dict())
+            log_message(f"[EVENT] Camera {event.camera_id}: {event.employee_id} - {event.event_type}",
+                        camera_id=event.camera_id, employee_id=event.employee_id)
+    def _store_predictions(self, identities: List[str], positions):
+        for identity, (predicted_x, predicted_y) in zip(identities, positions):
+            identity_state = self.identity_states.get(identity)
+            if identity_state is not None and identity_state.tracking is not None:
+                identity_state.tracking.predicted_position = (int(predicted_x), int(predicted_y))
     def draw_tripwires(self, frame, camera_config: CameraConfig):
         frame_height, frame_width = frame.shape[:2]
         for tripwire in camera_config.tripwires:
-            if tripwire.direction == 'vertical':
+            if tripwire.is_polygon:
+                points = np.array([(int(x * frame_width), int(y * frame_height)) for x, y in tripwire.points], np.int32)
+                cv2.polylines(frame, [points], True, (0, 255, 255), 2)
+                cv2.putText(frame, tripwire.name, (int(points[0][0]) + 10, int(points[0][1]) + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+            elif tripwire.points:
+                a, b, normal, half = segment_band(tripwire, frame_width, frame_height)
+                for offset, color in ((-half, (0, 255, 255)), (half, (255, 0, 255))):
+                    start, end = (a + offset * normal).astype(int), (b + offset * normal).astype(int)
+                    cv2.line(frame, (int(start[0]), int(start[1])), (int(end[0]), int(end[1])), color, 2)
+                cv2.putText(frame, tripwire.name, (int(a[0]) + 10, int(a[1]) + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+            elif tripwire.direction == 'vertical':
                 tripwire1_x = int(frame_width * (tripwire.position - tripwire.spacing/2))
                 tripwire2_x = int(frame_width * (tripwire.position + tripwire.spacing/2))
                 cv2.line(frame, (tripwire1_x, 0), (tripwire1_x, frame_height), (0, 255, 255), 2)
@@ -1274,21 +975,43 @@ class FaceTrackingSystem:
                 cv2.line(frame, (0, tripwire1_y), (frame_width, tripwire1_y), (0, 255, 255), 2)
                 cv2.line(frame, (0, tripwire2_y), (frame_width, tripwire2_y), (255, 0, 255), 2)
                 cv2.putText(frame, tripwire.name, (10, tripwire1_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+    def render_overlay(self, frame, annotations: Optional[FrameAnnotations], camera_config: CameraConfig):
+        """Draw recognition annotations and tripwires onto a frame owned by the caller"""
+        for face in (annotations.faces if annotations else []):
+            x1, y1, x2, y2 = face.bbox
+            color = (0, 255, 0) if face.identity != "unknown" else (0, 0, 255)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, f"Q:{face.quality:.2f}", (x1, y1 - 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+            metadata = self.employee_metadata.get(face.identity) if face.identity != "unknown" else None
+            if metadata:
+                label = f"{metadata['employee_name']} ({face.score:.2f})"
+            else:
+                label = f"{face.display_id} ({face.score:.2f})"
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        self.draw_tripwires(frame, camera_config)
     def process_camera(self, camera_config: CameraConfig):
-        cap = cv2.VideoCapture(camera_config.camera_id)
-        if not cap.isOpened():
-            log_message(f"[ERROR] Cannot open camera {camera_config.camera_id}")
-            return
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        cap.set(cv2.CAP_PROP_FPS, camera_config.fps)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_config.resolution[0])
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_config.resolution[1])
+        # Connected during startup; retried here if that failed
+        cap = self.captures.pop(camera_config.camera_id, None)
+        if cap is None:
+            try:
+                cap = self._open_camera(camera_config)
+            except RuntimeError as e:
+                log_message(f"[ERROR] {e}", camera_id=camera_config.camera_id)
+                return
         detection_thread = threading.Thread(
             target=self._face_detection_thread,
             args=(camera_config.camera_id, camera_config.gpu_id),
             daemon=True)
         detection_thread.start()
         self.face_detection_threads[camera_config.camera_id] = detection_thread
+        # One batched filter per camera, owned by this thread
+        kalman = BatchKalmanFilter(
+            process_noise=ENHANCED_CONFIG.get('kalman_process_noise', 0.1),
+            measurement_noise=ENHANCED_CONFIG.get('kalman_measurement_noise', 0.1))
+        tripwire_engine = TripwireEngine(camera_config.tripwires)
+        identity_votes = self.identity_votes[camera_config.camera_id] = IdentityVotes()
+        last_detected_seq = 0
         prev_time = 0
         frame_count = 0
         while not self.shutdown_flag.is_set():
@@ -1305,86 +1028,120 @@ class FaceTrackingSystem:
             frame_count += 1
             frame_height, frame_width = frame.shape[:2]
             with self.frame_locks[camera_config.camera_id]:
-                self.latest_frames[camera_config.camera_id] = frame.copy()
-                faces = self.latest_faces[camera_config.camera_id][:]
+                # Raw frames are published unannotated; overlays are drawn by the stream broadcaster
+                self.frame_seq[camera_config.camera_id] += 1
+                frame_seq = self.frame_seq[camera_config.camera_id]
+                self.latest_frames[camera_config.camera_id] = frame
+                detections = self.latest_detections[camera_config.camera_id]
             face_centers = {}
-            valid_faces = []
-            for face in faces:
-                is_valid, quality_metrics = self._quality_filter(face, frame_width, frame_height)
-                if not is_valid:
-                    continue  # Skip low-quality faces
-                valid_faces.append(face)
-            for i, face in enumerate(valid_faces):
-                bbox = face.bbox.astype(int)
-                embedding = face.embedding.astype('float32')
-                identity, score = self._compute_embedding_similarity(embedding)
+            annotations = []
+            # Skip low-quality faces
+            valid = np.flatnonzero(detections.quality[:, OVERALL] >= self.quality_scorer.threshold)
+            fresh = detections.frame_seq != last_detected_seq
+            face_slots = identity_votes.assign(detections.boxes[valid], current_time)
+            for index, slot in zip(valid, face_slots):
+                bbox = detections.boxes[index].astype(int)
+                face_quality = detections.quality[index]
+                embedding = detections.embedding(index)
+                # A track with a recent, one-sided vote keeps its identity without a gallery search
+                reused = identity_votes.confident(slot, current_time)
+                if embedding is None:
+                    identity, score = "unknown", 0.0
+                elif reused is not None and self._matches_track(reused[0], embedding):
+                    identity, score = reused
+                    identity_votes.searches_skipped += 1
+                else:
+                    identity, score = self._compute_embedding_similarity(embedding)
+                    if identity != "unknown":
+                        if score >= self._adaptive_threshold(identity, score):
+                            identity, score = self._temporal_smoothing(
+                                identity_votes, slot, identity, score, current_time, fresh)
+                        else:
+                            identity = "unknown"
                 if identity != "unknown":
-                    adaptive_thresh = self._adaptive_threshold(identity, score)
-                    if score >= adaptive_thresh:
-                        identity, score = self._temporal_smoothing(identity, score, camera_config.camera_id)
-                        center_x = int((bbox[0] + bbox[2]) / 2)
-                        center_y = int((bbox[1] + bbox[3]) / 2)
-                        if identity not in self.kalman_trackers:
-                            self.kalman_trackers[identity] = KalmanTracker()
-                        smoothed_position = self.kalman_trackers[identity].update(center_x, center_y)
-                        face_centers[identity] = smoothed_position
-                        with self.global_tracks_lock:
-                            if identity not in self.global_tracks:
-                                self.global_tracks[identity] = GlobalTrack(
-                                    employee_id=identity,
-                                    last_seen_time=current_time,
-                                    last_camera_id=camera_config.camera_id,
-                                    embedding_history=deque(maxlen=EMBEDDING_HISTORY_SIZE),
-                                    work_status="working")
-                            track = self.global_tracks[identity]
-                            track.last_seen_time = current_time
-                            track.last_camera_id = camera_config.camera_id
-                            track.confidence_score = score
-                            track.embedding_history.append(embedding)
-                            state = self.tracking_states.get(identity, TrackingState(
-                                position_history=[], velocity=(0, 0),
-                                predicted_position=(0, 0), confidence_history=[], quality_history=[]))
-                            state.position_history.append((center_x, center_y))
-                            state.confidence_history.append(score)
-                            state.quality_history.append(quality_metrics)
-                            if len(state.position_history) >= 2:
-                                dx = state.position_history[-1][0] - state.position_history[-2][0]
-                                dy = state.position_history[-1][1] - state.position_history[-2][1]
-                                state.velocity = (dx, dy)
-                            self.tracking_states[identity] = state
-                            self._check_tripwire_crossing(identity, center_x, center_y, camera_config, frame_width, frame_height)
-                        if score > 0.8:
-                            self._update_embeddings(identity, embedding)
-                    else:
-                        identity = "unknown"
+                    center_x = int((bbox[0] + bbox[2]) / 2)
+                    center_y = int((bbox[1] + bbox[3]) / 2)
+                    identity_state = self.identity_states.touch(identity, camera_config.camera_id, current_time)
+                    face_centers[identity] = (center_x, center_y)
+                    with self.global_tracks_lock:
+                        if identity_state.track is None:
+                            identity_state.track = GlobalTrack(
+                                employee_id=identity,
+                                last_seen_time=current_time,
+                                last_camera_id=camera_config.camera_id,
+                                history_size=EMBEDDING_HISTORY_SIZE)
+                        track = identity_state.track
+                        track.last_seen_time = current_time
+                        track.last_camera_id = camera_config.camera_id
+                        track.confidence_score = score
+                        track.add_embedding(embedding)
+                        if identity_state.tracking is None:
+                            identity_state.tracking = TrackHistory(STATE_HISTORY_SIZE)
+                        identity_state.tracking.push(center_x, center_y, score, face_quality)
+                    if score > 0.8:
+                        self._update_embeddings(identity, embedding)
                 consistent_track_id = self._get_consistent_track_id(identity, camera_config.camera_id)
-                color = (0, 255, 0) if identity != "unknown" else (0, 0, 255)
-                cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
-                quality_text = f"Q:{quality_metrics.overall_quality:.2f}"
-                cv2.putText(frame, quality_text, (bbox[0], bbox[1] - 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-                metadata = load_employee_metadata(identity) if identity != "unknown" else None
-                if metadata:
-                    if isinstance(metadata, dict):
-                        employee_name = metadata.get('employee_name', identity)
-                    else:
-                        employee_name = metadata.employee_name
-                    label = f"{employee_name} ({score:.2f})"
-                else:
-                    label = f"{consistent_track_id} ({score:.2f})"
-                cv2.putText(frame, label, (bbox[0], bbox[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-            self.draw_tripwires(frame, camera_config)
+                annotations.append(FaceAnnotation(
+                    bbox=(int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3])),
+                    identity=identity,
+                    display_id=consistent_track_id,
+                    score=float(score),
+                    quality=float(face_quality[OVERALL])))
+            crossings = []
+            measured = []
+            if fresh:
+                # Fresh detections: predict/correct and test tripwires for every recognised track in one step
+                last_detected_seq = detections.frame_seq
+                measured = list(face_centers)
+                centers = list(face_centers.values())
+                self._store_predictions(measured, kalman.update(measured, centers, current_time))
+                crossings += tripwire_engine.update(measured, centers, frame_width, frame_height, current_time)
+            # Tracks without a detection this frame coast along their predicted path; crossings on it
+            # stay pending until a detection past the tripwire confirms them, or until the pending
+            # window ends, confirming them if the track was not seen again and cancelling them if it was
+            coasting, coasted = kalman.coast(TRIPWIRE_COAST_FRAMES, skip=measured)
+            self._store_predictions(coasting, coasted)
+            crossings += tripwire_engine.update(
+                coasting, coasted, frame_width, frame_height, current_time, predicted=True)
+            crossings += tripwire_engine.expire_pending(current_time - TRIPWIRE_PENDING_SECONDS)
+            for crossing in crossings:
+                self._log_event(crossing.key, camera_config.camera_id, camera_config.camera_type,
+                                camera_config.tripwires[crossing.tripwire].name)
+            kalman.evict_stale(current_time - KALMAN_TRACK_TIMEOUT)
+            tripwire_engine.evict_stale(current_time - GLOBAL_TRACK_TIMEOUT)
+            identity_votes.evict_stale(current_time - IDENTITY_VOTE_TIMEOUT)
+            with self.frame_locks[camera_config.camera_id]:
+                self.latest_annotations[camera_config.camera_id] = FrameAnnotations(
+                    camera_id=camera_config.camera_id,
+                    frame_seq=frame_seq,
+                    timestamp=current_time,
+                    faces=annotations)
+            if event_hub.faces_due(camera_config.camera_id):
+                event_hub.publish("faces", {
+                    "camera_id": camera_config.camera_id,
+                    "frame_seq": frame_seq,
+                    "faces": [{"identity": a.identity, "bbox": a.bbox, "score": a.score, "quality": a.quality}
+                              for a in annotations]},
+                    coalesce_key=camera_config.camera_id)
         cap.release()
     def start_multi_camera_tracking(self):
         try:
+            if not self.startup.wait():
+                status = self.startup.status()["components"]
+                log_message("[STARTUP] Not ready: " + ", ".join(
+                    f"{name} ({component['error']})" for name, component in status.items()
+                    if component["state"] != "ready"))
             for camera_config in CAMERAS:
+                if not self.startup.is_ready(f"models:gpu{camera_config.gpu_id}"):
+                    log_message(f"[ERROR] No model for GPU {camera_config.gpu_id}, camera {camera_config.camera_id} not started",
+                                camera_id=camera_config.camera_id)
+                    continue
                 thread = threading.Thread(
                     target=self.process_camera,
                     args=(camera_config,),
                     daemon=True)
                 thread.start()
                 self.camera_threads.append(thread)
-                time.sleep(1)
             while not self.shutdown_flag.is_set():
                 time.sleep(1)
         except KeyboardInterrupt:
@@ -1395,9 +1152,17 @@ class FaceTrackingSystem:
                     thread.join(timeout=2)
     def shutdown(self):
         if self.embedding_update_worker and self.embedding_update_worker.is_alive():
-            self.embedding_update_queue.put(None)
+            self.embedding_update_queue.close()
             self.embedding_update_worker.join(timeout=5)
         self.shutdown_flag.set()
+        try:
+            # Saved now, the next start replays nothing
+            self.gallery_syncer.checkpoint(force=True)
+        except Exception as e:
+            log_message(f"[ERROR] Could not save the gallery snapshot: {e}")
+        self.attendance_bus.shutdown()
+        if self.csv_backup:
+            self.csv_backup.close()
         self.api_logger.shutdown()
         for thread in self.camera_threads:
             if thread.is_alive():
@@ -1408,23 +1173,30 @@ class FaceTrackingSystem:
     def is_active(self):
         return not self.shutdown_flag.is_set() and len(self.camera_threads) > 0
     def get_latest_frame(self, camera_id: int):
-        """Get the latest frame from the specified camera"""
+        """Get the latest raw (unannotated) frame from the specified camera"""
         with self.frame_locks.get(camera_id, threading.Lock()):
             if camera_id in self.latest_frames:
                 return self.latest_frames[camera_id]
             return None
+    def get_latest_annotations(self, camera_id: int) -> Optional[FrameAnnotations]:
+        """Get the structured recognition results of the latest processed frame"""
+        with self.frame_locks.get(camera_id, threading.Lock()):
+            return self.latest_annotations.get(camera_id)
+    def get_stream_source(self, camera_id: int):
+        """Return (frame_seq, raw_frame, annotations) for the stream broadcaster"""
+        with self.frame_locks.get(camera_id, threading.Lock()):
+            return (self.frame_seq.get(camera_id, 0),
+                    self.latest_frames.get(camera_id),
+                    self.latest_annotations.get(camera_id))
 class FaceTrackingPipeline:
     def __init__(self):
-        # self.system = FaceTrackingSystem(self.face_app)
-        # self.pipeline_thread = None
-        # self.logger = get_logger(__name__)
-        # Initialize InsightFace
-        self.face_app = FaceAnalysis(name='antelopev2')
-        self.face_app.prepare(ctx_id=0, det_size=(640, 640))
-        self.system = FaceTrackingSystem(self.face_app)
+        # Models load in the system's startup graph; face_app is GPU 0's shared session once ready
+        self.system = FaceTrackingSystem()
         self.pipeline_thread = None
         self.logger = get_logger(__name__)
-        self.face_app = self.system.face_app
+    @property
+    def face_app(self):
+        return self.system.face_app
     def start(self):
         """Start the face tracking pipeline"""
         if self.pipeline_thread is None or not self.pipeline_thread.is_alive():
@@ -1454,15 +1226,25 @@ class FaceTrackingPipeline:
         return self.system.get_attendance_history(limit=limit)
     def get_active_employees(self):
         """Get currently active employees (in the building)"""
-        active = []
-        for emp in self.get_all_employees():
-            if self.system._check_employee_work_status(emp.id):
-                active.append(emp)
-        return active
+        working = set(self.system.work_status.working_employees())
+        return [emp for emp in self.get_all_employees() if emp.id in working]
     def get_last_seen_location(self, employee_id):
         """Get last seen location for an employee"""
         record = self.system.db_manager.get_latest_attendance_by_employee(employee_id)
         return record.camera_id if record else None
+def get_shared_pipeline() -> FaceTrackingPipeline:
+    """The process's FaceTrackingPipeline, created on first use and shared by routers and background tasks"""
+    global _shared_pipeline, system_instance
+    with _shared_pipeline_lock:
+        if _shared_pipeline is None:
+            _shared_pipeline = FaceTrackingPipeline()
+            system_instance = _shared_pipeline.system
+        return _shared_pipeline
+def get_startup_status():
+    """Readiness of the tracking system's startup stages"""
+    if not system_instance:
+        return {"ready": False, "elapsed_seconds": None, "components": {}}
+    return system_instance.startup.status()
 def start_tracking_service():
     """Start the face tracking system as a service"""
     global system_instance, is_tracking_running, start_time
@@ -1470,9 +1252,7 @@ def start_tracking_service():
         log_message("Tracking service is already running")
         return
     log_message("Starting tracking service...")
-    face_app = FaceAnalysis(name='antelopev2')
-    face_app.prepare(ctx_id=0, det_size=(640, 640))
-    system_instance = FaceTrackingSystem(face_app)
+    system_instance = get_shared_pipeline().system
     tracking_thread = threading.Thread(
         target=system_instance.start_multi_camera_tracking, 
         daemon=True)
@@ -1498,21 +1278,47 @@ def get_system_status():
     return system_stats
 def get_live_faces():
     """Get latest detected faces"""
-    return latest_faces
+    return {camera_id: detections.to_json() for camera_id, detections in list(latest_faces.items())}
 def get_attendance_data():
     """Get latest attendance records"""
     return list(latest_attendance)
-def get_logs(n=100):
-    """Get recent logs from buffer"""
-    return log_buffer[-n:]
+def get_pipeline_metrics():
+    """Get queue, lag and drop metrics of the internal event pipelines"""
+    metrics = {
+        "event_hub": event_hub.get_stats(),
+        "employee_metadata": employee_metadata_store.get_stats(),
+        "model_registry": model_registry.get_metrics()}
+    if system_instance:
+        metrics["attendance_bus"] = system_instance.attendance_bus.get_metrics()
+        metrics["attendance_writer"] = system_instance.attendance_writer.get_metrics()
+        metrics["identity_state"] = system_instance.identity_states.get_metrics()
+        metrics["identity_votes"] = {camera_id: votes.get_metrics()
+                                     for camera_id, votes in system_instance.identity_votes.items()}
+        metrics["preprocessing"] = {camera_id: preprocessor.get_metrics()
+                                    for camera_id, preprocessor in system_instance.preprocessors.items()}
+        metrics["gallery"] = system_instance.gallery.get_metrics()
+        metrics["gallery_snapshot"] = system_instance.gallery_snapshot.get_metrics()
+        metrics["gallery_syncer"] = system_instance.gallery_syncer.get_metrics()
+        metrics["embedding_updates"] = system_instance.embedding_update_queue.get_metrics()
+        if system_instance.csv_backup:
+            metrics["csv_backup"] = system_instance.csv_backup.get_metrics()
+    return metrics
+def get_logs(n=100, offset=0, level=None, component=None, camera_id=None, employee_id=None, after_seq=None):
+    """Get a filtered page of recent structured log records, oldest first"""
+    entries = log_store.query(
+        n=n, offset=offset, level=level, component=component,
+        camera_id=camera_id, employee_id=employee_id, after_seq=after_seq)
+    return [entry.to_dict() for entry in entries]
+def get_stream_broadcaster(camera_id: int) -> Optional[StreamBroadcaster]:
+    """Get the overlay broadcaster of a camera, if tracking is running"""
+    if not system_instance:
+        return None
+    return system_instance.stream_broadcasters.get(camera_id)
 def generate_mjpeg(camera_id: int):
     """Yield MJPEG stream for FastAPI."""
-    while is_tracking_running:
-        if system_instance:
-            frame = system_instance.get_latest_frame(camera_id)
-            if frame is not None:
-                ret, jpeg = cv2.imencode('.jpg', frame)
-                if ret:
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-        time.sleep(0.05)
\ No newline at end of file
+    broadcaster = get_stream_broadcaster(camera_id)
+    if broadcaster is None:
+        return
+    for jpeg in broadcaster.stream(keep_running=lambda: is_tracking_running):
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
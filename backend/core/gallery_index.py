@@ -0,0 +1,145 @@
+"""
+Recognition gallery: a FAISS inner-product index over the active embeddings.
+Vectors are added under their face_embeddings row ids (IndexIDMap2) and every
+employee's row ids are kept in a map, so replacing an employee's rows only
+touches the rows that changed: new rows are added, and rows that are no
+longer active become tombstones that searches skip through an IDSelector.
+faiss's remove_ids compacts the whole flat index whatever it removes, so
+tombstones are only removed, all in one call, once they make up
+compact_fraction of the index; that keeps removal O(rows changed) amortized.
+Search results map back to employees through the row ids rather than
+through positions, which compaction shifts.
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from utils.lazy_import import lazy_module
+
+faiss = lazy_module('faiss')
+
+
+def group_rows(ids: np.ndarray, labels: List[str]) -> Dict[str, np.ndarray]:
+    """Row ids of each employee"""
+    rows: Dict[str, List[int]] = {}
+    for row, label in zip(ids.tolist(), labels):
+        rows.setdefault(label, []).append(row)
+    return {label: np.array(employee_rows, dtype=np.int64) for label, employee_rows in rows.items()}
+
+
+class GalleryIndex:
+    """
+    Id-mapped FAISS gallery. Not thread-safe: the owner serializes access.
+    Embeddings passed in must already be L2-normalized float32.
+    Args:
+        compact_fraction: Share of the index that tombstoned rows may take up before they are removed
+    """
+    def __init__(self, compact_fraction: float = 0.1):
+        self.compact_fraction = compact_fraction
+        self.index = None
+        self.row_labels: Dict[int, str] = {}
+        self.employee_rows: Dict[str, np.ndarray] = {}
+        # Row ids still in the index but no longer active, and the search parameters that skip them
+        self.dead: Set[int] = set()
+        self._search_params = None
+        self._selectors = ()
+        self.rows_removed = 0
+        self.rows_added = 0
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return len(self.row_labels)
+
+    @property
+    def employee_count(self) -> int:
+        return len(self.employee_rows)
+
+    def _add(self, ids: np.ndarray, embeddings: np.ndarray):
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+        self.index.add_with_ids(np.ascontiguousarray(embeddings, dtype=np.float32),
+                                np.ascontiguousarray(ids, dtype=np.int64))
+
+    def load(self, ids: np.ndarray, embeddings: np.ndarray, labels: List[str]):
+        """Replace the whole gallery"""
+        self.index = None
+        self.dead = set()
+        self._search_params = None
+        self.row_labels = dict(zip(ids.tolist(), labels))
+        self.employee_rows = group_rows(ids, labels)
+        if len(ids) > 0:
+            self._add(ids, embeddings)
+
+    def replace(self, employee_ids: Iterable[str], ids: np.ndarray, embeddings: np.ndarray,
+                labels: List[str]) -> Tuple[int, int]:
+        """
+        Make (ids, embeddings, labels) the only rows of employee_ids.
+        Args:
+            employee_ids: Employees whose rows are replaced (those without rows are removed)
+            ids: face_embeddings row ids of their current rows
+        Returns:
+            (rows removed, rows added)
+        """
+        current = set(ids.tolist())
+        stale = [row for employee_id in employee_ids if employee_id in self.employee_rows
+                 for row in self.employee_rows[employee_id].tolist() if row not in current]
+        if stale:
+            for row in stale:
+                del self.row_labels[row]
+            self.dead.update(stale)
+            self._search_params = None
+        fresh = np.fromiter((row not in self.row_labels for row in ids.tolist()), dtype=bool, count=len(ids))
+        if fresh.any():
+            if not self.dead.isdisjoint(ids[fresh].tolist()):
+                # A reused row id: its tombstone has to go before the id can be added again
+                self.compact()
+            self._add(ids[fresh], embeddings[fresh])
+            self.row_labels.update(zip(ids[fresh].tolist(), (label for label, new in zip(labels, fresh) if new)))
+        grouped = group_rows(ids, labels)
+        for employee_id in employee_ids:
+            if employee_id in grouped:
+                self.employee_rows[employee_id] = grouped[employee_id]
+            else:
+                self.employee_rows.pop(employee_id, None)
+        if self.index is not None and len(self.dead) > self.compact_fraction * self.index.ntotal:
+            self.compact()
+        added = int(fresh.sum())
+        self.rows_removed += len(stale)
+        self.rows_added += added
+        return len(stale), added
+
+    def compact(self):
+        """Remove the tombstoned rows from the index (one pass over the flat storage)"""
+        if self.dead and self.index is not None:
+            self.index.remove_ids(np.fromiter(self.dead, dtype=np.int64, count=len(self.dead)))
+            self.compactions += 1
+        self.dead = set()
+        self._search_params = None
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """(employee id, inner product) of the k nearest rows, best first"""
+        if self.index is None or not self.row_labels:
+            return []
+        if self.dead and self._search_params is None:
+            dead = np.fromiter(self.dead, dtype=np.int64, count=len(self.dead))
+            # The selectors are held here too: the parameters only keep raw pointers to them
+            self._selectors = (faiss.IDSelectorBatch(dead),)
+            self._selectors += (faiss.IDSelectorNot(self._selectors[0]),)
+            self._search_params = faiss.SearchParameters(sel=self._selectors[1])
+        scores, rows = self.index.search(query.reshape(1, -1), min(k, len(self.row_labels)),
+                                         params=self._search_params)
+        return [(self.row_labels[row], float(score)) for score, row in zip(scores[0], rows[0].tolist())
+                if row in self.row_labels]
+
+    def export(self) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """(embeddings, labels, row ids) of the whole gallery, in index order"""
+        self.compact()
+        if self.index is None or self.index.ntotal == 0:
+            return np.zeros((0, 0), dtype=np.float32), [], np.zeros(0, dtype=np.int64)
+        ids = faiss.vector_to_array(self.index.id_map).astype(np.int64, copy=False)
+        embeddings = self.index.index.reconstruct_n(0, self.index.ntotal)
+        return embeddings, [self.row_labels[row] for row in ids.tolist()], ids
+
+    def get_metrics(self) -> dict:
+        return {"employees": self.employee_count, "embeddings": len(self), "tombstones": len(self.dead),
+                "rows_removed": self.rows_removed, "rows_added": self.rows_added, "compactions": self.compactions}
@@ -0,0 +1,143 @@
+"""
+On-disk snapshot of the recognition gallery for fast warm restarts.
+Loading the gallery from the database decodes one .npy blob per embedding
+row, which takes seconds to minutes at a few hundred thousand rows. The
+normalized embeddings are written as a single contiguous float32 .npy file,
+with the row ids, label codes and a JSON manifest next to it; the manifest
+records the gallery version (bumped with every face_embeddings change) and
+the gallery change-log cursor the snapshot is current to. On the next start
+the embeddings are memory-mapped rather than read, so the restart costs a
+few file opens and pages are faulted in as the index build touches them,
+and the changes logged after the cursor are replayed on top. A snapshot is
+usable while its version still matches the database or while it is young
+enough that the changes after it are still in the log; anything else (or a
+missing or damaged snapshot) means a database load.
+"""
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 2
+DEFAULT_DIRECTORY = os.getenv('GALLERY_SNAPSHOT_DIR', 'gallery_snapshot')
+MANIFEST = 'manifest.json'
+
+
+class GallerySnapshot:
+    """
+    Versioned, memory-mappable copy of the gallery.
+    Args:
+        directory: Where the snapshot files live (created on first save)
+    """
+    def __init__(self, directory: str = DEFAULT_DIRECTORY):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saves = 0
+        self.last_load_seconds = None
+        self.last_save_seconds = None
+        self.version = None
+        self.cursor = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self._path(MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, version: int, max_age: float = 0.0) -> Optional[Tuple[np.ndarray, List[str], np.ndarray]]:
+        """
+        Args:
+            version: Current gallery version in the database
+            max_age: Seconds a snapshot at an older version stays usable (its changes are replayed)
+        Returns:
+            (read-only memory-mapped (n, d) embeddings, labels, row ids), or None when the
+            snapshot is missing, stale or doesn't match its manifest; `version` and `cursor`
+            are then the snapshot's
+        """
+        started = time.perf_counter()
+        manifest = self._read_manifest()
+        if (not manifest or manifest.get('format') != FORMAT_VERSION or version < 0
+                or (manifest.get('version') != version and time.time() - manifest.get('saved_at', 0) > max_age)):
+            self.misses += 1
+            return None
+        try:
+            embeddings = np.load(self._path(manifest['embeddings']), mmap_mode='r')
+            ids = np.load(self._path(manifest['ids']))
+            codes = np.load(self._path(manifest['codes']))
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        count, dim = manifest['count'], manifest['dim']
+        if (embeddings.dtype != np.float32 or embeddings.shape != (count, dim)
+                or len(ids) != count or len(codes) != count):
+            self.misses += 1
+            return None
+        employees = manifest['employees']
+        labels = [employees[code] for code in codes.tolist()]
+        self.hits += 1
+        self.version = manifest['version']
+        self.cursor = manifest['cursor']
+        self.last_load_seconds = time.perf_counter() - started
+        return embeddings, labels, ids
+
+    def save(self, version: int, cursor: int, embeddings: np.ndarray, labels: List[str], ids: np.ndarray):
+        """
+        Write the snapshot for `version`; the manifest is replaced last, so readers see
+        either the previous snapshot or the complete new one. Older snapshots are removed.
+        Args:
+            cursor: Id of the last gallery change the embeddings include
+            embeddings: (n, d) normalized float32 embeddings
+            labels: Employee id of each row
+            ids: face_embeddings row id of each row
+        """
+        if version < 0:
+            return
+        started = time.perf_counter()
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        employees = sorted(set(labels))
+        index = {employee: code for code, employee in enumerate(employees)}
+        codes = np.fromiter((index[label] for label in labels), dtype=np.int32, count=len(labels))
+        tag = f'v{version}-c{cursor}'
+        names = {'embeddings': f'gallery-{tag}.npy', 'ids': f'ids-{tag}.npy', 'codes': f'codes-{tag}.npy'}
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for key, array in (('embeddings', embeddings), ('ids', np.asarray(ids, dtype=np.int64)),
+                               ('codes', codes)):
+                tmp = self._path(names[key] + '.tmp')
+                with open(tmp, 'wb') as f:
+                    np.save(f, array)
+                os.replace(tmp, self._path(names[key]))
+            manifest = {'format': FORMAT_VERSION, 'version': version, 'cursor': cursor, 'saved_at': time.time(),
+                        'count': int(embeddings.shape[0]),
+                        'dim': int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+                        'employees': employees, **names}
+            tmp = self._path(MANIFEST + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp, self._path(MANIFEST))
+            current = set(names.values()) | {MANIFEST}
+            for name in os.listdir(self.directory):
+                if name not in current and (name.endswith('.npy') or name.endswith('.tmp')):
+                    try:
+                        os.remove(self._path(name))
+                    except OSError:
+                        pass
+        self.saves += 1
+        self.version = version
+        self.cursor = cursor
+        self.last_save_seconds = time.perf_counter() - started
+
+    def get_metrics(self) -> dict:
+        return {"directory": self.directory, "version": self.version, "cursor": self.cursor, "hits": self.hits,
+                "misses": self.misses, "saves": self.saves,
+                "last_load_seconds": None if self.last_load_seconds is None else round(self.last_load_seconds, 4),
+                "last_save_seconds": None if self.last_save_seconds is None else round(self.last_save_seconds, 4)}
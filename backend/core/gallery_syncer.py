@@ -0,0 +1,193 @@
+"""
+Background sync of the live gallery from the gallery change log.
+Enrollment, archive and delete operations append one gallery_changes row
+per affected employee in their own transaction ('embeddings' when the
+employee's gallery rows changed, 'employee' for metadata). The syncer polls
+the log from a thread of its own and applies only what changed: the changed
+employees' active embeddings are re-read and replace their rows in the
+gallery and FAISS index, and changed employees' metadata is re-read into
+the metadata store. Replacing an employee's rows is idempotent, so a change
+seen twice (or already applied locally by the tracking system) is harmless.
+Camera threads never reload. A periodic version check (a no-op while the
+deltas keep up) falls back to a full reload, as does a change set touching
+more than max_delta_employees employees.
+The syncer also keeps the on-disk gallery snapshot current: at startup the
+snapshot is loaded and the changes logged after its cursor are replayed as
+one delta, and whenever the gallery has changed it is saved again (at most
+every snapshot_interval seconds, and on shutdown), so a restart replays
+minutes of changes instead of loading the whole gallery from the database.
+"""
+import threading
+import time
+from typing import Callable, List, Optional, Set
+
+import numpy as np
+
+from core.employee_metadata import EmployeeMetadataStore
+
+
+class GallerySyncer:
+    """
+    Keeps a gallery current from the change log.
+    Args:
+        db_manager: DatabaseManager the change log and rows are read through
+        metadata: Employee metadata store to keep current
+        apply_delta: Called with (version, employee_ids, ids, embeddings, labels) to replace those employees' rows
+        full_reload: Called with force to reload the whole gallery; returns True if it reloaded
+        interval: Seconds between polls of the change log
+        full_check_interval: Seconds between version checks that may trigger a full reload
+        max_delta_employees: Change sets touching more employees are applied as a full reload
+        retention_hours: Applied changes older than this are pruned from the log
+        load_snapshot: Called with a max age in seconds to load the gallery snapshot; returns its cursor, or None
+        save_snapshot: Called with (version, cursor) to save the gallery snapshot
+        snapshot_interval: Minimum seconds between snapshot saves while the gallery keeps changing
+    """
+    def __init__(self, db_manager, metadata: EmployeeMetadataStore,
+                 apply_delta: Callable[[int, Set[str], np.ndarray, np.ndarray, List[str]], None],
+                 full_reload: Callable[[bool], bool], interval: float = 5.0, full_check_interval: float = 300.0,
+                 max_delta_employees: int = 500, retention_hours: int = 24,
+                 load_snapshot: Optional[Callable[[float], Optional[int]]] = None,
+                 save_snapshot: Optional[Callable[[int, int], None]] = None, snapshot_interval: float = 600.0):
+        self.db_manager = db_manager
+        self.metadata = metadata
+        self.apply_delta = apply_delta
+        self.full_reload = full_reload
+        self.interval = interval
+        self.full_check_interval = full_check_interval
+        self.max_delta_employees = max_delta_employees
+        self.retention_hours = retention_hours
+        self.load_snapshot = load_snapshot
+        self.save_snapshot = save_snapshot
+        self.snapshot_interval = snapshot_interval
+        # Last applied change id; None until the first full load, before which deltas are meaningless
+        self.cursor: Optional[int] = None
+        # Whether the gallery changed since the snapshot was last saved or loaded
+        self.dirty = False
+        self.last_snapshot = 0.0
+        self._lock = threading.RLock()
+        self._thread = None
+        self.polls = 0
+        self.changes_applied = 0
+        self.delta_syncs = 0
+        self.full_reloads = 0
+        self.errors = 0
+        self.snapshot_saves = 0
+        self.last_sync_seconds = None
+
+    def load(self) -> bool:
+        """Startup load: the snapshot plus the changes logged after it, else a full reload (then saved)"""
+        with self._lock:
+            cursor = None
+            if self.load_snapshot is not None:
+                # Replaying needs every change after the snapshot's cursor, and the log keeps retention_hours
+                cursor = self.load_snapshot(max(0, self.retention_hours - 1) * 3600.0)
+            if cursor is None:
+                reloaded = self.reload(force=True)
+                self.checkpoint(force=True)
+                return reloaded
+            self.cursor = cursor
+            self.dirty = False
+            self.last_snapshot = time.time()
+            try:
+                self.sync()
+            except Exception:
+                # Half-replayed: deltas on top of it would be wrong until a full reload
+                self.cursor = None
+                raise
+            return True
+
+    def reload(self, force: bool = True) -> bool:
+        """Full reload; the cursor is read first, so changes racing the load are applied again later."""
+        with self._lock:
+            cursor = self.db_manager.get_gallery_change_cursor()
+            reloaded = self.full_reload(force)
+            if cursor >= 0:
+                self.cursor = cursor
+            if reloaded:
+                self.full_reloads += 1
+                self.dirty = True
+            return reloaded
+
+    def sync(self) -> int:
+        """Apply the changes logged since the last sync; returns how many were applied."""
+        with self._lock:
+            if self.cursor is None:
+                return 0
+            self.polls += 1
+            changes = self.db_manager.get_gallery_changes(self.cursor)
+            if not changes:
+                return 0
+            started = time.perf_counter()
+            gallery_employees = {employee_id for _, employee_id, kind in changes if kind == 'embeddings'}
+            metadata_employees = {employee_id for _, employee_id, kind in changes if kind == 'employee'}
+            if len(gallery_employees) > self.max_delta_employees:
+                self.reload(force=True)
+            else:
+                if gallery_employees:
+                    version, ids, embeddings, labels = self.db_manager.get_active_gallery(gallery_employees)
+                    if version < 0:
+                        raise RuntimeError("Could not read the changed employees' embeddings")
+                    self.apply_delta(version, gallery_employees, ids, embeddings, labels)
+                    self.delta_syncs += 1
+                    self.dirty = True
+                self.cursor = changes[-1][0]
+            for employee_id in metadata_employees:
+                employee = self.db_manager.get_employee(employee_id)
+                if employee is None:
+                    self.metadata.remove(employee_id)
+                else:
+                    self.metadata.upsert_employee(employee)
+            self.changes_applied += len(changes)
+            self.last_sync_seconds = time.perf_counter() - started
+            return len(changes)
+
+    def checkpoint(self, force: bool = False) -> bool:
+        """Save the snapshot if the gallery changed since the last save; True if saved"""
+        with self._lock:
+            if self.save_snapshot is None or self.cursor is None or not self.dirty:
+                return False
+            if not force and time.time() - self.last_snapshot < self.snapshot_interval:
+                return False
+            # Version first, then catch up: the saved gallery then includes every change that version counts
+            version = self.db_manager.get_gallery_version()
+            if version < 0:
+                return False
+            self.sync()
+            self.save_snapshot(version, self.cursor)
+            self.dirty = False
+            self.last_snapshot = time.time()
+            self.snapshot_saves += 1
+            return True
+
+    def _run(self, shutdown_flag: threading.Event):
+        last_check = last_prune = time.time()
+        while not shutdown_flag.wait(self.interval):
+            try:
+                self.sync()
+                now = time.time()
+                if self.cursor is not None and now - last_check > self.full_check_interval:
+                    last_check = now
+                    self.reload(force=False)
+                if now - last_prune > 3600:
+                    last_prune = now
+                    self.db_manager.prune_gallery_changes(self.retention_hours)
+                self.checkpoint()
+            except Exception:
+                self.errors += 1
+                # A failed delta leaves the gallery in an unknown state; start over from a full load
+                try:
+                    self.reload(force=True)
+                except Exception:
+                    pass
+
+    def start(self, shutdown_flag: threading.Event):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, args=(shutdown_flag,), daemon=True,
+                                            name="gallery-syncer")
+            self._thread.start()
+
+    def get_metrics(self) -> dict:
+        return {"cursor": self.cursor, "polls": self.polls, "changes_applied": self.changes_applied,
+                "delta_syncs": self.delta_syncs, "full_reloads": self.full_reloads, "errors": self.errors,
+                "snapshot_saves": self.snapshot_saves, "snapshot_dirty": self.dirty,
+                "last_sync_seconds": None if self.last_sync_seconds is None else round(self.last_sync_seconds, 4)}
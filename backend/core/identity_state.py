@@ -0,0 +1,126 @@
+"""
+Unified per-identity tracking state with TTL eviction.
+Everything the pipeline remembers about a recognised person (global track,
+motion/quality history, self-learning cooldown) lives in one
+IdentityState, so a background sweep can drop all of it at once when the
+person has not been seen for the timeout.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Rough cost of the non-array state of one identity, for the memory estimate
+STATE_OVERHEAD_BYTES = 1024
+
+
+class IdentityState:
+    __slots__ = ("identity", "track_id", "first_seen", "last_seen", "last_camera_id",
+                 "track", "tracking", "last_embedding_update")
+
+    def __init__(self, identity: str, now: float, camera_id: int):
+        self.identity = identity
+        self.track_id = identity
+        self.first_seen = now
+        self.last_seen = now
+        self.last_camera_id = camera_id
+        self.track = None
+        self.tracking = None
+        # When an embedding of this person was last queued for self-learning
+        self.last_embedding_update: Optional[float] = None
+
+    def estimate_bytes(self) -> int:
+        size = STATE_OVERHEAD_BYTES
+        if self.track is not None:
+            size += self.track.nbytes
+        if self.tracking is not None:
+            size += self.tracking.nbytes
+        return size
+
+
+class IdentityStateStore:
+    """
+    Thread-safe map of identity -> IdentityState with TTL eviction.
+    Args:
+        ttl: Seconds since last sighting after which an identity's state is dropped
+        sweep_interval: Seconds between background sweeps
+        clock: Time source (injectable for simulations)
+    """
+    def __init__(self, ttl: float, sweep_interval: float = 30.0, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._states: Dict[str, IdentityState] = {}
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self.evicted_total = 0
+        self.sweeps = 0
+        self.last_sweep_seconds = 0.0
+        self.estimated_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, identity: str) -> bool:
+        return identity in self._states
+
+    def get(self, identity: str) -> Optional[IdentityState]:
+        return self._states.get(identity)
+
+    def touch(self, identity: str, camera_id: int, now: Optional[float] = None) -> IdentityState:
+        """Get (or create) an identity's state and mark it as seen now on camera_id."""
+        now = self.clock() if now is None else now
+        state = self._states.get(identity)
+        if state is None:
+            with self._lock:
+                state = self._states.get(identity)
+                if state is None:
+                    state = IdentityState(identity, now, camera_id)
+                    self._states[identity] = state
+        state.last_seen = now
+        state.last_camera_id = camera_id
+        return state
+
+    def states(self) -> List[IdentityState]:
+        with self._lock:
+            return list(self._states.values())
+
+    def active(self, within: Optional[float] = None, now: Optional[float] = None) -> Iterator[IdentityState]:
+        """States seen within the last `within` seconds (default: the TTL)."""
+        now = self.clock() if now is None else now
+        within = self.ttl if within is None else within
+        return (state for state in self.states() if now - state.last_seen < within)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Evict expired identities and refresh the memory estimate."""
+        started = time.perf_counter()
+        now = self.clock() if now is None else now
+        with self._lock:
+            expired = [identity for identity, state in self._states.items() if now - state.last_seen > self.ttl]
+            for identity in expired:
+                del self._states[identity]
+            live = list(self._states.values())
+        self.estimated_bytes = sum(state.estimate_bytes() for state in live)
+        self.evicted_total += len(expired)
+        self.sweeps += 1
+        self.last_sweep_seconds = time.perf_counter() - started
+        return len(expired)
+
+    def start_sweeper(self, stop_event: threading.Event):
+        if self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, args=(stop_event,), daemon=True, name="identity_state_sweeper")
+        self._sweeper.start()
+
+    def _sweep_loop(self, stop_event: threading.Event):
+        while not stop_event.wait(self.sweep_interval):
+            self.sweep()
+
+    def get_metrics(self) -> Dict:
+        return {
+            "identities": len(self._states),
+            "estimated_bytes": self.estimated_bytes,
+            "evicted_total": self.evicted_total,
+            "sweeps": self.sweeps,
+            "last_sweep_ms": round(self.last_sweep_seconds * 1000, 3),
+            "ttl_seconds": self.ttl}
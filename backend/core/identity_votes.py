@@ -0,0 +1,181 @@
+"""
+Per-track identity voting for one camera.
+Detections are associated with the camera's live tracks by bounding-box IoU,
+and each track accumulates recognition scores per candidate identity in
+fixed-size arrays indexed by slot. Votes decay exponentially with age, the
+displayed identity is the candidate with the largest decayed score sum, and a
+track whose vote is recent and one-sided can reuse it instead of searching the
+gallery again. Tracks that stop being matched are evicted with their votes.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.slot_map import SlotMap
+
+
+def box_iou(boxes: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """(n, m) IoU between (n, 4) and (m, 4) [x1, y1, x2, y2] boxes."""
+    x1 = np.maximum(boxes[:, None, 0], others[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], others[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], others[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], others[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    other_area = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    union = area[:, None] + other_area[None, :] - intersection
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(union > 0, intersection / union, 0.0)
+
+
+class IdentityVotes:
+    """
+    Decayed identity votes of all tracks of one camera.
+    Args:
+        capacity: Initial number of track slots (doubles when full)
+        candidates: Identities remembered per track; a new one replaces the weakest
+        half_life: Seconds after which a vote counts half
+        min_iou: Overlap needed to continue a track from its last box
+        min_votes: Votes a track needs before its winner replaces the raw match
+        min_share: Share of the decayed score sum the winner needs to be reused
+        reuse_for: Seconds after the last vote during which the winner is reused
+    """
+    def __init__(self, capacity: int = 64, candidates: int = 4, half_life: float = 2.0, min_iou: float = 0.3,
+                 min_votes: int = 3, min_share: float = 0.8, reuse_for: float = 1.0):
+        self.half_life = half_life
+        self.min_iou = min_iou
+        self.min_votes = min_votes
+        self.min_share = min_share
+        self.reuse_for = reuse_for
+        self.slots = SlotMap(capacity)
+        self.boxes = np.zeros((capacity, 4), dtype=np.float32)
+        self.candidates = np.full((capacity, candidates), -1, dtype=np.int32)
+        # Decayed score sums and decayed vote counts per (track, candidate)
+        self.score_sums = np.zeros((capacity, candidates), dtype=np.float32)
+        self.vote_weights = np.zeros((capacity, candidates), dtype=np.float32)
+        self.vote_counts = np.zeros(capacity, dtype=np.int32)
+        self.last_vote = np.zeros(capacity, dtype=np.float64)
+        self._codes: Dict[str, int] = {}
+        self._identities: List[str] = []
+        self._next_track = 0
+        self.votes_cast = 0
+        self.searches_skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _code(self, identity: str) -> int:
+        code = self._codes.get(identity)
+        if code is None:
+            code = self._codes[identity] = len(self._identities)
+            self._identities.append(identity)
+        return code
+
+    def _grow(self):
+        grow = self.slots.capacity - len(self.boxes)
+        if grow <= 0:
+            return
+        candidates = self.candidates.shape[1]
+        self.boxes = np.concatenate((self.boxes, np.zeros((grow, 4), dtype=np.float32)))
+        self.candidates = np.concatenate((self.candidates, np.full((grow, candidates), -1, dtype=np.int32)))
+        self.score_sums = np.concatenate((self.score_sums, np.zeros((grow, candidates), dtype=np.float32)))
+        self.vote_weights = np.concatenate((self.vote_weights, np.zeros((grow, candidates), dtype=np.float32)))
+        self.vote_counts = np.concatenate((self.vote_counts, np.zeros(grow, dtype=np.int32)))
+        self.last_vote = np.concatenate((self.last_vote, np.zeros(grow)))
+
+    def assign(self, boxes: Sequence, now: float = 0.0) -> np.ndarray:
+        """
+        Track slot of every detection, continuing the best-overlapping live track or starting a new one.
+        Args:
+            boxes: (n, 4) [x1, y1, x2, y2] detection boxes of one frame
+            now: Timestamp recorded for staleness eviction
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        slots = np.full(len(boxes), -1, dtype=np.intp)
+        live = np.flatnonzero(self.slots.active)
+        if len(boxes) and len(live):
+            overlap = box_iou(boxes, self.boxes[live])
+            # Greedy matching, best overlaps first
+            taken = np.zeros(len(live), dtype=bool)
+            for flat in np.argsort(overlap, axis=None)[::-1]:
+                row, column = divmod(int(flat), len(live))
+                if overlap[row, column] < self.min_iou:
+                    break
+                if slots[row] < 0 and not taken[column]:
+                    slots[row] = live[column]
+                    taken[column] = True
+        for row in np.flatnonzero(slots < 0):
+            slot = self.slots.acquire(self._next_track, now)
+            self._next_track += 1
+            self._grow()
+            self.candidates[slot] = -1
+            self.score_sums[slot] = 0.0
+            self.vote_weights[slot] = 0.0
+            self.vote_counts[slot] = 0
+            self.last_vote[slot] = now
+            slots[row] = slot
+        self.boxes[slots] = boxes
+        self.slots.last_update[slots] = now
+        return slots
+
+    def vote(self, slot: int, identity: str, score: float, now: float):
+        """Add a recognition result to a track, decaying its earlier votes."""
+        code = self._code(identity)
+        decay = 0.5 ** ((now - self.last_vote[slot]) / self.half_life)
+        sums = self.score_sums[slot]
+        weights = self.vote_weights[slot]
+        sums *= decay
+        weights *= decay
+        matches = np.flatnonzero(self.candidates[slot] == code)
+        if len(matches):
+            column = matches[0]
+        else:
+            column = int(np.argmin(sums))
+            self.candidates[slot, column] = code
+            sums[column] = 0.0
+            weights[column] = 0.0
+        sums[column] += score
+        weights[column] += 1.0
+        self.vote_counts[slot] += 1
+        self.last_vote[slot] = now
+        self.votes_cast += 1
+
+    def winner(self, slot: int) -> Optional[Tuple[str, float, float]]:
+        """(identity, mean decayed score, share of the track's score sum) of the leading candidate."""
+        sums = self.score_sums[slot]
+        column = int(np.argmax(sums))
+        code = self.candidates[slot, column]
+        if code < 0 or sums[column] <= 0:
+            return None
+        return (self._identities[code], float(sums[column] / self.vote_weights[slot, column]),
+                float(sums[column] / sums.sum()))
+
+    def smoothed(self, slot: int, identity: str, score: float) -> Tuple[str, float]:
+        """The track's voted identity once it has enough votes, else the raw match."""
+        if self.vote_counts[slot] >= self.min_votes:
+            winner = self.winner(slot)
+            if winner is not None:
+                return winner[0], winner[1]
+        return identity, score
+
+    def confident(self, slot: int, now: float) -> Optional[Tuple[str, float]]:
+        """The voted identity if it is recent and one-sided enough to skip a gallery search."""
+        if self.vote_counts[slot] < self.min_votes or now - self.last_vote[slot] > self.reuse_for:
+            return None
+        winner = self.winner(slot)
+        if winner is None or winner[2] < self.min_share:
+            return None
+        return winner[0], winner[1]
+
+    def evict_stale(self, cutoff: float) -> int:
+        """Drop tracks (and their votes) not matched since `cutoff`."""
+        keys = self.slots.stale(cutoff)
+        for key in keys:
+            self.slots.release(key)
+        return len(keys)
+
+    def get_metrics(self) -> Dict:
+        return {
+            "tracks": len(self.slots),
+            "votes_cast": self.votes_cast,
+            "searches_skipped": self.searches_skipped}
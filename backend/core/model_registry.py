@@ -0,0 +1,138 @@
+"""
+Process-wide registry of InsightFace model sessions.
+Every component that needs a detector/recogniser (the tracking system's
+per-GPU apps, the pipeline, the enroller) asks the registry instead of
+building its own FaceAnalysis, so a model pack is loaded and prepared once
+per (model, providers, det_size) and the same ONNX Runtime sessions are
+shared. Sessions are safe to run from several threads at once; loading is
+serialized per key, so concurrent first requests still load a model once
+while different keys (e.g. one per GPU) load in parallel. A freshly loaded
+model runs one dummy inference through the detector and recogniser, so the
+first real frame doesn't pay for session initialisation. InsightFace is
+imported on the first load, and torch is optional (only used to count GPUs).
+"""
+import functools
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.lazy_import import lazy_module
+
+if TYPE_CHECKING:
+    from insightface.app import FaceAnalysis
+
+insightface_app = lazy_module('insightface.app')
+
+DEFAULT_MODEL = 'antelopev2'
+DEFAULT_DET_SIZE = (416, 416)
+
+
+@functools.lru_cache(maxsize=1)
+def cuda_device_count() -> int:
+    """CUDA devices, counted by torch when installed, else whether ONNX Runtime has CUDA at all."""
+    try:
+        import torch
+    except ImportError:
+        try:
+            import onnxruntime
+        except ImportError:
+            return 0
+        return int('CUDAExecutionProvider' in onnxruntime.get_available_providers())
+    return torch.cuda.device_count() if torch.cuda.is_available() else 0
+
+
+def gpu_providers(gpu_id: int = 0) -> List:
+    """ONNX Runtime providers for a GPU, CPU-only when the GPU is unavailable."""
+    if gpu_id < cuda_device_count():
+        return [('CUDAExecutionProvider', {'device_id': gpu_id}), 'CPUExecutionProvider']
+    return ['CPUExecutionProvider']
+
+
+def _providers_key(providers: Sequence) -> Tuple:
+    # Provider entries are names or (name, options dict) pairs
+    return tuple(provider if isinstance(provider, str) else (provider[0], tuple(sorted(provider[1].items())))
+                 for provider in providers)
+
+
+def warm_up(app: 'FaceAnalysis', det_size: Tuple[int, int]):
+    """Run a blank frame through the detector, and a blank crop through the recogniser."""
+    app.get(np.zeros((det_size[1], det_size[0], 3), dtype=np.uint8))
+    recognition = getattr(app, 'models', {}).get('recognition')
+    if recognition is not None:
+        # A blank frame has no faces, so the recogniser needs its own input
+        size = recognition.input_size
+        recognition.get_feat([np.zeros((size[1], size[0], 3), dtype=np.uint8)])
+
+
+class ModelRegistry:
+    """
+    Hands out shared, prepared FaceAnalysis instances.
+    Args:
+        det_thresh: Detection threshold every instance is prepared with
+        allowed_modules: InsightFace modules to load (the pipeline only uses these)
+    """
+    def __init__(self, det_thresh: float = 0.5, allowed_modules: Sequence[str] = ('detection', 'recognition')):
+        self.det_thresh = det_thresh
+        self.allowed_modules = list(allowed_modules)
+        self._models: Dict[Tuple, 'FaceAnalysis'] = {}
+        self._load_seconds: Dict[Tuple, float] = {}
+        self._warmup_seconds: Dict[Tuple, float] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.loads = 0
+
+    def get_face_analysis(self, name: str = DEFAULT_MODEL, providers: Sequence = None,
+                          det_size: Tuple[int, int] = DEFAULT_DET_SIZE) -> 'FaceAnalysis':
+        """
+        Args:
+            name: InsightFace model pack
+            providers: ONNX Runtime providers (default: GPU 0, else CPU)
+            det_size: Detector input size
+        Returns:
+            The shared instance for (name, providers, det_size), loaded on first request
+        """
+        providers = gpu_providers(0) if providers is None else list(providers)
+        key = (name, _providers_key(providers), tuple(det_size))
+        with self._lock:
+            self.requests += 1
+            app = self._models.get(key)
+            if app is not None:
+                return app
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            app = self._models.get(key)
+            if app is None:
+                started = time.perf_counter()
+                app = insightface_app.FaceAnalysis(name=name, providers=providers, allowed_modules=self.allowed_modules)
+                app.prepare(ctx_id=0, det_size=tuple(det_size), det_thresh=self.det_thresh)
+                loaded = time.perf_counter()
+                warm_up(app, det_size)
+                with self._lock:
+                    self._models[key] = app
+                    self._load_seconds[key] = loaded - started
+                    self._warmup_seconds[key] = time.perf_counter() - loaded
+                    self.loads += 1
+            return app
+
+    def clear(self):
+        """Drop every shared instance (sessions are freed once their users let go)."""
+        with self._lock:
+            self._models.clear()
+            self._load_seconds.clear()
+            self._warmup_seconds.clear()
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "loads": self.loads,
+                "models": [{"name": key[0], "providers": [p if isinstance(p, str) else p[0] for p in key[1]],
+                            "det_size": list(key[2]), "load_seconds": round(seconds, 3),
+                            "warmup_seconds": round(self._warmup_seconds[key], 3)}
+                           for key, seconds in self._load_seconds.items()]}
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,74 @@
+"""
+Stable key -> row allocation for per-track state stacked in numpy arrays.
+Owners keep one row per live track; released rows are reused, and the owner
+grows its arrays whenever `capacity` outgrows them.
+"""
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SlotMap:
+    """
+    Args:
+        capacity: Initial number of rows (doubles when all are taken)
+    """
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.last_update = np.zeros(capacity, dtype=np.float64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._slots: Dict[Hashable, int] = {}
+        self._keys: List[Optional[Hashable]] = [None] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def get(self, key: Hashable) -> Optional[int]:
+        return self._slots.get(key)
+
+    def key(self, slot: int) -> Optional[Hashable]:
+        return self._keys[slot]
+
+    def acquire(self, key: Hashable, now: float = 0.0) -> int:
+        """Row of `key`, allocating one (and growing capacity) if it has none."""
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        if not self._free:
+            capacity = self.capacity
+            self.capacity *= 2
+            self.last_update = np.concatenate((self.last_update, np.zeros(capacity)))
+            self.active = np.concatenate((self.active, np.zeros(capacity, dtype=bool)))
+            self._keys.extend([None] * capacity)
+            self._free.extend(range(self.capacity - 1, capacity - 1, -1))
+        slot = self._free.pop()
+        self._slots[key] = slot
+        self._keys[slot] = key
+        self.active[slot] = True
+        self.last_update[slot] = now
+        return slot
+
+    def acquire_many(self, keys: Sequence[Hashable], now: float = 0.0) -> Tuple[np.ndarray, List[int]]:
+        """Rows of all `keys` (allocating as needed), plus the positions in `keys` that got new rows."""
+        lookup = self._slots.get
+        slots = np.fromiter((lookup(key, -1) for key in keys), dtype=np.intp, count=len(keys))
+        created = np.flatnonzero(slots < 0).tolist()
+        for i in created:
+            slots[i] = self.acquire(keys[i], now)
+        return slots, created
+
+    def release(self, key: Hashable) -> Optional[int]:
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self.active[slot] = False
+            self._keys[slot] = None
+            self._free.append(slot)
+        return slot
+
+    def stale(self, cutoff: float) -> List[Hashable]:
+        """Keys whose rows were last updated before `cutoff`."""
+        return [self._keys[slot] for slot in np.flatnonzero(self.active & (self.last_update < cutoff))]
@@ -0,0 +1,134 @@
+"""
+Dependency-ordered, concurrent startup.
+Startup work is registered as named stages with the stages they depend on.
+Every stage whose dependencies are ready runs at once on a thread pool, so
+independent work (model loading, gallery and metadata loads, camera
+connections) overlaps instead of running back to back. A failed stage marks
+its dependents as blocked without stopping unrelated stages. Per-stage state
+and timings back the readiness endpoint.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils.logging import get_logger
+
+PENDING, RUNNING, READY, FAILED, BLOCKED = "pending", "running", "ready", "failed", "blocked"
+
+
+class _Stage:
+    __slots__ = ("name", "function", "depends_on", "state", "started", "finished", "error")
+
+    def __init__(self, name: str, function: Callable[[], None], depends_on: List[str]):
+        self.name = name
+        self.function = function
+        self.depends_on = depends_on
+        self.state = PENDING
+        self.started = None
+        self.finished = None
+        self.error = None
+
+
+class StartupGraph:
+    """
+    Runs startup stages concurrently in dependency order.
+    Args:
+        max_workers: Stages run at once (default: all of them)
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self.stages: Dict[str, _Stage] = {}
+        self.started = None
+        self.finished = None
+        self.logger = get_logger(__name__)
+        self._condition = threading.Condition()
+        self._executor = None
+
+    def add(self, name: str, function: Callable[[], None], depends_on: Iterable[str] = ()):
+        """Register a stage; dependencies must already be registered."""
+        depends_on = list(depends_on)
+        missing = [dependency for dependency in depends_on if dependency not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages {missing}")
+        if name in self.stages:
+            raise ValueError(f"Stage {name} already registered")
+        self.stages[name] = _Stage(name, function, depends_on)
+
+    def start(self):
+        """Start every stage without dependencies; the rest follow as they unblock. Returns immediately."""
+        with self._condition:
+            if self.started is not None:
+                return
+            self.started = time.perf_counter()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self.stages)),
+                                                thread_name_prefix="startup")
+            self._schedule()
+
+    def _schedule(self):
+        # Called with the condition held
+        for stage in self.stages.values():
+            if stage.state != PENDING:
+                continue
+            states = [self.stages[dependency].state for dependency in stage.depends_on]
+            if any(state in (FAILED, BLOCKED) for state in states):
+                stage.state = BLOCKED
+                stage.error = "dependency failed"
+                self._schedule()
+                return
+            if all(state == READY for state in states):
+                stage.state = RUNNING
+                self._executor.submit(self._run, stage)
+        if self.finished is None and all(stage.state in (READY, FAILED, BLOCKED) for stage in self.stages.values()):
+            self.finished = time.perf_counter()
+            self._executor.shutdown(wait=False)
+            self._condition.notify_all()
+
+    def _run(self, stage: _Stage):
+        stage.started = time.perf_counter()
+        try:
+            stage.function()
+            state, error = READY, None
+        except Exception as e:
+            state, error = FAILED, str(e)
+            self.logger.error(f"Startup stage {stage.name} failed: {e}")
+        with self._condition:
+            stage.finished = time.perf_counter()
+            stage.state = state
+            stage.error = error
+            self._schedule()
+            self._condition.notify_all()
+
+    def wait(self, names: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the given stages (default: all) have finished, successfully or not.
+        Returns:
+            True if they are all ready
+        """
+        names = list(self.stages) if names is None else list(names)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: all(self.stages[name].state in (READY, FAILED, BLOCKED) for name in names), timeout)
+            return all(self.stages[name].state == READY for name in names)
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """Whether a stage (default: every stage) is ready."""
+        with self._condition:
+            if name is not None:
+                return self.stages[name].state == READY
+            return all(stage.state == READY for stage in self.stages.values())
+
+    def status(self) -> dict:
+        """Overall readiness and per-stage state, seconds taken and error."""
+        with self._condition:
+            components = {}
+            for stage in self.stages.values():
+                seconds = None
+                if stage.started is not None:
+                    seconds = round((stage.finished or time.perf_counter()) - stage.started, 3)
+                components[stage.name] = {"state": stage.state, "seconds": seconds, "error": stage.error}
+            elapsed = None
+            if self.started is not None:
+                elapsed = round((self.finished or time.perf_counter()) - self.started, 3)
+            return {"ready": all(stage.state == READY for stage in self.stages.values()),
+                    "elapsed_seconds": elapsed, "components": components}
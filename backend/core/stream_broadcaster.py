@@ -0,0 +1,139 @@
+"""
+Per-camera overlay stream broadcaster.
+Renders recognition annotations onto a copy of the latest raw frame and
+encodes it to JPEG, but only while at least one client is subscribed and
+never faster than the configured stream FPS.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Tuple
+
+from utils.lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+
+@dataclass
+class Snapshot:
+    frame_seq: int
+    jpeg: bytes
+    encoded_at: float
+    etag: str
+
+
+class StreamBroadcaster:
+    """
+    Lazily renders and fans out the annotated MJPEG stream of one camera.
+    Args:
+        camera_id: Camera identifier
+        frame_source: Callable returning (frame_seq, raw_frame, annotations)
+        renderer: Callable drawing annotations onto the frame it is given
+        fps: Maximum rendering rate of the stream
+        jpeg_quality: JPEG encoder quality (0-100)
+    """
+    def __init__(self, camera_id: int, frame_source: Callable[[], Tuple[int, object, object]],
+                 renderer: Callable[[object, object], None], fps: int = 10, jpeg_quality: int = 80):
+        self.camera_id = camera_id
+        self.frame_interval = 1.0 / max(1, fps)
+        self._frame_source = frame_source
+        self._renderer = renderer
+        self._encode_params = [int(getattr(cv2, 'IMWRITE_JPEG_QUALITY', 1)), jpeg_quality]
+        self._condition = threading.Condition()
+        self._subscribers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._latest_jpeg: Optional[bytes] = None
+        self._latest_seq = -1
+        self.frames_rendered = 0
+        # Distinguishes frame sequence numbers across process restarts in ETags
+        self._epoch = int(time.time())
+        self._snapshot_lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscribers
+
+    @contextmanager
+    def subscription(self):
+        """Keep the render loop alive for the duration of the context."""
+        with self._condition:
+            self._subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._render_loop,
+                    daemon=True,
+                    name=f"stream_broadcaster_{self.camera_id}")
+                self._thread.start()
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+                self._condition.notify_all()
+
+    def stream(self, keep_running: Callable[[], bool] = lambda: True, timeout: float = 1.0) -> Iterator[bytes]:
+        """Yield each newly rendered JPEG until the generator is closed or keep_running() is False."""
+        with self.subscription():
+            last_seq = -1
+            while keep_running():
+                with self._condition:
+                    self._condition.wait_for(lambda: self._latest_seq != last_seq, timeout=timeout)
+                    if self._latest_seq == last_seq or self._latest_jpeg is None:
+                        continue
+                    last_seq = self._latest_seq
+                    jpeg = self._latest_jpeg
+                yield jpeg
+
+    def snapshot(self, max_age: float = 0.0) -> Optional[Snapshot]:
+        """
+        Return the most recent frame as JPEG, encoding it at most once per frame sequence.
+        Concurrent callers wait for a single in-flight encode instead of encoding themselves.
+        Args:
+            max_age: Accept a cached encoding up to this many seconds old even if newer frames exist
+        """
+        with self._snapshot_lock:
+            cached = self._snapshot
+            if cached and time.time() - cached.encoded_at <= max_age:
+                return cached
+            seq, frame, annotations = self._frame_source()
+            if frame is None or (cached and cached.frame_seq == seq):
+                return cached
+            with self._condition:
+                jpeg = self._latest_jpeg if self._latest_seq == seq else None
+            if jpeg is None:
+                jpeg = self._render(frame, annotations)
+                if jpeg is None:
+                    return cached
+            self._snapshot = Snapshot(
+                frame_seq=seq,
+                jpeg=jpeg,
+                encoded_at=time.time(),
+                etag=f'"{self.camera_id}-{self._epoch}-{seq}"')
+            return self._snapshot
+
+    def _render(self, frame, annotations) -> Optional[bytes]:
+        canvas = frame.copy()
+        self._renderer(canvas, annotations)
+        ok, jpeg = cv2.imencode('.jpg', canvas, self._encode_params)
+        return jpeg.tobytes() if ok else None
+
+    def _render_loop(self):
+        while True:
+            with self._condition:
+                if self._subscribers <= 0:
+                    self._thread = None
+                    return
+                rendered_seq = self._latest_seq
+            started = time.time()
+            seq, frame, annotations = self._frame_source()
+            if frame is not None and seq != rendered_seq:
+                jpeg = self._render(frame, annotations)
+                if jpeg is not None:
+                    with self._condition:
+                        self._latest_jpeg = jpeg
+                        self._latest_seq = seq
+                        self.frames_rendered += 1
+                        self._condition.notify_all()
+            time.sleep(max(0.0, self.frame_interval - (time.time() - started)))
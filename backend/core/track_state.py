@@ -0,0 +1,132 @@
+"""
+Compact per-track state for the tracking hot path.
+Histories are fixed-size numpy rings written in place, so a sighting updates
+preallocated arrays instead of appending tuples and objects, and a track's
+footprint is fixed once it has filled.
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+QUALITY_FIELDS = ("sharpness_score", "brightness_score", "angle_score", "size_score", "overall_quality")
+
+
+class GlobalTrack:
+    """
+    A recognised person's cross-camera track with a ring of recent embeddings.
+    Args:
+        employee_id: Identity the track belongs to
+        last_seen_time: Time of the latest sighting
+        last_camera_id: Camera of the latest sighting
+        history_size: Number of embeddings kept
+        work_status: Initial work status
+    """
+    __slots__ = ("employee_id", "last_seen_time", "last_camera_id", "confidence_score", "work_status",
+                 "_embeddings", "_size", "_dim", "_count", "_head")
+
+    def __init__(self, employee_id: str, last_seen_time: float, last_camera_id: int, history_size: int,
+                 work_status: str = "working"):
+        self.employee_id = employee_id
+        self.last_seen_time = last_seen_time
+        self.last_camera_id = last_camera_id
+        self.confidence_score = 0.0
+        self.work_status = work_status
+        self._embeddings = np.empty((history_size, 0), dtype=np.float32)
+        self._size = history_size
+        self._dim = 0
+        self._count = 0
+        self._head = 0
+
+    def add_embedding(self, embedding: np.ndarray):
+        """Copy an embedding into the ring, overwriting the oldest once full."""
+        if embedding.shape[-1] != self._dim:
+            # Sized on first use (or if the model's embedding size changes)
+            self._dim = embedding.shape[-1]
+            self._embeddings = np.empty((self._size, self._dim), dtype=np.float32)
+            self._count = self._head = 0
+        self._embeddings[self._head] = embedding
+        self._head = (self._head + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+    @property
+    def embedding_history(self) -> np.ndarray:
+        """Recent embeddings, oldest first."""
+        if self._count < self._size:
+            return self._embeddings[:self._count]
+        return np.concatenate((self._embeddings[self._head:], self._embeddings[:self._head]))
+
+    @property
+    def latest_embedding(self) -> Optional[np.ndarray]:
+        if not self._count:
+            return None
+        return self._embeddings[self._head - 1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._embeddings.nbytes
+
+
+class TrackHistory:
+    """
+    Ring of a track's recent positions, recognition scores and quality metrics.
+    Args:
+        size: Number of sightings kept
+    """
+    __slots__ = ("positions", "scores", "quality", "size", "count", "head", "last", "velocity", "predicted_position")
+
+    def __init__(self, size: int):
+        self.positions = np.zeros((size, 2), dtype=np.int32)
+        self.scores = np.zeros(size, dtype=np.float32)
+        self.quality = np.zeros((size, len(QUALITY_FIELDS)), dtype=np.float32)
+        self.size = size
+        self.count = 0
+        self.head = 0
+        self.last: Optional[Tuple[int, int]] = None
+        self.velocity: Tuple[int, int] = (0, 0)
+        self.predicted_position: Tuple[int, int] = (0, 0)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, x: int, y: int, score: float, quality: Optional[Sequence[float]] = None):
+        """Record a sighting in place and update the frame-to-frame velocity."""
+        slot = self.head
+        if self.last is not None:
+            self.velocity = (x - self.last[0], y - self.last[1])
+        self.last = (x, y)
+        # Scalar stores into the preallocated rows; no per-sighting objects are kept
+        positions = self.positions
+        positions[slot, 0] = x
+        positions[slot, 1] = y
+        self.scores[slot] = score
+        if quality is not None:
+            # One score per QUALITY_FIELDS entry
+            self.quality[slot] = quality
+        self.head = (slot + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def _ordered(self, ring: np.ndarray) -> np.ndarray:
+        if self.count < self.size:
+            return ring[:self.count]
+        return np.concatenate((ring[self.head:], ring[:self.head]))
+
+    @property
+    def position_history(self) -> np.ndarray:
+        """Recent (x, y) positions, oldest first."""
+        return self._ordered(self.positions)
+
+    @property
+    def confidence_history(self) -> np.ndarray:
+        return self._ordered(self.scores)
+
+    @property
+    def quality_history(self) -> np.ndarray:
+        """Recent quality rows, oldest first, with columns in QUALITY_FIELDS order."""
+        return self._ordered(self.quality)
+
+    @property
+    def nbytes(self) -> int:
+        return self.positions.nbytes + self.scores.nbytes + self.quality.nbytes
+
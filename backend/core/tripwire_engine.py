@@ -0,0 +1,358 @@
+"""
+Per-camera tripwire crossing engine.
+Tripwire geometry is converted to pixel-space normals and thresholds once per
+frame resolution, and every tracked position of a frame is tested against
+every tripwire in one numpy pass. Crossing state is a small integer array with
+one row per track and one column per tripwire.
+Each update tests the path from a track's previous position to its current
+one, so a track may jump across a band between sparse detections (or be
+advanced along its predicted trajectory) and still register the crossing,
+and a path that passes around the end of a segment does not.
+"""
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.slot_map import SlotMap
+
+# Wire zones: which side of the band a track was last seen on before crossing
+ZONE_NONE = 0
+ZONE_LOW = 1   # left of / above the band; for a segment, left of it looking from its first point
+ZONE_HIGH = 2  # right of / below the band; for a segment, right of it
+# Polygon zones
+ZONE_OUTSIDE = 1
+ZONE_INSIDE = 2
+
+
+@dataclass
+class TripwireConfig:
+    """
+    A tripwire in normalised frame coordinates.
+    Without `points` it is a pair of full-frame lines `spacing` apart, centred
+    on `position` across the width ("vertical") or height ("horizontal").
+    With two `points` it is a band of width `spacing` around that segment; with
+    three or more it is a polygon that fires when a track is seen entering it.
+    """
+    position: float
+    spacing: float
+    direction: str
+    name: str
+    points: Optional[List[Tuple[float, float]]] = None
+
+    @property
+    def is_polygon(self) -> bool:
+        return self.points is not None and len(self.points) >= 3
+
+
+class TripwireCrossing(NamedTuple):
+    key: Hashable
+    tripwire: int
+    direction: int  # +1 low -> high side (or polygon entry), -1 high -> low side
+
+
+def segment_band(tripwire: TripwireConfig, width: int, height: int):
+    """Pixel endpoints, unit normal and band half-width of a segment tripwire."""
+    (ax, ay), (bx, by) = tripwire.points[:2]
+    a = np.array([ax * width, ay * height])
+    b = np.array([bx * width, by * height])
+    tangent = (b - a) / np.linalg.norm(b - a)
+    normal = np.array([-tangent[1], tangent[0]])
+    # Half-width scales with the frame extent along the normal, as for axis wires
+    half = tripwire.spacing / 2 * (abs(normal[0]) * width + abs(normal[1]) * height)
+    return a, b, normal, half
+
+
+class TripwireGeometry:
+    """Pixel-space geometry of a camera's tripwires at one resolution."""
+    def __init__(self, tripwires: Sequence[TripwireConfig], width: int, height: int):
+        wires = [i for i, tripwire in enumerate(tripwires) if not tripwire.is_polygon]
+        self.wire_columns = np.array(wires, dtype=np.intp)
+        self.normals = np.zeros((len(wires), 2))
+        self.tangents = np.zeros((len(wires), 2))
+        self.low = np.zeros(len(wires))
+        self.high = np.zeros(len(wires))
+        self.t_min = np.full(len(wires), -np.inf)
+        self.t_max = np.full(len(wires), np.inf)
+        for row, column in enumerate(wires):
+            tripwire = tripwires[column]
+            if tripwire.points:
+                a, b, normal, half = segment_band(tripwire, width, height)
+                tangent = np.array([normal[1], -normal[0]])
+                length = np.linalg.norm(b - a)
+                centre = a @ normal
+                self.low[row], self.high[row] = centre - half, centre + half
+                self.normals[row] = normal
+                self.tangents[row] = tangent
+                self.t_min[row], self.t_max[row] = a @ tangent, a @ tangent + length
+            else:
+                vertical = tripwire.direction == 'vertical'
+                extent = width if vertical else height
+                self.normals[row] = (1, 0) if vertical else (0, 1)
+                self.low[row] = int(extent * (tripwire.position - tripwire.spacing / 2))
+                self.high[row] = int(extent * (tripwire.position + tripwire.spacing / 2))
+        self.centre = (self.low + self.high) / 2
+        # The same wires as plain floats, for the per-track path used with few tracks
+        self.wire_rows = list(zip(self.wire_columns.tolist(), *self.normals.T.tolist(), *self.tangents.T.tolist(),
+                                  self.low.tolist(), self.high.tolist(), self.centre.tolist(),
+                                  self.t_min.tolist(), self.t_max.tolist()))
+        self.polygons = [
+            (i, np.array([(x * width, y * height) for x, y in tripwire.points]))
+            for i, tripwire in enumerate(tripwires) if tripwire.is_polygon]
+
+    def wire_paths(self, previous: np.ndarray, positions: np.ndarray):
+        """
+        (n, wires) masks for the paths previous -> positions: end point below the band,
+        end point above it, end point within the segment's extent, and path meeting
+        the band's centre line within that extent.
+        """
+        projected = positions @ self.normals.T
+        along = positions @ self.tangents.T
+        previous_projected = previous @ self.normals.T
+        previous_along = previous @ self.tangents.T
+        # Where the path meets the centre line (clamped to the path's ends)
+        step = projected - previous_projected
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(step != 0, (self.centre - previous_projected) / step, 1.0)
+        fraction = np.clip(fraction, 0.0, 1.0)
+        crossing_along = previous_along + fraction * (along - previous_along)
+        within = (along >= self.t_min) & (along <= self.t_max)
+        on_segment = (crossing_along >= self.t_min) & (crossing_along <= self.t_max)
+        return projected < self.low, projected > self.high, within, on_segment
+
+    @staticmethod
+    def inside(positions: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+        """Even-odd point-in-polygon test for all positions against one polygon."""
+        x = positions[:, 0:1]
+        y = positions[:, 1:2]
+        x1, y1 = polygon[:, 0], polygon[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        spans = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        return np.count_nonzero(spans & (x < x_cross), axis=1) % 2 == 1
+
+
+class TripwireEngine:
+    """
+    Crossing state of all tracks of one camera against its tripwires.
+    Crossings found on a predicted (coasted) path are held as pending. A later
+    detection strictly past the tripwire confirms them, one back on the original
+    side cancels them and one inside the band leaves them pending. When the
+    pending window runs out, a crossing whose track was not detected again (it
+    left the frame beyond the tripwire) is confirmed, and one whose track is
+    still seen without having passed (it stopped or turned back) is cancelled.
+    Below `scalar_tracks` tracks per update, numpy's per-call overhead outweighs
+    the work, so line tripwires are tested track by track on plain floats; the
+    state arrays and results are the same either way.
+    Args:
+        tripwires: The camera's tripwires; crossings refer to them by index
+        capacity: Initial number of track rows
+        scalar_tracks: Largest update tested track by track rather than in one numpy pass
+    """
+    def __init__(self, tripwires: Sequence[TripwireConfig], capacity: int = 64, scalar_tracks: int = 32):
+        self.tripwires = list(tripwires)
+        self.scalar_tracks = scalar_tracks
+        self._polygon_columns = np.array([tripwire.is_polygon for tripwire in self.tripwires], dtype=bool)
+        self.slots = SlotMap(capacity)
+        self.zones = np.zeros((capacity, len(self.tripwires)), dtype=np.int8)
+        self.positions = np.zeros((capacity, 2), dtype=np.float64)
+        # Direction of an unconfirmed predicted crossing per (track, tripwire), 0 if none
+        self.pending = np.zeros((capacity, len(self.tripwires)), dtype=np.int8)
+        self.pending_since = np.zeros(capacity, dtype=np.float64)
+        self._geometry: Dict[Tuple[int, int], TripwireGeometry] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def geometry(self, width: int, height: int) -> TripwireGeometry:
+        geometry = self._geometry.get((width, height))
+        if geometry is None:
+            geometry = self._geometry[(width, height)] = TripwireGeometry(self.tripwires, width, height)
+        return geometry
+
+    def _slots_for(self, keys: Sequence[Hashable], positions: np.ndarray, now: float) -> np.ndarray:
+        slots, created = self.slots.acquire_many(keys, now)
+        if created:
+            grow = self.slots.capacity - len(self.zones)
+            if grow > 0:
+                columns = len(self.tripwires)
+                self.zones = np.concatenate((self.zones, np.zeros((grow, columns), dtype=np.int8)))
+                self.pending = np.concatenate((self.pending, np.zeros((grow, columns), dtype=np.int8)))
+                self.pending_since = np.concatenate((self.pending_since, np.zeros(grow)))
+                self.positions = np.concatenate((self.positions, np.zeros((grow, 2))))
+            self.zones[slots[created]] = ZONE_NONE
+            self.pending[slots[created]] = 0
+            # New tracks start with a zero-length path at their first position
+            self.positions[slots[created]] = positions[created]
+        return slots
+
+    def _crossings(self, keys, rows, columns, directions) -> List[TripwireCrossing]:
+        return [TripwireCrossing(keys[row], int(column), int(direction))
+                for row, column, direction in zip(rows, columns, directions)]
+
+    def update(self, keys: Sequence[Hashable], positions, width: int, height: int,
+               now: float = 0.0, predicted: bool = False) -> List[TripwireCrossing]:
+        """
+        Advance every track's crossing state along its path to this frame's position.
+        Args:
+            keys: Track keys, one per position (no duplicates)
+            positions: (n, 2) pixel positions
+            width, height: Frame resolution
+            now: Timestamp, for staleness eviction and pending confirmation
+            predicted: Positions are Kalman predictions rather than detections
+        Returns:
+            Crossings confirmed in this frame
+        """
+        if not len(keys) or not self.tripwires:
+            return []
+        geometry = self.geometry(width, height)
+        if len(keys) <= self.scalar_tracks and not geometry.polygons:
+            return self._update_scalar(keys, positions, geometry, now, predicted)
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        slots = self._slots_for(keys, positions, now)
+        zones = self.zones[slots]
+        pending = self.pending[slots]
+        fired = np.zeros(zones.shape, dtype=np.int8)
+        columns = geometry.wire_columns
+        if len(columns):
+            below, above, within, on_segment = geometry.wire_paths(self.positions[slots], positions)
+            wire_zones = zones[:, columns]
+            wire_pending = pending[:, columns]
+            if not predicted and wire_pending.any():
+                # A detection past the wire fires pending crossings, one back on the original side
+                # cancels them; one inside the band settles nothing
+                passed = ((wire_pending > 0) & above) | ((wire_pending < 0) & below)
+                cancelled = ((wire_pending > 0) & below) | ((wire_pending < 0) & above)
+                wire_zones[cancelled] = np.where(wire_pending[cancelled] > 0, ZONE_LOW, ZONE_HIGH)
+                fired[:, columns] = np.where(passed, wire_pending, 0)
+                wire_pending[passed | cancelled] = 0
+            rising = (wire_zones == ZONE_LOW) & above & on_segment
+            falling = (wire_zones == ZONE_HIGH) & below & on_segment
+            unset = (wire_zones == ZONE_NONE) & within
+            wire_zones[unset & below] = ZONE_LOW
+            wire_zones[unset & above] = ZONE_HIGH
+            # A track that leaves a segment's extent has to approach it afresh
+            wire_zones[rising | falling | ~within] = ZONE_NONE
+            crossed = rising.astype(np.int8) - falling.astype(np.int8)
+            if predicted:
+                wire_pending[crossed != 0] = crossed[crossed != 0]
+            else:
+                fired[:, columns] += crossed
+            zones[:, columns] = wire_zones
+            pending[:, columns] = wire_pending
+        for column, polygon in geometry.polygons:
+            inside = geometry.inside(positions, polygon)
+            if not predicted:
+                confirmed = (pending[:, column] > 0) & inside
+                cancelled = (pending[:, column] > 0) & ~inside
+                fired[confirmed, column] = 1
+                zones[cancelled, column] = ZONE_OUTSIDE
+                pending[:, column] = 0
+            entered = inside & (zones[:, column] == ZONE_OUTSIDE)
+            zones[:, column] = np.where(inside, ZONE_INSIDE, ZONE_OUTSIDE)
+            if predicted:
+                pending[entered, column] = 1
+            else:
+                fired[entered, column] = 1
+        if pending.any():
+            newly_pending = pending.any(axis=1) & ~self.pending[slots].any(axis=1)
+            self.pending_since[slots[newly_pending]] = now
+        self.zones[slots] = zones
+        self.pending[slots] = pending
+        self.positions[slots] = positions
+        if not predicted:
+            self.slots.last_update[slots] = now
+        rows, fired_columns = np.nonzero(fired)
+        return self._crossings(keys, rows, fired_columns, fired[rows, fired_columns])
+
+    def _update_scalar(self, keys: Sequence[Hashable], positions, geometry: TripwireGeometry,
+                       now: float, predicted: bool) -> List[TripwireCrossing]:
+        """update() for a few tracks and line tripwires only: the tests of wire_paths, track by track"""
+        crossings = []
+        for key, (x, y) in zip(keys, positions):
+            x, y = float(x), float(y)
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = int(self._slots_for([key], np.array([(x, y)]), now)[0])
+            px, py = self.positions[slot].tolist()
+            zones = self.zones[slot].tolist()
+            pending = self.pending[slot].tolist()
+            was_pending = any(pending)
+            changed = False
+            for column, nx, ny, tx, ty, low, high, centre, t_min, t_max in geometry.wire_rows:
+                projected = x * nx + y * ny
+                along = x * tx + y * ty
+                below = projected < low
+                above = projected > high
+                zone = zones[column]
+                waiting = pending[column]
+                fired = 0
+                if waiting and not predicted:
+                    if (waiting > 0 and above) or (waiting < 0 and below):
+                        fired, waiting = waiting, 0
+                    elif (waiting > 0 and below) or (waiting < 0 and above):
+                        zone, waiting = (ZONE_LOW if waiting > 0 else ZONE_HIGH), 0
+                crossed = 0
+                if (zone == ZONE_LOW and above) or (zone == ZONE_HIGH and below):
+                    # Where the path meets the centre line (clamped to the path's ends)
+                    previous_projected = px * nx + py * ny
+                    previous_along = px * tx + py * ty
+                    step = projected - previous_projected
+                    fraction = min(max((centre - previous_projected) / step, 0.0), 1.0) if step else 1.0
+                    if t_min <= previous_along + fraction * (along - previous_along) <= t_max:
+                        crossed = 1 if above else -1
+                if crossed or not t_min <= along <= t_max:
+                    # A track that leaves a segment's extent has to approach it afresh
+                    zone = ZONE_NONE
+                elif zone == ZONE_NONE:
+                    zone = ZONE_LOW if below else ZONE_HIGH if above else ZONE_NONE
+                if predicted:
+                    waiting = crossed or waiting
+                else:
+                    fired += crossed
+                if zone != zones[column] or waiting != pending[column]:
+                    zones[column] = zone
+                    pending[column] = waiting
+                    changed = True
+                if fired:
+                    crossings.append(TripwireCrossing(key, column, fired))
+            if changed:
+                self.zones[slot] = zones
+                self.pending[slot] = pending
+                if not was_pending and any(pending):
+                    self.pending_since[slot] = now
+            self.positions[slot] = (x, y)
+            if not predicted:
+                self.slots.last_update[slot] = now
+        return crossings
+
+    def expire_pending(self, cutoff: float) -> List[TripwireCrossing]:
+        """
+        Settle crossings pending since before `cutoff`. Those of tracks not detected since the
+        crossing was predicted fire; the rest are cancelled and their tracks put back on the
+        original side, so a later detection past the tripwire still counts as a crossing.
+        Returns the crossings that fired.
+        """
+        due = np.flatnonzero(self.slots.active & self.pending.any(axis=1) & (self.pending_since < cutoff))
+        if not len(due):
+            return []
+        pending = self.pending[due]
+        vanished = self.slots.last_update[due] < self.pending_since[due]
+        cancelled = (pending != 0) & ~vanished[:, None]
+        restored = np.where(self._polygon_columns, ZONE_OUTSIDE, np.where(pending > 0, ZONE_LOW, ZONE_HIGH))
+        self.zones[due] = np.where(cancelled, restored, self.zones[due])
+        self.pending[due] = 0
+        rows, columns = np.nonzero(pending * vanished[:, None])
+        return [TripwireCrossing(self.slots.key(due[row]), int(column), int(pending[row, column]))
+                for row, column in zip(rows.tolist(), columns.tolist())]
+
+    def remove(self, key: Hashable) -> bool:
+        return self.slots.release(key) is not None
+
+    def evict_stale(self, cutoff: float) -> List[Hashable]:
+        """Forget tracks not detected since `cutoff`; returns their keys."""
+        keys = self.slots.stale(cutoff)
+        for key in keys:
+            self.remove(key)
+        return keys
@@ -0,0 +1,80 @@
+"""
+In-memory per-employee work status.
+Hydrated once from the latest attendance record of every employee and then
+updated on every logged event, so deciding whether an exit may be logged is a
+dictionary lookup on the camera thread rather than a database query.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+class WorkStatusTable:
+    """
+    Authoritative latest event per employee.
+    Args:
+        window_hours: A check-in older than this no longer counts as working,
+                      matching the look-back of the attendance status query
+    """
+    def __init__(self, window_hours: int = 10):
+        self.window_hours = window_hours
+        self.window = timedelta(hours=window_hours)
+        # employee_id -> (event_type or None when no recent record, timestamp)
+        self._entries: Dict[str, Tuple[Optional[str], datetime]] = {}
+        self._lock = threading.Lock()
+        self.hydrated = False
+        self.db_lookups = 0
+
+    def hydrate(self, db_manager) -> int:
+        """Load the latest attendance event of every employee with one bulk query."""
+        latest = db_manager.get_latest_attendance_for_all_employees(hours_back=self.window_hours)
+        if latest is None:
+            return 0
+        with self._lock:
+            self._entries = {
+                employee_id: (record.event_type, record.timestamp)
+                for employee_id, record in latest.items()}
+            self.hydrated = True
+        return len(latest)
+
+    def _fetch(self, employee_id: str, db_manager=None):
+        """Hydration failed: fall back to the database once per employee, without holding the lock"""
+        if self.hydrated or db_manager is None or employee_id in self._entries:
+            return
+        record = db_manager.get_latest_attendance_by_employee(employee_id, hours_back=self.window_hours)
+        entry = (record.event_type, record.timestamp) if record else (None, datetime.now())
+        with self._lock:
+            self.db_lookups += 1
+            # An event recorded while the query ran is newer than its result
+            self._entries.setdefault(employee_id, entry)
+
+    def _entry(self, employee_id: str) -> Tuple[Optional[str], datetime]:
+        return self._entries.get(employee_id) or (None, datetime.min)
+
+    def _is_working(self, entry: Tuple[Optional[str], datetime]) -> bool:
+        event_type, timestamp = entry
+        return event_type == 'check_in' and datetime.now() - timestamp <= self.window
+
+    def is_working(self, employee_id: str, db_manager=None) -> bool:
+        self._fetch(employee_id, db_manager)
+        with self._lock:
+            return self._is_working(self._entry(employee_id))
+
+    def try_record(self, employee_id: str, event_type: str, timestamp: Optional[datetime] = None,
+                   db_manager=None) -> bool:
+        """
+        Atomically apply an attendance event.
+        Returns:
+            False if a check_out was rejected because the employee is not working
+        """
+        if event_type == 'check_out':
+            self._fetch(employee_id, db_manager)
+        with self._lock:
+            if event_type == 'check_out' and not self._is_working(self._entry(employee_id)):
+                return False
+            self._entries[employee_id] = (event_type, timestamp or datetime.now())
+            return True
+
+    def working_employees(self) -> List[str]:
+        with self._lock:
+            return [employee_id for employee_id, entry in self._entries.items() if self._is_working(entry)]
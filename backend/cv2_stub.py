@@ -23,11 +23,19 @@ class VideoCapture:
 CAP_PROP_FRAME_WIDTH = 3
 CAP_PROP_FRAME_HEIGHT = 4
 CAP_PROP_FPS = 5
+CAP_PROP_BUFFERSIZE = 38
 COLOR_BGR2RGB = 4
+COLOR_BGR2LAB = 44
+COLOR_LAB2BGR = 56
+INTER_AREA = 3
+CV_32F = 5
 IMREAD_COLOR = 1
 
 # Mock functions
-def cvtColor(img, code):
+def cvtColor(img, code, dst=None):
+    if dst is not None:
+        dst[:] = img
+        return dst
     return img
 
 def imread(path, flags=IMREAD_COLOR):
@@ -36,8 +44,40 @@ def imread(path, flags=IMREAD_COLOR):
 def imwrite(path, img):
     return True
 
-def resize(img, size):
-    return np.zeros((*size[::-1], 3), dtype=np.uint8)
+def resize(img, size, dst=None, interpolation=None):
+    if dst is not None:
+        dst[:] = 0
+        return dst
+    return np.zeros((*size[::-1], *img.shape[2:]), dtype=img.dtype)
+
+def Laplacian(img, ddepth, dst=None, ksize=1):
+    return np.zeros(img.shape, dtype=np.float32)
+
+def extractChannel(img, coi, dst=None):
+    if dst is not None:
+        dst[:] = img[..., coi]
+        return dst
+    return img[..., coi].copy()
+
+def insertChannel(src, dst, coi):
+    dst[..., coi] = src
+    return dst
+
+def GaussianBlur(img, ksize, sigmaX, dst=None):
+    return img if dst is None else dst
+
+def warpAffine(img, M, dsize, dst=None, borderValue=0.0):
+    if dst is not None:
+        dst[:] = 0
+        return dst
+    return np.zeros((dsize[1], dsize[0], 3), dtype=np.uint8)
+
+class CLAHE:
+    def apply(self, img, dst=None):
+        return img if dst is None else dst
+
+def createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)):
+    return CLAHE()
 
 def rectangle(img, pt1, pt2, color, thickness=1):
     return img
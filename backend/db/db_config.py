@@ -49,6 +49,8 @@ def close_db_session(db):
 def create_tables():
     try:
         Base.metadata.create_all(bind=engine, checkfirst=True)
+        from db.migrations import run_migrations
+        run_migrations(engine)
         logging.info("Database tables created successfully")
     except Exception as e:
         logging.error(f"Error creating database tables: {e}")
@@ -1,13 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, select
 from db.db_config import SessionLocal
-from db.db_models import Employee, FaceEmbedding, AttendanceRecord, Role, TrackingRecord, SystemLog, User
+from db.embedding_codec import decode_embedding, decode_embeddings, encode_embedding
+from db.db_models import Employee, FaceEmbedding, GalleryChange, GalleryVersion, AttendanceRecord, Role, TrackingRecord, SystemLog, User
 import numpy as np
 import pickle
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-from io import BytesIO
 import threading
 
 class DatabaseManager:
@@ -31,6 +31,7 @@ class DatabaseManager:
                 email=email,
                 phone=phone)
             session.add(employee)
+            self._log_gallery_change(session, employee_id, 'employee')
             session.commit()
             return True
         except Exception as e:
@@ -54,6 +55,34 @@ class DatabaseManager:
             if session:
                 session.close()
 
+    def update_employee(self, employee_id: str, name: str = None, department: str = None, designation: str = None, email: str = None, phone: str = None) -> bool:
+        session = None
+        try:
+            session = self.Session()
+            employee = session.query(Employee).filter(Employee.id == employee_id).first()
+            if not employee:
+                return False
+            updates = {
+                'employee_name': name,
+                'department': department,
+                'designation': designation,
+                'email': email,
+                'phone': phone}
+            for field, value in updates.items():
+                if value is not None:
+                    setattr(employee, field, value)
+            self._log_gallery_change(session, employee_id, 'employee')
+            session.commit()
+            return True
+        except Exception as e:
+            if session:
+                session.rollback()
+            self.logger.error(f"Error updating employee {employee_id}: {e}")
+            return False
+        finally:
+            if session:
+                session.close()
+
     def get_all_employees(self) -> List[Employee]:
         session = None
         try:
@@ -71,21 +100,16 @@ class DatabaseManager:
         try:
             session = self.Session()
 
-            # Serialize embedding to bytes
-            out = BytesIO()
-            np.save(out, embedding.astype(np.float32))
-            out.seek(0)
-            binary_embedding = out.read()
-
             new_embedding = FaceEmbedding(
                 employee_id=employee_id,
-                embedding_data=binary_embedding,
+                embedding_data=encode_embedding(embedding),
                 embedding_type=embedding_type,
                 quality_score=float(quality_score),
                 source_image_path=source_image_path,
                 is_active=True
             )
             session.add(new_embedding)
+            self._log_gallery_change(session, employee_id)
             session.commit()
             print(f"[DB] Stored embedding for {employee_id}")
             return True
@@ -100,6 +124,73 @@ class DatabaseManager:
             if session:
                 session.close()
 
+    def store_face_embeddings(self, updates: List[Tuple[str, np.ndarray]], embedding_type: str = 'update',
+                              quality_score: float = 0.0, keep_latest: int = None) -> int:
+        """
+        Insert (employee_id, embedding) pairs with one bulk insert and one commit.
+        Args:
+            keep_latest: If given, prune each affected employee to this many embeddings of embedding_type
+        Returns:
+            Rows inserted; 0 when the batch was rolled back
+        """
+        if not updates:
+            return 0
+        session = None
+        try:
+            session = self.Session()
+            session.execute(FaceEmbedding.__table__.insert(), [
+                {"employee_id": employee_id, "embedding_data": encode_embedding(embedding),
+                 "embedding_type": embedding_type, "quality_score": float(quality_score),
+                 "source_image_path": None, "is_active": True}
+                for employee_id, embedding in updates])
+            employee_ids = sorted({employee_id for employee_id, _ in updates})
+            if keep_latest is not None:
+                self._prune_embeddings(session, employee_ids, max(keep_latest, 3), embedding_type)
+            for employee_id in employee_ids:
+                self._log_gallery_change(session, employee_id)
+            session.commit()
+            return len(updates)
+        except Exception as e:
+            if session:
+                session.rollback()
+            self.logger.error(f"Error storing {len(updates)} face embeddings: {e}")
+            return 0
+        finally:
+            if session:
+                session.close()
+
+    def _prune_embeddings(self, session, employee_ids, keep_latest: int, embedding_type: str = 'update') -> int:
+        """Delete all but each employee's keep_latest newest embeddings of embedding_type, in one statement"""
+        condition = FaceEmbedding.embedding_type == embedding_type
+        if employee_ids is not None:
+            condition = and_(condition, FaceEmbedding.employee_id.in_(list(employee_ids)))
+        ranked = select(FaceEmbedding.id, func.row_number().over(
+            partition_by=FaceEmbedding.employee_id,
+            order_by=(desc(FaceEmbedding.created_at), desc(FaceEmbedding.id))).label('recency')
+        ).where(condition).subquery()
+        return session.query(FaceEmbedding).filter(
+            FaceEmbedding.id.in_(select(ranked.c.id).where(ranked.c.recency > keep_latest))
+        ).delete(synchronize_session=False)
+
+    def cleanup_old_embeddings(self, employee_id: str = None, max_embeddings: int = 15) -> int:
+        """Keep each employee's (or only employee_id's) max_embeddings newest update embeddings; returns rows deleted"""
+        session = None
+        try:
+            session = self.Session()
+            employee_ids = None if employee_id is None else [employee_id]
+            # Not a gallery change: the gallery only uses the 3 newest updates, which are never pruned
+            deleted = self._prune_embeddings(session, employee_ids, max(max_embeddings, 3))
+            session.commit()
+            return deleted
+        except Exception as e:
+            if session:
+                session.rollback()
+            self.logger.error(f"Error cleaning up old embeddings: {e}")
+            return 0
+        finally:
+            if session:
+                session.close()
+
     def get_face_embeddings(self, employee_id: str = None, embedding_type: str = None, limit: int = None) -> List[Tuple[str, np.ndarray]]:
         session = None
         try:
@@ -114,8 +205,7 @@ class DatabaseManager:
                 query = query.limit(limit)
             results = []
             for embedding_record in query.all():
-                # ✅ Deserialize bytes to numpy array
-                embedding_data = np.load(BytesIO(embedding_record.embedding_data))
+                embedding_data = decode_embedding(embedding_record.embedding_data)
                 results.append((embedding_record.employee_id, embedding_data))
             return results
         except Exception as e:
@@ -126,37 +216,27 @@ class DatabaseManager:
                 session.close()
 
 
+    def _active_embedding_rows(self, session, employee_ids=None) -> List[Tuple[int, str, bytes]]:
+        """(id, employee_id, embedding_data) of active enrollment embeddings plus each employee's 3 latest updates"""
+        columns = (FaceEmbedding.id, FaceEmbedding.employee_id, FaceEmbedding.embedding_data)
+        active = FaceEmbedding.is_active == True
+        if employee_ids is not None:
+            active = and_(active, FaceEmbedding.employee_id.in_(list(employee_ids)))
+        enrolled = session.query(*columns).filter(and_(active, FaceEmbedding.embedding_type == 'enroll'))
+        ranked = session.query(*columns, func.row_number().over(
+            partition_by=FaceEmbedding.employee_id,
+            order_by=(desc(FaceEmbedding.created_at), desc(FaceEmbedding.id))).label('recency')
+        ).filter(and_(active, FaceEmbedding.embedding_type == 'update')).subquery()
+        updates = session.query(ranked.c.id, ranked.c.employee_id, ranked.c.embedding_data).filter(ranked.c.recency <= 3)
+        return enrolled.union_all(updates).all()
+
     def get_all_active_embeddings(self) -> Tuple[List[np.ndarray], List[str]]:
         session = None
         try:
             session = self.Session()
-            embeddings = []
-            labels = []
-
-            enroll_embeddings = session.query(FaceEmbedding).filter(
-                and_(FaceEmbedding.is_active == True, FaceEmbedding.embedding_type == 'enroll')
-            ).all()
-
-            for emb_record in enroll_embeddings:
-                embedding_data = np.load(BytesIO(emb_record.embedding_data))
-                embeddings.append(embedding_data)
-                labels.append(emb_record.employee_id)
-
-            update_embeddings = session.query(FaceEmbedding).filter(
-                and_(FaceEmbedding.is_active == True, FaceEmbedding.embedding_type == 'update')
-            ).order_by(desc(FaceEmbedding.created_at)).all()
-
-            employee_update_count = {}
-            for emb_record in update_embeddings:
-                emp_id = emb_record.employee_id
-                if emp_id not in employee_update_count:
-                    employee_update_count[emp_id] = 0
-                if employee_update_count[emp_id] < 3:
-                    embedding_data = np.load(BytesIO(emb_record.embedding_data))
-                    embeddings.append(embedding_data)
-                    labels.append(emb_record.employee_id)
-                    employee_update_count[emp_id] += 1
-
+            rows = self._active_embedding_rows(session)
+            embeddings = list(decode_embeddings([row[2] for row in rows]))
+            labels = [row[1] for row in rows]
             return embeddings, labels
         except Exception as e:
             self.logger.error(f"Error getting all active embeddings: {e}")
@@ -165,6 +245,96 @@ class DatabaseManager:
             if session:
                 session.close()
 
+    def get_active_gallery(self, employee_ids=None) -> Tuple[int, np.ndarray, np.ndarray, List[str]]:
+        """
+        Gallery version, row ids, (n, d) float32 embeddings and labels of the active embeddings
+        (of employee_ids only, if given). The version is read before the rows, so the rows are never older than it.
+        """
+        session = None
+        try:
+            session = self.Session()
+            version = self._gallery_version(session)
+            rows = self._active_embedding_rows(session, employee_ids)
+            ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            labels = [row[1] for row in rows]
+            return version, ids, decode_embeddings([row[2] for row in rows]), labels
+        except Exception as e:
+            self.logger.error(f"Error getting active gallery: {e}")
+            return -1, np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32), []
+        finally:
+            if session:
+                session.close()
+
+    def _gallery_version(self, session) -> int:
+        row = session.query(GalleryVersion.version).filter(GalleryVersion.id == 1).first()
+        return row[0] if row else 0
+
+    def _log_gallery_change(self, session, employee_id: str, kind: str = 'embeddings'):
+        """Record a change to an employee's gallery rows or metadata inside the caller's transaction"""
+        session.add(GalleryChange(employee_id=employee_id, kind=kind))
+        if kind != 'embeddings':
+            return
+        # Only embedding changes invalidate the gallery (and its snapshot); the row is seeded by the migrations
+        session.query(GalleryVersion).filter(GalleryVersion.id == 1).update(
+            {GalleryVersion.version: GalleryVersion.version + 1}, synchronize_session=False)
+
+    def get_gallery_change_cursor(self) -> int:
+        """Id of the latest gallery change; 0 if none, -1 if it can't be read"""
+        session = None
+        try:
+            session = self.Session()
+            return session.query(func.max(GalleryChange.id)).scalar() or 0
+        except Exception as e:
+            self.logger.error(f"Error getting gallery change cursor: {e}")
+            return -1
+        finally:
+            if session:
+                session.close()
+
+    def get_gallery_changes(self, after_id: int, limit: int = 10000) -> List[Tuple[int, str, str]]:
+        """(id, employee_id, kind) of the gallery changes after after_id, oldest first"""
+        session = None
+        try:
+            session = self.Session()
+            return [tuple(row) for row in session.query(GalleryChange.id, GalleryChange.employee_id, GalleryChange.kind)
+                    .filter(GalleryChange.id > after_id).order_by(GalleryChange.id).limit(limit).all()]
+        except Exception as e:
+            self.logger.error(f"Error getting gallery changes: {e}")
+            return []
+        finally:
+            if session:
+                session.close()
+
+    def prune_gallery_changes(self, older_than_hours: int = 24) -> int:
+        session = None
+        try:
+            session = self.Session()
+            cutoff = datetime.now() - timedelta(hours=older_than_hours)
+            deleted = session.query(GalleryChange).filter(GalleryChange.created_at < cutoff).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        except Exception as e:
+            if session:
+                session.rollback()
+            self.logger.error(f"Error pruning gallery changes: {e}")
+            return 0
+        finally:
+            if session:
+                session.close()
+
+    def get_gallery_version(self) -> int:
+        """Change counter of the face_embeddings table; -1 if it can't be read"""
+        session = None
+        try:
+            session = self.Session()
+            return self._gallery_version(session)
+        except Exception as e:
+            self.logger.error(f"Error getting gallery version: {e}")
+            return -1
+        finally:
+            if session:
+                session.close()
+
     def log_attendance(self, employee_id: str, camera_id: int, event_type: str, confidence_score: float = 0.0, work_status: str = 'working', notes: str = None) -> bool:
         session = None
         try:
@@ -227,6 +397,30 @@ class DatabaseManager:
         finally:
             if session:
                 session.close()
+
+    def get_latest_attendance_for_all_employees(self, hours_back: int = 10) -> Optional[Dict[str, AttendanceRecord]]:
+        session = None
+        try:
+            session = self.Session()
+            time_threshold = datetime.now() - timedelta(hours=hours_back)
+            recent = and_(AttendanceRecord.timestamp >= time_threshold, AttendanceRecord.is_valid == True)
+            latest = session.query(
+                AttendanceRecord.employee_id,
+                func.max(AttendanceRecord.timestamp).label('latest_timestamp')
+            ).filter(recent).group_by(AttendanceRecord.employee_id).subquery()
+            records = session.query(AttendanceRecord).join(
+                latest,
+                and_(
+                    AttendanceRecord.employee_id == latest.c.employee_id,
+                    AttendanceRecord.timestamp == latest.c.latest_timestamp)
+            ).filter(recent).order_by(AttendanceRecord.id).all()
+            return {record.employee_id: record for record in records}
+        except Exception as e:
+            self.logger.error(f"Error getting latest attendance for all employees: {e}")
+            return None
+        finally:
+            if session:
+                session.close()
     
     # 🔧 Implement similar pattern for other methods like store_tracking_record, cleanup_old_embeddings, log_system_event, create_role, get_role, create_user, get_user following the same session management.
     def delete_employee(self, employee_id: str) -> bool:
@@ -237,6 +431,8 @@ class DatabaseManager:
             if not employee:
                 return False
             session.query(FaceEmbedding).filter(FaceEmbedding.employee_id == employee_id).delete()
+            self._log_gallery_change(session, employee_id)
+            self._log_gallery_change(session, employee_id, 'employee')
             session.query(AttendanceRecord).filter(AttendanceRecord.employee_id == employee_id).delete()
             session.delete(employee)
             session.commit()
@@ -254,6 +450,7 @@ class DatabaseManager:
         try:
             session = self.Session()
             session.query(FaceEmbedding).filter(FaceEmbedding.employee_id == employee_id).delete()
+            self._log_gallery_change(session, employee_id)
             session.commit()
             return True
         except Exception as e:
@@ -272,6 +469,7 @@ class DatabaseManager:
             if not embedding:
                 return False
             session.delete(embedding)
+            self._log_gallery_change(session, embedding.employee_id)
             session.commit()
             return True
         except Exception as e:
@@ -289,6 +487,7 @@ class DatabaseManager:
             session.query(FaceEmbedding).filter(FaceEmbedding.employee_id == employee_id).update({
                 FaceEmbedding.is_active: False
             })
+            self._log_gallery_change(session, employee_id)
             session.commit()
             return True
         except Exception as e:
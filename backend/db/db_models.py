@@ -31,6 +31,20 @@ class FaceEmbedding(Base):
     is_active = Column(Boolean, default=True)
     employee = relationship("Employee", back_populates="embeddings")
 
+class GalleryVersion(Base):
+    __tablename__ = 'gallery_version'
+    # Single row (id 1); bumped in the same transaction as every face_embeddings change
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class GalleryChange(Base):
+    __tablename__ = 'gallery_changes'
+    # Append-only log the GallerySyncer applies: kind 'embeddings' (the employee's gallery rows changed) or 'employee' (metadata)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    employee_id = Column(String, nullable=False)
+    kind = Column(String, nullable=False)
+    created_at = Column(DateTime, default=func.now(), index=True)
+
 class AttendanceRecord(Base):
     __tablename__ = 'attendance_records'
     id = Column(Integer, primary_key=True, index=True)
@@ -42,6 +56,8 @@ class AttendanceRecord(Base):
     work_status = Column(String, default='working')
     is_valid = Column(Boolean, default=True)
     notes = Column(Text)
+    # (employee, camera, tripwire, time bucket); NULL for manually entered records
+    idempotency_key = Column(String, unique=True, index=True)
     employee = relationship("Employee", back_populates="attendance_records")
 
 class TrackingRecord(Base):
@@ -0,0 +1,44 @@
+"""
+Storage format of face_embeddings.embedding_data.
+Embeddings are stored as raw little-endian float32 bytes, so a whole gallery
+is decoded by joining the blobs and viewing them with one np.frombuffer
+instead of parsing an .npy header per row. Rows written before the format
+change are .npy files; the raw_float32_embeddings migration rewrites them,
+and until it has run they are still decoded one at a time. The .npy magic
+can't start a raw embedding: as a float32 it is about 2e8.
+"""
+from io import BytesIO
+from typing import Sequence
+
+import numpy as np
+
+NPY_MAGIC = b'\x93NUMPY'
+DTYPE = np.dtype('<f4')
+
+
+def encode_embedding(embedding: np.ndarray) -> bytes:
+    return np.ascontiguousarray(embedding, dtype=DTYPE).tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    if blob[:6] == NPY_MAGIC:
+        return np.load(BytesIO(blob)).astype(np.float32, copy=False)
+    return np.frombuffer(blob, dtype=DTYPE).astype(np.float32)
+
+
+def decode_embeddings(blobs: Sequence[bytes]) -> np.ndarray:
+    """
+    Args:
+        blobs: embedding_data values of equal-dimension embeddings
+    Returns:
+        Writable, contiguous (n, d) float32 matrix
+    """
+    if not blobs:
+        return np.zeros((0, 0), dtype=np.float32)
+    if any(blob[:6] == NPY_MAGIC for blob in blobs):
+        return np.array([decode_embedding(blob) for blob in blobs], dtype=np.float32)
+    dim = len(blobs[0]) // DTYPE.itemsize
+    if any(len(blob) != dim * DTYPE.itemsize for blob in blobs):
+        raise ValueError("Embeddings of different dimensions in the gallery")
+    # bytearray, so the matrix is writable (normalized in place) with only one copy made
+    return np.frombuffer(bytearray(b''.join(blobs)), dtype=DTYPE).reshape(len(blobs), dim).astype(np.float32, copy=False)
@@ -0,0 +1,76 @@
+"""
+Additive schema migrations for existing databases.
+create_all() only creates missing tables, so columns added to existing models
+are applied here, as are rows the code expects to exist. Every step is
+idempotent and runs on each startup. Data migrations run once each and are
+recorded in schema_migrations.
+"""
+import logging
+from sqlalchemy import inspect, text
+
+from db.embedding_codec import NPY_MAGIC, decode_embedding, encode_embedding
+
+# (table, column, column DDL, statements to run once the column exists)
+COLUMN_MIGRATIONS = [
+    ("attendance_records", "idempotency_key", "VARCHAR", [
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_attendance_records_idempotency_key "
+        "ON attendance_records (idempotency_key)"]),
+]
+
+
+def migrate_npy_embeddings(connection, batch_size=1000):
+    """Rewrite .npy embedding blobs as raw float32 (the values, and so the gallery version, are unchanged)"""
+    last_id, converted = 0, 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, embedding_data FROM face_embeddings WHERE id > :last_id ORDER BY id LIMIT :batch_size"),
+            {"last_id": last_id, "batch_size": batch_size}).fetchall()
+        if not rows:
+            break
+        updates = [{"id": row[0], "data": encode_embedding(decode_embedding(bytes(row[1])))}
+                   for row in rows if bytes(row[1][:6]) == NPY_MAGIC]
+        if updates:
+            connection.execute(text("UPDATE face_embeddings SET embedding_data = :data WHERE id = :id"), updates)
+            converted += len(updates)
+        last_id = rows[-1][0]
+    logging.info(f"Converted {converted} embeddings to raw float32")
+
+
+# (table, statement inserting the table's required rows if missing)
+SEED_ROWS = [
+    # The single gallery version row, so version bumps are a plain UPDATE that can't race an insert
+    ("gallery_version", "INSERT INTO gallery_version (id, version) "
+                        "SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM gallery_version WHERE id = 1)"),
+]
+
+# (name, table, function(connection)), each run once
+DATA_MIGRATIONS = [
+    ("raw_float32_embeddings", "face_embeddings", migrate_npy_embeddings),
+]
+
+
+def run_migrations(engine):
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table, column, ddl, followups in COLUMN_MIGRATIONS:
+            if table not in tables:
+                continue
+            if column in {existing['name'] for existing in inspector.get_columns(table)}:
+                continue
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            for statement in followups:
+                connection.execute(text(statement))
+            logging.info(f"Added column {table}.{column}")
+        for table, statement in SEED_ROWS:
+            if table in tables:
+                connection.execute(text(statement))
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR PRIMARY KEY)"))
+        applied = {row[0] for row in connection.execute(text("SELECT name FROM schema_migrations"))}
+        for name, table, migrate in DATA_MIGRATIONS:
+            # A missing table is skipped, not recorded, so the migration runs once the table exists
+            if name in applied or table not in tables:
+                continue
+            migrate(connection)
+            connection.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+            logging.info(f"Applied data migration {name}")
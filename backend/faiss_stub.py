@@ -11,7 +11,7 @@ class IndexFlatL2:
         self.vectors.extend(vectors)
         self.ntotal += len(vectors)
         
-    def search(self, query_vectors, k):
+    def search(self, query_vectors, k, params=None):
         # Return empty results
         n_queries = len(query_vectors)
         distances = np.full((n_queries, k), float('inf'))
@@ -22,8 +22,50 @@ class IndexFlatL2:
         self.vectors = []
         self.ntotal = 0
 
+    def reconstruct_n(self, i0, ni):
+        return np.array(self.vectors[i0:i0 + ni], dtype=np.float32).reshape(ni, self.d)
+
+class IndexIDMap2:
+    def __init__(self, index):
+        self.index = index
+        self.id_map = []
+        self.ntotal = 0
+
+    def add_with_ids(self, vectors, ids):
+        self.index.add(vectors)
+        self.id_map.extend(int(i) for i in ids)
+        self.ntotal = self.index.ntotal
+
+    def remove_ids(self, ids):
+        removed = set(int(i) for i in ids)
+        keep = [n for n, i in enumerate(self.id_map) if i not in removed]
+        self.index.vectors = [self.index.vectors[n] for n in keep]
+        self.index.ntotal = len(keep)
+        self.id_map = [self.id_map[n] for n in keep]
+        count = self.ntotal - len(keep)
+        self.ntotal = len(keep)
+        return count
+
+    def search(self, query_vectors, k, params=None):
+        return self.index.search(query_vectors, k)
+
+class IDSelectorBatch:
+    def __init__(self, ids):
+        self.ids = set(int(i) for i in ids)
+
+class IDSelectorNot:
+    def __init__(self, sel):
+        self.sel = sel
+
+class SearchParameters:
+    def __init__(self, sel=None):
+        self.sel = sel
+
 def IndexFlatIP(d):
     return IndexFlatL2(d)
 
 def normalize_L2(x):
-    return x / np.linalg.norm(x, axis=1, keepdims=True)
\ No newline at end of file
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def vector_to_array(v):
+    return np.array(v, dtype=np.int64)
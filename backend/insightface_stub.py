@@ -2,12 +2,26 @@
 import numpy as np
 import sys
 
+class DetectionModel:
+    def detect(self, img, max_num=0, metric='default'):
+        # No faces: (0, 5) boxes with scores and (0, 5, 2) keypoints
+        return np.zeros((0, 5), dtype=np.float32), np.zeros((0, 5, 2), dtype=np.float32)
+
+class RecognitionModel:
+    input_size = (112, 112)
+
+    def get_feat(self, imgs):
+        return np.zeros((len(imgs), 512), dtype=np.float32)
+
 class FaceAnalysis:
-    def __init__(self, name='buffalo_l', providers=['CPUExecutionProvider']):
+    def __init__(self, name='buffalo_l', providers=['CPUExecutionProvider'], allowed_modules=None):
         self.name = name
         self.providers = providers
+        self.allowed_modules = allowed_modules
+        self.det_model = DetectionModel()
+        self.models = {'detection': self.det_model, 'recognition': RecognitionModel()}
         
-    def prepare(self, ctx_id=0, det_size=(640, 640)):
+    def prepare(self, ctx_id=0, det_thresh=0.5, det_size=(640, 640)):
         pass
         
     def get(self, img):
@@ -9,12 +9,13 @@ import time
 from typing import Dict, List, Optional
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-import cv2
 import numpy as np
 from utils.logging import get_logger
+from utils.lazy_import import lazy_module
 from utils.security import get_db_manager
-from core.fts_system import FaceTrackingPipeline
+from core.fts_system import get_shared_pipeline
 from app.config import settings
+cv2 = lazy_module('cv2')
 logger = get_logger(__name__)
 class CameraMonitor:
     """
@@ -39,9 +40,9 @@ class CameraMonitor:
             logger.warning(f"Camera {camera_id} is already being monitored")
             return False
         try:
-            # Initialize pipeline if not exists
+            # The process-wide pipeline, shared with the routers
             if self.pipeline is None:
-                self.pipeline = FaceTrackingPipeline()
+                self.pipeline = get_shared_pipeline()
             # Mark camera as active
             self.active_cameras[camera_id] = True
             # Start monitoring thread
@@ -231,6 +232,26 @@ class StreamManager:
             self.active_streams[camera_id] -= 1
             if self.active_streams[camera_id] <= 0:
                 del self.active_streams[camera_id]
+    @contextmanager
+    def track_stream(self, camera_id: int):
+        """
+        Context manager that only accounts for a stream served from the
+        tracking pipeline's broadcaster, without opening the camera device.
+        Args:
+            camera_id: Camera identifier
+        Raises:
+            RuntimeError: If too many streams are active
+        """
+        current_streams = self.active_streams.get(camera_id, 0)
+        if current_streams >= self.max_streams_per_camera:
+            raise RuntimeError(f"Too many active streams for camera {camera_id}")
+        self.active_streams[camera_id] = current_streams + 1
+        try:
+            yield
+        finally:
+            self.active_streams[camera_id] -= 1
+            if self.active_streams[camera_id] <= 0:
+                del self.active_streams[camera_id]
     def get_active_stream_count(self, camera_id: int) -> int:
         """Get number of active streams for a camera."""
         return self.active_streams.get(camera_id, 0)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Idempotency tests for the group-commit attendance writer.
+Runs against a throwaway SQLite database with the application's schema.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.attendance_writer import AttendanceWriter
+from core.event_bus import AttendanceEvent
+from db.db_config import Base
+from db.db_models import AttendanceRecord
+
+# Start of a 10 s bucket
+BUCKET_START = datetime.fromtimestamp(1_700_000_000)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'attendance.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def crossing(seconds, tripwire="EntryDetection", employee_id="EMP001"):
+    return AttendanceEvent(employee_id=employee_id, employee_name="Test Employee", camera_id=0,
+                           event_type="check_in", timestamp=BUCKET_START + timedelta(seconds=seconds),
+                           tripwire=tripwire)
+
+
+def stored_rows(session_factory):
+    session = session_factory()
+    try:
+        return session.query(AttendanceRecord).all()
+    finally:
+        session.close()
+
+
+def test_duplicate_within_bucket_inserts_one_row(session_factory):
+    writer = AttendanceWriter(session_factory, bucket_seconds=10)
+    assert writer.write_batch([crossing(1)]) == 1
+    # A retried batch, and the same crossing logged again a few seconds later
+    assert writer.write_batch([crossing(1), crossing(6)]) == 0
+    rows = stored_rows(session_factory)
+    assert len(rows) == 1
+    assert rows[0].notes == "EntryDetection"
+    assert writer.get_metrics()["duplicates_skipped"] == 1
+
+
+def test_duplicates_in_one_batch_insert_one_row(session_factory):
+    writer = AttendanceWriter(session_factory, bucket_seconds=10)
+    assert writer.write_batch([crossing(2), crossing(3), crossing(9)]) == 1
+    assert len(stored_rows(session_factory)) == 1
+
+
+def test_next_bucket_and_other_tripwire_are_new_rows(session_factory):
+    writer = AttendanceWriter(session_factory, bucket_seconds=10)
+    inserted = writer.write_batch([crossing(1), crossing(11), crossing(1, tripwire="ExitDetection"),
+                                   crossing(1, employee_id="EMP002")])
+    assert inserted == 4
+    assert len(stored_rows(session_factory)) == 4
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the rotating attendance CSV backup: midnight rotation, the legacy
+header of existing files, and replay of a backup into the database.
+"""
+
+import csv
+import gzip
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import core.csv_backup as csv_backup
+from core.attendance_writer import AttendanceWriter
+from core.csv_backup import CSV_HEADER, LEGACY_CSV_HEADER, CsvBackupAppender, read_backup, replay_backup
+from core.event_bus import AttendanceEvent
+from db.db_config import Base
+from db.db_models import AttendanceRecord
+
+DAY = date(2024, 3, 14)
+
+
+class FakeDate(date):
+    """date whose today() the test controls"""
+    current = DAY
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture
+def fake_today(monkeypatch):
+    FakeDate.current = DAY
+    monkeypatch.setattr(csv_backup, "date", FakeDate)
+    return FakeDate
+
+
+@pytest.fixture
+def writer(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'attendance.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield AttendanceWriter(sessionmaker(bind=engine))
+    engine.dispose()
+
+
+def crossing(day, hour, employee_id="EMP001", event_type="check_in"):
+    return AttendanceEvent(employee_id=employee_id, employee_name="Test Employee", camera_id=0,
+                           event_type=event_type, timestamp=datetime(day.year, day.month, day.day, hour),
+                           tripwire="EntryDetection")
+
+
+def csv_rows(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as source:
+        return list(csv.reader(source))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_rotates_at_midnight_and_replays(tmp_path, fake_today, writer, compress):
+    path = str(tmp_path / "attendance_log.csv")
+    appender = CsvBackupAppender(path, compress=compress)
+    try:
+        appender.append([crossing(DAY, 9), crossing(DAY, 17, event_type="check_out")])
+        fake_today.current = DAY + timedelta(days=1)
+        appender.append([crossing(fake_today.current, 9)])
+    finally:
+        appender.close()
+
+    archive = str(tmp_path / f"attendance_log-{DAY.isoformat()}.csv") + (".gz" if compress else "")
+    assert appender.rotations == 1
+    archived = csv_rows(archive)
+    assert archived[0] == CSV_HEADER
+    assert [row[4] for row in archived[1:]] == ["check_in", "check_out"]
+    active = csv_rows(path)
+    assert active[0] == CSV_HEADER
+    assert len(active) == 2
+
+    assert replay_backup(archive, writer) == (2, 2)
+    assert replay_backup(path, writer) == (1, 1)
+    # Rows already in the database are skipped on a second replay
+    assert replay_backup(archive, writer) == (2, 0)
+    session = writer.session_factory()
+    try:
+        records = session.query(AttendanceRecord).order_by(AttendanceRecord.timestamp).all()
+    finally:
+        session.close()
+    assert [record.event_type for record in records] == ["check_in", "check_out", "check_in"]
+    assert {record.notes for record in records} == {"EntryDetection"}
+
+
+def test_keeps_legacy_header(tmp_path, fake_today, writer):
+    path = str(tmp_path / "attendance_log.csv")
+    with open(path, 'w', newline='', encoding='utf-8') as legacy:
+        csv.writer(legacy).writerow(LEGACY_CSV_HEADER)
+    appender = CsvBackupAppender(path)
+    try:
+        appender.append([crossing(DAY, 9)])
+    finally:
+        appender.close()
+
+    rows = csv_rows(path)
+    assert rows[0] == LEGACY_CSV_HEADER
+    assert len(rows[1]) == len(LEGACY_CSV_HEADER)
+    events = list(read_backup(path))
+    assert [(event.employee_id, event.tripwire) for event in events] == [("EMP001", None)]
+    assert replay_backup(path, writer) == (1, 1)
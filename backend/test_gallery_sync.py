@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for the id-mapped recognition gallery and its change-log syncer:
+GalleryIndex.replace with reused row ids and compaction, and the syncer's
+fall back to a full reload for change sets that are too large for a delta.
+Uses faiss when installed, else the repository's faiss stub (whose searches
+return nothing, so the search test needs the real library).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+try:
+    import faiss
+except ImportError:
+    import faiss_stub as faiss
+    sys.modules['faiss'] = faiss
+
+from core.employee_metadata import EmployeeMetadataStore
+from core.gallery_index import GalleryIndex
+from core.gallery_syncer import GallerySyncer
+
+DIM = 8
+REAL_FAISS = faiss.__name__ == 'faiss'
+
+
+def vectors(count, seed):
+    embeddings = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def gallery_of(employees=10, rows_per_employee=4, compact_fraction=0.1):
+    """Employees EMP000.. with row ids 0.. in order"""
+    gallery = GalleryIndex(compact_fraction=compact_fraction)
+    count = employees * rows_per_employee
+    labels = [f"EMP{row // rows_per_employee:03d}" for row in range(count)]
+    gallery.load(np.arange(count, dtype=np.int64), vectors(count, 0), labels)
+    return gallery
+
+
+def test_replace_tombstones_stale_rows_and_adds_new_ones():
+    gallery = gallery_of(compact_fraction=0.5)
+    removed, added = gallery.replace({"EMP001"}, np.array([5, 6, 7, 100], dtype=np.int64), vectors(4, 1),
+                                     ["EMP001"] * 4)
+    assert (removed, added) == (1, 1)
+    assert gallery.dead == {4}
+    assert gallery.employee_rows["EMP001"].tolist() == [5, 6, 7, 100]
+    assert len(gallery) == 40
+    assert gallery.index.ntotal == 41
+    assert gallery.compactions == 0
+
+
+def test_replace_removes_employee_without_rows():
+    gallery = gallery_of(compact_fraction=0.5)
+    assert gallery.replace({"EMP002"}, np.zeros(0, dtype=np.int64), vectors(0, 1), []) == (4, 0)
+    assert "EMP002" not in gallery.employee_rows
+    assert gallery.employee_count == 9
+    assert gallery.dead == {8, 9, 10, 11}
+
+
+def test_replace_with_reused_row_id_compacts_its_tombstone_first():
+    gallery = gallery_of(compact_fraction=0.5)
+    gallery.replace({"EMP001"}, np.array([5, 6, 7], dtype=np.int64), vectors(3, 1), ["EMP001"] * 3)
+    assert gallery.dead == {4}
+    # Row 4 comes back (e.g. a restored embedding), now for another employee
+    new_row = vectors(1, 2)
+    assert gallery.replace({"EMP003"}, np.array([4, 12, 13, 14, 15], dtype=np.int64),
+                           np.vstack([new_row, vectors(4, 3)]), ["EMP003"] * 5) == (0, 1)
+    assert gallery.compactions == 1
+    assert gallery.dead == set()
+    assert gallery.row_labels[4] == "EMP003"
+    assert gallery.index.ntotal == len(gallery) == 40
+    embeddings, labels, ids = gallery.export()
+    assert sorted(ids.tolist()) == sorted(gallery.row_labels)
+    assert labels[ids.tolist().index(4)] == "EMP003"
+    np.testing.assert_allclose(embeddings[ids.tolist().index(4)], new_row[0], rtol=1e-6)
+
+
+def test_replace_compacts_once_tombstones_pass_fraction():
+    gallery = gallery_of(employees=10, rows_per_employee=4, compact_fraction=0.1)
+    # 3 of 40 rows tombstoned: under 10%, kept
+    gallery.replace({"EMP000"}, np.array([3], dtype=np.int64), vectors(1, 1), ["EMP000"])
+    assert (len(gallery.dead), gallery.compactions) == (3, 0)
+    # 5 of 40: over 10%, all removed in one pass
+    gallery.replace({"EMP001"}, np.array([6, 7], dtype=np.int64), vectors(2, 1), ["EMP001"] * 2)
+    assert (len(gallery.dead), gallery.compactions) == (0, 1)
+    assert gallery.index.ntotal == len(gallery) == 35
+    assert gallery.get_metrics()["rows_removed"] == 5
+
+
+@pytest.mark.skipif(not REAL_FAISS, reason="needs faiss (the stub's searches return nothing)")
+def test_search_skips_tombstones_and_maps_rows_after_compaction():
+    gallery = gallery_of(compact_fraction=0.5)
+    embeddings, _, _ = gallery.export()
+    gallery.replace({"EMP001"}, np.array([5, 6, 7], dtype=np.int64), vectors(3, 1), ["EMP001"] * 3)
+    # Row 4 is tombstoned: its own embedding must not find it
+    assert all(score < 0.999 for _, score in gallery.search(embeddings[4], 3))
+    gallery.compact()
+    best, score = gallery.search(embeddings[20], 1)[0]
+    assert best == "EMP005" and score == pytest.approx(1.0, abs=1e-5)
+
+
+class FakeDatabase:
+    """The DatabaseManager calls the syncer makes, over an in-memory change log"""
+    def __init__(self, changes):
+        self.changes = changes
+        self.gallery_reads = []
+
+    def get_gallery_change_cursor(self):
+        return self.changes[-1][0] if self.changes else 0
+
+    def get_gallery_changes(self, cursor):
+        return [change for change in self.changes if change[0] > cursor]
+
+    def get_active_gallery(self, employee_ids):
+        self.gallery_reads.append(set(employee_ids))
+        labels = sorted(employee_ids)
+        return 7, np.arange(len(labels), dtype=np.int64), vectors(len(labels), 0), labels
+
+    def get_employee(self, employee_id):
+        return None
+
+
+def make_syncer(database, max_delta_employees):
+    calls = {"deltas": [], "reloads": []}
+    syncer = GallerySyncer(
+        database, EmployeeMetadataStore(),
+        apply_delta=lambda version, employee_ids, *rows: calls["deltas"].append(set(employee_ids)),
+        full_reload=lambda force: calls["reloads"].append(force) or True,
+        max_delta_employees=max_delta_employees)
+    syncer.cursor = 0
+    return syncer, calls
+
+
+def test_sync_applies_small_change_set_as_delta():
+    database = FakeDatabase([(1, "EMP001", "embeddings"), (2, "EMP002", "embeddings"), (3, "EMP001", "embeddings")])
+    syncer, calls = make_syncer(database, max_delta_employees=2)
+    assert syncer.sync() == 3
+    assert calls == {"deltas": [{"EMP001", "EMP002"}], "reloads": []}
+    assert database.gallery_reads == [{"EMP001", "EMP002"}]
+    assert syncer.cursor == 3
+    assert syncer.sync() == 0
+
+
+def test_sync_falls_back_to_full_reload_above_max_delta_employees():
+    database = FakeDatabase([(change, f"EMP{change:03d}", "embeddings") for change in range(1, 5)])
+    syncer, calls = make_syncer(database, max_delta_employees=3)
+    assert syncer.sync() == 4
+    assert calls == {"deltas": [], "reloads": [True]}
+    # The changed employees' rows are never read one by one
+    assert database.gallery_reads == []
+    assert syncer.cursor == 4
+    assert syncer.get_metrics()["full_reloads"] == 1
+    assert syncer.dirty
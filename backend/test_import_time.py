@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Import-time regression test for the API entry points.
+Each entry point is imported in a fresh interpreter under `python -X importtime`;
+the vision stack (OpenCV, FAISS, InsightFace, torch, ByteTrack) must not be
+imported, and the total import time must stay within budget.
+"""
+
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds; the entry points import in under 1 s on a slow single core
+IMPORT_BUDGETS = {
+    "app.main_user_system": 2.0,
+    "app.main": 2.5,
+}
+VISION_MODULES = ("cv2", "faiss", "torch", "insightface", "bytetracker", "onnxruntime")
+
+
+def import_profile(module):
+    """Cumulative import time in seconds of every module imported by `import module`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative) / 1e6
+    return profile
+
+
+def test_api_entry_points_skip_vision_stack():
+    for module in IMPORT_BUDGETS:
+        profile = import_profile(module)
+        loaded = sorted(name for name in profile if name.split(".")[0] in VISION_MODULES)
+        assert not loaded, f"{module} imports the vision stack: {loaded}"
+
+
+def test_api_entry_points_import_budget():
+    for module, budget in IMPORT_BUDGETS.items():
+        seconds = import_profile(module)[module]
+        print(f"{module}: {seconds:.2f}s (budget {budget:.1f}s)")
+        assert seconds <= budget, f"{module} took {seconds:.2f}s to import (budget {budget:.1f}s)"
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Crossing tests for TripwireEngine: both directions, pending crossings on
+predicted paths and their expiry. Every test runs on the track-by-track path
+and on the numpy pass.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from core.tripwire_engine import TripwireConfig, TripwireEngine
+
+WIDTH, HEIGHT = 1000, 1000
+# Band from y=495 to y=505
+HORIZONTAL = TripwireConfig(position=0.5, spacing=0.01, direction="horizontal", name="EntryDetection")
+# Band around the segment (200, 300) - (600, 300)
+SEGMENT = TripwireConfig(position=0, spacing=0.02, direction="", name="DoorDetection",
+                         points=[(0.2, 0.3), (0.6, 0.3)])
+
+
+@pytest.fixture(params=[32, 0], ids=["per-track", "numpy"])
+def make_engine(request):
+    return lambda tripwires=(HORIZONTAL,): TripwireEngine(tripwires, scalar_tracks=request.param)
+
+
+def walk(engine, key, ys, start=0, x=500):
+    """Detections of one track at (x, y) for each y; returns (frame, direction) of its crossings"""
+    return [(frame, crossing.direction) for frame, y in enumerate(ys, start)
+            for crossing in engine.update([key], [(x, y)], WIDTH, HEIGHT, now=frame)]
+
+
+def test_crossings_in_both_directions(make_engine):
+    engine = make_engine()
+    assert walk(engine, "EMP001", [400, 480, 520, 600]) == [(2, 1)]
+    assert walk(engine, "EMP002", [600, 520, 480, 400]) == [(2, -1)]
+    # Back across, after the first crossing
+    assert walk(engine, "EMP001", [520, 480], start=4) == [(5, -1)]
+
+
+def test_jump_across_band_between_sparse_detections(make_engine):
+    engine = make_engine()
+    assert walk(engine, "EMP001", [300, 700]) == [(1, 1)]
+
+
+def test_inside_band_and_turn_back_do_not_fire(make_engine):
+    engine = make_engine()
+    assert walk(engine, "EMP001", [400, 490, 500, 490, 400]) == []
+
+
+def test_segment_fires_only_through_its_extent(make_engine):
+    engine = make_engine([SEGMENT])
+    assert walk(engine, "EMP001", [250, 350], x=400) == [(1, 1)]
+    # Around the end of the segment: the path meets the wire's line beyond it
+    assert [crossing for y in (250, 350) for crossing in
+            engine.update(["EMP002"], [(700, y)], WIDTH, HEIGHT)] == []
+
+
+def test_pending_crossing_fires_on_detection_past_wire(make_engine):
+    engine = make_engine()
+    walk(engine, "EMP001", [400, 470])
+    assert engine.update(["EMP001"], [(500, 540)], WIDTH, HEIGHT, now=2, predicted=True) == []
+    # Still inside the band: stays pending
+    assert walk(engine, "EMP001", [500], start=3) == []
+    assert walk(engine, "EMP001", [560], start=4) == [(4, 1)]
+    assert engine.expire_pending(100) == []
+
+
+def test_pending_crossing_cancelled_on_original_side(make_engine):
+    engine = make_engine()
+    walk(engine, "EMP001", [400, 470])
+    engine.update(["EMP001"], [(500, 540)], WIDTH, HEIGHT, now=2, predicted=True)
+    assert walk(engine, "EMP001", [450], start=3) == []
+    assert engine.expire_pending(100) == []
+    # Back on the original side: a later real crossing still counts
+    assert walk(engine, "EMP001", [560], start=4) == [(4, 1)]
+
+
+def test_pending_crossing_expiry(make_engine):
+    engine = make_engine()
+    for key in ("gone", "stopped"):
+        walk(engine, key, [400, 470])
+        engine.update([key], [(500, 540)], WIDTH, HEIGHT, now=2, predicted=True)
+    # "stopped" is seen again inside the band and never passes; "gone" is not seen again
+    walk(engine, "stopped", [500], start=3)
+    assert engine.expire_pending(2) == []
+    expired = engine.expire_pending(3)
+    assert [(crossing.key, crossing.tripwire, crossing.direction) for crossing in expired] == [("gone", 0, 1)]
+    assert engine.expire_pending(100) == []
+    # The stopped track is back on its original side
+    assert walk(engine, "stopped", [560], start=5) == [(5, 1)]
@@ -0,0 +1,46 @@
+"""
+Deferred imports of heavy optional modules.
+The vision stack (OpenCV, FAISS, InsightFace, torch) costs seconds to import
+and is only needed once the tracking pipeline runs. Modules that use it bind
+a LazyModule at import time instead, and the real module is imported on the
+first attribute access. API processes that never touch the pipeline (user
+management, auth) therefore never load it. Modules already in sys.modules
+(e.g. the patch_imports stubs) are used as they are.
+"""
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first use.
+    Args:
+        name: Absolute module name
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self.__name__)
+            return self._module
+
+    def __getattr__(self, name: str):
+        module = self._module or self._load()
+        return getattr(module, name)
+
+    def __dir__(self):
+        return dir(self._module or self._load())
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+
+def lazy_module(name: str) -> LazyModule:
+    """Module `name`, imported the first time one of its attributes is read."""
+    return LazyModule(name)
@@ -0,0 +1,153 @@
+"""
+Fixed-capacity in-memory store of recent structured log records.
+Fed by a logging handler on the queue listener thread, so producers only pay
+for an enqueue; readers get filtered, paginated views for the API.
+"""
+import itertools
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# "[INDEX REBUILD] ..." style prefixes used by the tracking pipeline
+TAG_PATTERN = re.compile(r"^\[([A-Z][A-Z _-]*)\]\s*")
+LEVEL_TAGS = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
+
+
+class LogEntry:
+    __slots__ = ("seq", "created", "monotonic", "level", "component", "camera_id", "employee_id", "message")
+
+    def __init__(self, seq, created, monotonic, level, component, camera_id, employee_id, message):
+        self.seq = seq
+        self.created = created
+        self.monotonic = monotonic
+        self.level = level
+        self.component = component
+        self.camera_id = camera_id
+        self.employee_id = employee_id
+        self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "timestamp": datetime.fromtimestamp(self.created).isoformat(timespec="milliseconds"),
+            "monotonic": self.monotonic,
+            "level": self.level,
+            "component": self.component,
+            "camera_id": self.camera_id,
+            "employee_id": self.employee_id,
+            "message": self.message}
+
+
+class LogRingBuffer:
+    """
+    Ring of the most recent log entries.
+    Writes replace the slot at seq % capacity; there is a single writer (the
+    queue listener thread) and readers tolerate a concurrently overwritten slot
+    by checking its sequence number.
+    Args:
+        capacity: Number of entries kept
+    """
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._slots: List[Optional[LogEntry]] = [None] * capacity
+        self._seq = itertools.count()
+        self._next = 0
+
+    def append(self, level: str, message: str, component: str = None, camera_id: int = None,
+               employee_id: str = None, created: float = None, monotonic: float = None) -> LogEntry:
+        seq = next(self._seq)
+        entry = LogEntry(
+            seq,
+            created if created is not None else time.time(),
+            monotonic if monotonic is not None else time.monotonic(),
+            level, component, camera_id, employee_id, message)
+        self._slots[seq % self.capacity] = entry
+        self._next = seq + 1
+        return entry
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    def query(self, n: int = 100, offset: int = 0, level: Optional[str] = None, component: Optional[str] = None,
+              camera_id: Optional[int] = None, employee_id: Optional[str] = None,
+              after_seq: Optional[int] = None) -> List[LogEntry]:
+        """
+        Newest-first page of matching entries, returned in chronological order.
+        Args:
+            n: Page size
+            offset: Number of newest matching entries to skip
+            level: Minimum level name (e.g. "WARNING")
+            component: Component tag or logger name
+            camera_id: Only entries about this camera
+            employee_id: Only entries about this employee
+            after_seq: Only entries newer than this sequence number (for tailing)
+        """
+        min_level = logging.getLevelName(level.upper()) if level else None
+        if not isinstance(min_level, int):
+            min_level = None
+        end = self._next
+        start = max(0, end - self.capacity)
+        if after_seq is not None:
+            start = max(start, after_seq + 1)
+        page: List[LogEntry] = []
+        skipped = 0
+        for seq in range(end - 1, start - 1, -1):
+            entry = self._slots[seq % self.capacity]
+            if entry is None or entry.seq != seq:
+                continue
+            if min_level is not None and logging.getLevelName(entry.level) < min_level:
+                continue
+            if component is not None and entry.component != component:
+                continue
+            if camera_id is not None and entry.camera_id != camera_id:
+                continue
+            if employee_id is not None and entry.employee_id != employee_id:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            page.append(entry)
+            if len(page) >= n:
+                break
+        page.reverse()
+        return page
+
+
+class RingBufferHandler(logging.Handler):
+    """Copies log records into a LogRingBuffer as structured entries."""
+    def __init__(self, store: LogRingBuffer, level=logging.NOTSET):
+        super().__init__(level)
+        self.store = store
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.getMessage()
+            component = getattr(record, "component", None)
+            tag = TAG_PATTERN.match(message)
+            if tag:
+                if tag.group(1) not in LEVEL_TAGS:
+                    component = component or tag.group(1)
+                message = message[tag.end():]
+            self.store.append(
+                level=logging.getLevelName(record.levelno),
+                message=message,
+                component=component or record.name,
+                camera_id=getattr(record, "camera_id", None),
+                employee_id=getattr(record, "employee_id", None),
+                created=record.created,
+                monotonic=getattr(record, "monotonic", None))
+        except Exception:
+            self.handleError(record)
+
+
+class MonotonicStampFilter(logging.Filter):
+    """Stamps records with a monotonic time in the producing thread."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.monotonic = time.monotonic()
+        return True
+
+
+# Process-wide store behind get_logs()
+log_store = LogRingBuffer(capacity=1000)
@@ -5,11 +5,17 @@ formatting for better debugging and monitoring.
 """
 import os
 import sys
+import atexit
+import queue
 import logging
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from pathlib import Path
 from typing import Optional
 from app.config import settings
+from utils.log_store import log_store, RingBufferHandler, MonotonicStampFilter
+
+# Background thread that runs the real handlers for all FaceTrackingSystem loggers
+_queue_listener: Optional[QueueListener] = None
 class ColoredFormatter(logging.Formatter):
     """Custom formatter to add colors to console output"""
     # Color codes
@@ -33,6 +39,8 @@ def setup_logging(
 ) -> logging.Logger:
     """
     Setup centralized logging configuration.
+    Loggers only enqueue records; file, console and in-memory store handlers
+    run on a single QueueListener thread.
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Path to log file (optional)
@@ -53,7 +61,12 @@ def setup_logging(
     logger = logging.getLogger("FaceTrackingSystem")
     logger.setLevel(numeric_level)
     # Clear existing handlers
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
     logger.handlers.clear()
+    handlers = []
     # Create formatters
     file_formatter = logging.Formatter(
         fmt='%(asctime)s | %(levelname)-8s | %(name)s:%(lineno)d | %(message)s',
@@ -73,7 +86,7 @@ def setup_logging(
                 encoding='utf-8')
             file_handler.setLevel(numeric_level)
             file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
         except Exception as e:
             print(f"Warning: Could not setup file logging: {e}")
     # Add console handler if enabled
@@ -81,13 +94,27 @@ def setup_logging(
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(numeric_level)
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     # Add error handler for stderr
     error_handler = logging.StreamHandler(sys.stderr)
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(console_formatter)
-    logger.addHandler(error_handler)
+    handlers.append(error_handler)
+    # Structured ring buffer behind get_logs()
+    handlers.append(RingBufferHandler(log_store))
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(MonotonicStampFilter())
+    logger.addHandler(queue_handler)
+    _queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
     return logger
+def stop_logging():
+    """Flush queued records and stop the logging listener thread."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance for a specific module/class.
@@ -148,4 +175,5 @@ def log_authentication(logger: logging.Logger, username: str, success: bool, ip_
         level,
         f"Authentication {status} for user '{username}' from IP {ip_address}")
 # Initialize default logger
-default_logger = setup_logging()
\ No newline at end of file
+default_logger = setup_logging()
+atexit.register(stop_logging)
\ No newline at end of file
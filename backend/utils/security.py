@@ -58,12 +58,27 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
     Returns:
         Token payload dictionary
         
+    Raises:
+        HTTPException: If token is invalid, expired, or user is inactive
+    """
+    return decode_token(credentials.credentials)
+
+def decode_token(token: str) -> Dict:
+    """
+    Verify a raw JWT string (e.g. from a WebSocket query parameter) and return payload.
+    
+    Args:
+        token: Encoded JWT token
+        
+    Returns:
+        Token payload dictionary
+        
     Raises:
         HTTPException: If token is invalid, expired, or user is inactive
     """
     try:
         payload = jwt.decode(
-            credentials.credentials, 
+            token, 
             settings.SECRET_KEY, 
             algorithms=[settings.ALGORITHM]
         )